@@ -4,7 +4,8 @@ Handles user registration, login, and token management
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from app.core.database import get_db
@@ -12,15 +13,24 @@ from app.core.config import settings
 from app.schemas.auth import LoginRequest, TokenResponse
 from app.schemas.user import UserCreate, UserResponse
 from app.models.user import User
-from app.security.password import verify_password, get_password_hash
+from app.security.password import (
+    PasswordHasherBusy, verify_password_async, get_password_hash_async)
 from app.security.jwt import create_access_token
 from app.security.deps import get_current_active_user
 
 router = APIRouter()
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Demasiadas solicitudes, inténtalo de nuevo en unos segundos",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Register a new user.
 
@@ -29,32 +39,38 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     - **full_name**: Optional full name
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(
-        User.email == user_data.email).first()
+    existing_user = (await db.execute(
+        select(User.id).where(User.email == user_data.email))).first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El email ya está registrado"
         )
 
+    # Hash off the event loop; bcrypt is deliberately slow
+    try:
+        hashed_password = await get_password_hash_async(user_data.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+
     # Create new user
     new_user = User(
         email=user_data.email,
         full_name=user_data.full_name,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=hashed_password,
         is_active=True,
         is_superuser=False
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
 
     return new_user
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_db)):
     """
     Login to get access token.
 
@@ -64,9 +80,16 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     Returns JWT access token.
     """
     # Get user from database
-    user = db.query(User).filter(User.email == login_data.email).first()
+    user = (await db.execute(
+        select(User).where(User.email == login_data.email))).scalar_one_or_none()
+
+    try:
+        valid = user is not None and await verify_password_async(
+            login_data.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
 
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
@@ -0,0 +1,53 @@
+"""
+Metrics endpoint
+Exposes in-process metrics in the Prometheus text format
+"""
+
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.metrics import CONTENT_TYPE, REGISTRY, Counter, Gauge
+from app.security.jwt import token_cache
+from app.security.password import password_hasher_load
+from app.security.user_cache import user_cache
+from app.services.job_queue import job_counts
+from app.services.report_cache import report_cache
+
+router = APIRouter()
+
+CACHES = {
+    'user': user_cache,
+    'token': token_cache,
+    'report': report_cache,
+}
+
+
+def _cache_stat(stat: str):
+    return lambda: {(name, ): cache.stats()[stat] for name, cache in CACHES.items()}
+
+
+# Values read on every scrape
+Counter("securecheck_cache_hits_total", "Cache lookups that found an entry",
+        ["cache"], callback=_cache_stat('hits'))
+Counter("securecheck_cache_misses_total", "Cache lookups that found nothing",
+        ["cache"], callback=_cache_stat('misses'))
+Counter("securecheck_cache_evictions_total", "Entries evicted to stay within limits",
+        ["cache"], callback=_cache_stat('evictions'))
+Gauge("securecheck_cache_entries", "Entries currently cached",
+      ["cache"], callback=_cache_stat('entries'))
+Gauge("securecheck_cache_hit_ratio", "Share of lookups served from the cache",
+      ["cache"], callback=_cache_stat('hit_rate'))
+Gauge("securecheck_password_hash_in_flight", "Password hashing operations running or queued",
+      callback=password_hasher_load)
+
+SCAN_JOBS = Gauge("securecheck_scan_jobs", "Scan jobs by status; 'queued' is the queue depth",
+                  ["status"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(db: AsyncSession = Depends(get_db)):
+    """Prometheus scrape endpoint"""
+    for status, count in (await db.run_sync(job_counts)).items():
+        SCAN_JOBS.set(count, status=status)
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -2,35 +2,151 @@
 Report and statistics endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-import json
-import csv
-from io import StringIO
+from typing import Callable, Dict, Iterator, List, Optional
 
 from app.core.database import get_db
+from app.models.scan import Scan
 from app.models.user import User
 from app.schemas.report import ReportResponse, UserStatistics, ScanSummary
-from app.services.report_service import ReportGenerator, get_user_statistics, get_site_history
+from app.services.report_service import get_user_statistics, get_site_history
+from app.services.artifact_service import GZIP, IDENTITY, artifact_file, get_artifact
+from app.services.report_cache import (
+    etag_matches, is_cacheable, report_cache, report_cache_key, report_etag)
 from app.services.scan_service import get_scan
+from app.services.export_service import (
+    iter_scan_csv, iter_scan_json, iter_scan_ndjson, iter_user_scans_csv,
+    scan_has_findings, stream_in_session)
 from app.security.deps import get_current_user
 
 router = APIRouter()
 
+# Finished reports never change, but clients must revalidate in case the
+# scan is deleted
+REPORT_CACHE_CONTROL = "private, no-cache"
 
-@router.get("/scans/{scan_id}/report", response_model=ReportResponse)
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows a gzip response"""
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            quality = params.strip().lower()
+            return quality not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+async def _artifact_response(
+    request: Request,
+    db: AsyncSession,
+    scan_id: int,
+    kind: str,
+    media_type: str,
+    headers: Dict[str, str]
+) -> Optional[Response]:
+    """
+    Serve a report rendered when the scan completed, if one was stored.
+
+    The gzip variant is sent as-is to clients that accept it. Files are sent
+    with FileResponse, which uses sendfile where the server supports it.
+    """
+    encoding = GZIP if _accepts_gzip(request.headers.get("accept-encoding")) else IDENTITY
+    artifact = await db.run_sync(get_artifact, scan_id, kind, encoding)
+    if artifact is None:
+        return None
+
+    etag = f'"{artifact.sha256}"'
+    validators = {
+        "ETag": etag,
+        "Cache-Control": REPORT_CACHE_CONTROL,
+        "Vary": "Accept-Encoding"
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+
+    headers = {**headers, **validators}
+    if encoding == GZIP:
+        headers["Content-Encoding"] = "gzip"
+
+    path = artifact_file(artifact)
+    if path is not None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    artifact = await db.run_sync(get_artifact, scan_id, kind, encoding, with_content=True)
+    if artifact is None or artifact.content is None:
+        return None
+    return Response(content=artifact.content, media_type=media_type, headers=headers)
+
+
+async def _report_response(
+    request: Request,
+    db: AsyncSession,
+    scan: Scan,
+    kind: str,
+    render: Callable[[Session], Iterator[str]],
+    media_type: str,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serve a rendered report.
+
+    Reports of finished scans carry a strong ETag. A matching If-None-Match
+    gets a 304 without touching the findings. Reports stored when the scan
+    completed are served from storage, small ones are kept in the report
+    cache, and everything else is streamed.
+
+    ``render`` reads the report through a synchronous session: the request's
+    own for cached reports, or one owned by the stream otherwise.
+    """
+    headers = dict(headers or {})
+    key = report_cache_key(scan, kind)
+    if key is None:
+        return StreamingResponse(
+            stream_in_session(render), media_type=media_type, headers=headers)
+
+    stored = await _artifact_response(request, db, scan.id, kind, media_type, headers)
+    if stored is not None:
+        return stored
+
+    etag = report_etag(key)
+    validators = {"ETag": etag, "Cache-Control": REPORT_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators)
+    headers.update(validators)
+
+    body = report_cache.get(key)
+    if body is None:
+        if not is_cacheable(scan):
+            return StreamingResponse(
+                stream_in_session(render), media_type=media_type, headers=headers)
+        body = await db.run_sync(lambda session: "".join(render(session)).encode("utf-8"))
+        report_cache.set(key, body, size=len(body))
+
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+# The report is returned as rendered (cached, stored or streamed) JSON, so
+# ReportResponse only documents it and is not applied as a response_model
+@router.get(
+    "/scans/{scan_id}/report",
+    responses={200: {"model": ReportResponse, "description": "Scan report"}}
+)
 async def get_scan_report(
     scan_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get a complete report for a scan
 
-    Returns summary, vulnerabilities, and recommendations
+    Returns summary, vulnerabilities, and recommendations. Reports of
+    finished scans support conditional requests with If-None-Match.
     """
-    scan = get_scan(db, scan_id, current_user.id)
+    scan = await get_scan(db, scan_id, current_user.id)
 
     if not scan:
         raise HTTPException(
@@ -38,22 +154,24 @@ async def get_scan_report(
             detail="Scan not found"
         )
 
-    generator = ReportGenerator(scan)
-    report = generator.generate_json_report()
-
-    return report
+    return await _report_response(
+        request, db, scan, "json", lambda session: iter_scan_json(session, scan), "application/json")
 
 
 @router.get("/scans/{scan_id}/export/json")
 async def export_scan_json(
     scan_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Export scan report as JSON file
+
+    The report is encoded while findings are read, so memory use does not
+    grow with the size of the scan
     """
-    scan = get_scan(db, scan_id, current_user.id)
+    scan = await get_scan(db, scan_id, current_user.id)
 
     if not scan:
         raise HTTPException(
@@ -61,13 +179,8 @@ async def export_scan_json(
             detail="Scan not found"
         )
 
-    generator = ReportGenerator(scan)
-    report = generator.generate_json_report()
-
-    json_content = json.dumps(report, indent=2)
-
-    return Response(
-        content=json_content,
+    return await _report_response(
+        request, db, scan, "json", lambda session: iter_scan_json(session, scan),
         media_type="application/json",
         headers={
             "Content-Disposition": f"attachment; filename=scan_{scan_id}_report.json"
@@ -75,16 +188,69 @@ async def export_scan_json(
     )
 
 
+@router.get("/scans/{scan_id}/export/ndjson")
+async def export_scan_ndjson(
+    scan_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export scan report as newline-delimited JSON
+
+    One summary line, one line per vulnerability and a final recommendations
+    line, each tagged with a record_type. Suited for log pipelines and SIEMs.
+    """
+    scan = await get_scan(db, scan_id, current_user.id)
+
+    if not scan:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Scan not found"
+        )
+
+    return await _report_response(
+        request, db, scan, "ndjson", lambda session: iter_scan_ndjson(session, scan),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": f"attachment; filename=scan_{scan_id}_report.ndjson"
+        }
+    )
+
+
+@router.get("/scans/export/csv")
+async def export_scans_csv(
+    scan_ids: Optional[List[int]] = Query(None, alias="scan_id"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export the vulnerabilities of several scans as one CSV file
+
+    - **scan_id**: Scan to include, may be repeated (default: all your scans)
+    """
+    return StreamingResponse(
+        stream_in_session(
+            lambda session: iter_user_scans_csv(session, current_user.id, scan_ids)),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": "attachment; filename=scans_vulnerabilities.csv"
+        }
+    )
+
+
 @router.get("/scans/{scan_id}/export/csv")
 async def export_scan_csv(
     scan_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Export scan vulnerabilities as CSV file
+
+    Rows are streamed from the database, so large scans are never held in memory
     """
-    scan = get_scan(db, scan_id, current_user.id)
+    scan = await get_scan(db, scan_id, current_user.id)
 
     if not scan:
         raise HTTPException(
@@ -92,28 +258,14 @@ async def export_scan_csv(
             detail="Scan not found"
         )
 
-    generator = ReportGenerator(scan)
-    csv_data = generator.generate_csv_data()
-
-    if not csv_data:
+    if not await db.run_sync(scan_has_findings, scan):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No vulnerabilities to export"
         )
 
-    # Generate CSV
-    output = StringIO()
-    fieldnames = ['Severity', 'Title',
-                  'Description', 'Recommendation', 'Detected']
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-
-    writer.writeheader()
-    writer.writerows(csv_data)
-
-    csv_content = output.getvalue()
-
-    return Response(
-        content=csv_content,
+    return await _report_response(
+        request, db, scan, "csv", lambda session: iter_scan_csv(session, scan_id),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename=scan_{scan_id}_vulnerabilities.csv"
@@ -123,7 +275,7 @@ async def export_scan_csv(
 
 @router.get("/stats/user", response_model=UserStatistics)
 async def get_current_user_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -131,20 +283,26 @@ async def get_current_user_stats(
 
     Returns total scans, vulnerabilities, and other metrics
     """
-    stats = get_user_statistics(db, current_user.id)
+    stats = await get_user_statistics(db, current_user.id)
     return stats
 
 
 @router.get("/stats/site/{domain}", response_model=List[ScanSummary])
 async def get_domain_history(
     domain: str,
-    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = 50,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get scan history for a specific domain
 
-    Returns all scans performed on this domain by the current user
+    Returns the scans performed on this domain by the current user, newest first
+
+    - **skip**: Number of scans to skip (pagination)
+    - **limit**: Maximum number of scans to return (max 100)
     """
-    history = get_site_history(db, current_user.id, domain)
+    history = await get_site_history(
+        db, current_user.id, domain, skip=max(skip, 0), limit=min(max(limit, 1), 100))
     return history
@@ -3,41 +3,71 @@ Scan endpoints
 Handles scan creation, retrieval, and management
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
 from app.core.database import get_db
 from app.models.user import User
-from app.schemas.scan import ScanCreate, ScanResponse, ScanListResponse
-from app.services import scan_service
+from app.models.scan import ScanStatus
+from app.schemas.scan import (
+    ScanBatchCreate, ScanBatchResponse, ScanBatchStatus, ScanCreate, ScanResponse,
+    ScanListResponse, ScanStatusEnum, ScanTypeEnum)
+from app.services import batch_service, scan_service
 from app.security.deps import get_current_user
+from app.security.rate_limit import charge_batch_targets
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl")
+
+
+def _validation_error(
+    e: ValidationError,
+    *loc,
+    lines: Optional[List[int]] = None
+) -> RequestValidationError:
+    """
+    Report a validation error like FastAPI does for request bodies.
+
+    With ``lines``, the error is about a list of items read from those body
+    lines, and each item is located by its line number instead of its index.
+    """
+    errors = e.errors(include_url=False, include_context=False)
+    if lines is not None:
+        errors = [
+            {**error, 'loc': (lines[error['loc'][0]], *error['loc'][1:])}
+            for error in errors
+        ]
+    return RequestValidationError([
+        {**error, 'loc': ('body', *loc, *error['loc'])}
+        for error in errors
+    ])
+
 
 @router.post("/", response_model=ScanResponse, status_code=status.HTTP_201_CREATED)
 async def create_scan(
     scan_data: ScanCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Create a new security scan
 
     - **target_url**: URL or domain to scan
-    - **scan_type**: Type of scan (basic, headers, ssl, full)
+    - **scan_type**: Type of scan (basic, headers, ssl, full, ports)
+    - **max_age**: Reuse header and TLS probe results up to this many seconds old
+    - **force_fresh**: Probe the target even if recent results are cached
 
-    The scan will be executed in the background
+    Each check's timings report whether its result came from the cache.
+    The scan is queued and executed by a worker process (see worker.py)
     """
     try:
-        # Create the scan
+        # Create the scan and queue it in the same transaction
         scan = await scan_service.create_scan(db, scan_data, current_user.id)
 
-        # Execute scan in background
-        background_tasks.add_task(scan_service.execute_scan, db, scan.id)
-
         return scan
 
     except Exception as e:
@@ -47,43 +77,163 @@ async def create_scan(
         )
 
 
+@router.post(
+    "/batch",
+    response_model=ScanBatchResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": ScanBatchCreate.model_json_schema()},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    }
+)
+async def create_scan_batch(
+    request: Request,
+    scan_type: ScanTypeEnum = ScanTypeEnum.BASIC,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create many scans in one request
+
+    Send either a JSON body with **targets**, **scan_type** and optionally
+    **max_age** and **force_fresh**, applied to every target, or an NDJSON
+    body (Content-Type: application/x-ndjson) with one target per line, as a
+    string or as an object like the body of POST /scans. For NDJSON, the
+    **scan_type** query parameter applies to lines without one, and errors
+    locate targets by line number (from 1) rather than by index.
+
+    Targets are validated together; if any is invalid nothing is created
+    and every error is reported. Scan IDs are returned in the order the
+    targets were sent. Follow progress with GET /scans/batch/{batch_id}.
+    Each target counts against RATE_LIMIT_BATCH_TARGETS_PER_MINUTE.
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    loc = ()
+    lines = None
+    try:
+        if media_type in NDJSON_MEDIA_TYPES:
+            numbered = await batch_service.read_ndjson_targets(request.stream(), scan_type)
+            lines = [number for number, _ in numbered]
+            items = [item for _, item in numbered]
+        else:
+            try:
+                payload = ScanBatchCreate.model_validate_json(await request.body())
+            except ValidationError as e:
+                raise _validation_error(e)
+            batch_service.check_batch_size(len(payload.targets))
+            items = [
+                {'target_url': target, 'scan_type': payload.scan_type,
+                 'max_age': payload.max_age, 'force_fresh': payload.force_fresh}
+                for target in payload.targets
+            ]
+            loc = ('targets',)
+
+        scans = batch_service.validate_targets(items)
+
+    except batch_service.BatchTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ValidationError as e:
+        raise _validation_error(e, *loc, lines=lines)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    if not scans:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No targets given"
+        )
+
+    # Every target is a scan, so batches are limited by their size
+    limited = await charge_batch_targets(current_user.id, len(scans))
+    if limited is not None and not limited.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiadas solicitudes",
+            headers={"Retry-After": str(max(1, int(limited.retry_after + 0.999)))}
+        )
+
+    batch, scan_ids = await batch_service.create_batch(db, scans, current_user.id)
+    return {'batch_id': batch.id, 'total': len(scan_ids), 'scan_ids': scan_ids}
+
+
+@router.get("/batch/{batch_id}", response_model=ScanBatchStatus)
+async def get_scan_batch(
+    batch_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the aggregate progress of a batch
+
+    Counts the batch's scans per status; **done** is true once none is
+    pending or running.
+    """
+    batch = await batch_service.get_batch_status(db, batch_id, current_user.id)
+
+    if not batch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch not found or you don't have permission to access it"
+        )
+
+    return batch
+
+
 @router.get("/", response_model=List[ScanListResponse])
 async def list_scans(
-    skip: int = 0,
+    response: Response,
     limit: int = 100,
-    status_filter: Optional[str] = None,
-    db: Session = Depends(get_db),
+    status_filter: Optional[ScanStatusEnum] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all scans for the current user
+    Get the current user's scans, newest first
 
-    - **skip**: Number of records to skip (pagination)
-    - **limit**: Maximum number of records to return
-    - **status**: Filter by status (pending, running, completed, failed)
+    - **limit**: Maximum number of records to return (max 500)
+    - **status_filter**: Filter by status (pending, running, completed, failed)
+    - **cursor**: Value of the X-Next-Cursor header from the previous page
+
+    When more scans are available, the X-Next-Cursor response header holds
+    the cursor for the next page.
     """
-    scans = scan_service.get_user_scans(
-        db,
-        current_user.id,
-        skip=skip,
-        limit=limit,
-        status=status_filter
-    )
+    try:
+        scans, next_cursor = await scan_service.get_user_scans(
+            db,
+            current_user.id,
+            limit=min(max(limit, 1), 500),
+            status=ScanStatus(status_filter.value) if status_filter else None,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
-    # Add vulnerability count to each scan
-    result = []
-    for scan in scans:
-        scan_dict = ScanListResponse.model_validate(scan)
-        scan_dict.vulnerability_count = len(scan.vulnerabilities)
-        result.append(scan_dict)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
-    return result
+    # Vulnerability counts are stored on each scan, so no findings are loaded
+    return [ScanListResponse.model_validate(scan) for scan in scans]
 
 
 @router.get("/{scan_id}", response_model=ScanResponse)
 async def get_scan(
     scan_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -91,7 +241,8 @@ async def get_scan(
 
     Includes all vulnerabilities found
     """
-    scan = scan_service.get_scan(db, scan_id, current_user.id)
+    scan = await scan_service.get_scan(
+        db, scan_id, current_user.id, with_vulnerabilities=True)
 
     if not scan:
         raise HTTPException(
@@ -105,13 +256,13 @@ async def get_scan(
 @router.delete("/{scan_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_scan(
     scan_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete a scan and all its vulnerabilities
     """
-    deleted = scan_service.delete_scan(db, scan_id, current_user.id)
+    deleted = await scan_service.delete_scan(db, scan_id, current_user.id)
 
     if not deleted:
         raise HTTPException(
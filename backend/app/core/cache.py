@@ -0,0 +1,188 @@
+"""
+In-process caching utilities
+Thread-safe LRU cache with optional size cap and expiry, and coalescing of
+concurrent identical async calls
+"""
+
+import asyncio
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class LRUCache:
+    """
+    Least-recently-used cache shared by the threads of one process
+
+    Entries are evicted when the cache holds more than ``max_entries``
+    entries or, if ``max_bytes`` is set, when the sizes reported to ``set``
+    add up to more than ``max_bytes``. Entries may also expire after a TTL.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value and mark it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        size: int = 0,
+        ttl: Optional[float] = None
+    ) -> bool:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            size: Size of the value in bytes, counted against max_bytes
+            ttl: Seconds until the entry expires (default: the cache TTL)
+
+        Returns:
+            False if the value is larger than the whole cache and was not stored
+        """
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return True
+
+    def delete(self, key: Hashable) -> None:
+        """Remove an entry if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def delete_where(self, predicate) -> int:
+        """Remove every entry whose key matches ``predicate``. Returns the count."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Current size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent async calls that share a key
+
+    The first caller for a key starts the call; callers arriving while it is
+    in flight wait for the same outcome instead of starting their own. Each
+    caller gets its own deep copy of the result, and every caller sees the
+    exception if the call fails. Nothing is kept once the call finishes.
+
+    Calls belong to the event loop they were started on, so the flights in
+    progress are forgotten if the loop changes.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, "asyncio.Task"] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run ``fn`` unless a call for ``key`` is already in flight.
+
+        Returns:
+            A copy of the result, and whether it came from another caller's call
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._flights = {}
+            self._loop = loop
+
+        task = self._flights.get(key)
+        shared = task is not None
+        if task is None:
+            task = loop.create_task(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.calls += 1
+        else:
+            self.shared += 1
+
+        # A cancelled caller must not cancel the call for the others waiting on it
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result), shared
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def _forget(self, key: Hashable, task: "asyncio.Task") -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
@@ -14,11 +14,15 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./securecheck.db"
+    DATABASE_AUTO_MIGRATE: bool = True  # disable when several processes start at once
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PASSWORD_HASH_WORKERS: int = 0  # 0 = one per CPU core
+    PASSWORD_HASH_MAX_PENDING: int = 64  # more concurrent logins get a 503
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
     
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
@@ -31,8 +35,71 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = "INFO"
     
-    # Rate Limiting (future use)
+    # Scanner
+    SCAN_CHECK_TIMEOUT_SECONDS: float = 15.0
+    SCAN_TOTAL_TIMEOUT_SECONDS: float = 30.0
+    TLS_PROBE_TIMEOUT_SECONDS: float = 10.0
+    PROBE_CACHE_TTL_SECONDS: float = 300.0  # reuse of header and TLS probes; 0 = off
+    PROBE_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Port scanning ("ports" scan type, TCP connect scans)
+    PORT_SCAN_PROFILE: str = "top-100"  # "top-20", "top-100" or "custom"
+    PORT_SCAN_CUSTOM_PORTS: str = ""  # for "custom", e.g. "22,80,8000-8100"
+    PORT_SCAN_CONCURRENCY: int = 500  # open connections across all scans, per process
+    PORT_SCAN_CONCURRENCY_PER_HOST: int = 100
+    PORT_SCAN_CONNECT_TIMEOUT_SECONDS: float = 1.0  # until round trips have been measured
+    PORT_SCAN_MIN_TIMEOUT_SECONDS: float = 0.2
+    PORT_SCAN_MAX_TIMEOUT_SECONDS: float = 3.0
+    PORT_SCAN_GRAB_BANNERS: bool = True
+    PORT_SCAN_BANNER_TIMEOUT_SECONDS: float = 0.5
+    
+    # Outbound HTTP client (shared by all scans)
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 4
+    HTTP_ENABLE_HTTP2: bool = True
+    
+    # Scan job queue and workers
+    SCAN_JOB_LEASE_SECONDS: int = 60
+    SCAN_JOB_MAX_ATTEMPTS: int = 3
+    SCAN_JOB_RETRY_BACKOFF_SECONDS: int = 10
+    WORKER_PROCESSES: int = 0  # 0 = one per CPU core
+    WORKER_CONCURRENCY: int = 4
+    WORKER_POLL_INTERVAL_SECONDS: float = 1.0
+    SCAN_COALESCE_ENABLED: bool = True  # identical scans in flight share their probes
+    SCAN_COALESCE_MAX_JOBS: int = 20  # same-target jobs a worker claims along with one
+    
+    # Batch scan requests
+    SCAN_BATCH_MAX_TARGETS: int = 1000
+    SCAN_BATCH_MAX_LINE_BYTES: int = 4096  # per NDJSON line
+    SCAN_BATCH_RELEASE_SIZE: int = 20  # jobs of a batch that become due together
+    SCAN_BATCH_RELEASE_INTERVAL_SECONDS: int = 5  # delay between release waves
+    
+    # Authentication caches (per process)
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000  # verified JWTs, kept until they expire
+    
+    # Report cache (reports of finished scans, per process)
+    REPORT_CACHE_MAX_ENTRIES: int = 512
+    REPORT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    REPORT_CACHE_MAX_FINDINGS: int = 5000  # larger reports are always streamed
+    
+    # Report artifacts rendered when a scan completes
+    ARTIFACTS_ENABLED: bool = True
+    ARTIFACTS_STORAGE: str = "file"  # "file" (ARTIFACTS_DIR) or "database"
+    ARTIFACTS_DIR: str = "./artifacts"  # must be shared by the API and the workers
+    ARTIFACTS_GZIP_LEVEL: int = 6
+    
+    # Rate Limiting (per user, or per IP for anonymous requests)
+    RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_EXPENSIVE_PER_MINUTE: int = 10  # scan creation and exports
+    RATE_LIMIT_BATCH_TARGETS_PER_MINUTE: int = 1000  # scans created in batches; >= SCAN_BATCH_MAX_TARGETS
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per process) or "redis" (shared)
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
     
     # Email Configuration (future use)
     SMTP_SERVER: str | None = None
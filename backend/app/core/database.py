@@ -1,16 +1,36 @@
 """
 Database Configuration and Session Management
-Handles SQLAlchemy engine, session factory and base class
+Handles SQLAlchemy engines, session factories and base class
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from typing import Generator
+from typing import AsyncGenerator
 
 from .config import settings
 
-# Create SQLAlchemy engine
+# Async driver used for each database backend
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Same database as ``url``, reached through the backend's async driver"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(
+        hide_password=False)
+
+
+# Synchronous engine, used by the scan workers, maintenance scripts and code
+# running in worker threads (report streaming and artifact rendering)
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={
@@ -18,20 +38,28 @@ engine = create_engine(
     echo=settings.ENVIRONMENT == "development"  # Log SQL queries in development
 )
 
-# Session factory
+# Async engine, used by request handlers so queries never block the event loop
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    echo=settings.ENVIRONMENT == "development"
+)
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Objects stay usable after commit; reloading expired attributes would need
+# an await that attribute access cannot do
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
 
-def get_db() -> Generator:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Dependency to get database session.
-    Usage: db: Session = Depends(get_db)
+    Dependency to get an async database session.
+    Usage: db: AsyncSession = Depends(get_db)
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
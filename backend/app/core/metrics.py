@@ -0,0 +1,340 @@
+"""
+In-process metrics
+Counters, gauges and histograms exposed in the Prometheus text format
+"""
+
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: List["Metric"] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric") -> None:
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics.append(metric)
+
+    def get(self, name: str) -> Optional["Metric"]:
+        return next((m for m in self._metrics if m.name == name), None)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in list(self._metrics):
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                logger.exception("Could not collect metric %s", metric.name)
+                continue
+
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(
+                    f'{name}="{_escape(str(label))}"' for name, label in labels.items())
+                name = metric.name + suffix
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}"
+                             if label_text else f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    """
+    Base class of all metric types
+
+    Values are kept per combination of label values. A metric created with
+    a ``callback`` has no state of its own: the callback is called on every
+    scrape and returns either a number or a dict of label values to numbers.
+    """
+
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], object]] = None,
+        registry: Optional[Registry] = REGISTRY
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels) -> float:
+        """Current value for one set of labels (0 if never set)"""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[Sample]:
+        if self.callback is not None:
+            values = self.callback()
+            if not isinstance(values, dict):
+                values = {(): values}
+        else:
+            with self._lock:
+                values = dict(self._values)
+
+        for key, value in sorted(values.items()):
+            if not isinstance(key, tuple):
+                key = (key,)
+            yield "", dict(zip(self.labelnames, key)), value
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    """Value that can go up and down"""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = REGISTRY
+    ):
+        self.buckets = tuple(sorted(buckets))
+        self._observations: Dict[LabelValues, List[float]] = {}
+        super().__init__(name, documentation, labelnames, registry=registry)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            # Per-bucket counts followed by the +Inf count and the sum
+            state = self._observations.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        """Number of observations for one set of labels"""
+        state = self._observations.get(self._key(labels))
+        return int(sum(state[:-1])) if state else 0
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            observations = {key: list(state) for key, state in self._observations.items()}
+
+        for key, state in sorted(observations.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                yield "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield "_sum", labels, state[-1]
+            yield "_count", labels, cumulative
+
+
+# API requests
+HTTP_REQUEST_DURATION = Histogram(
+    "securecheck_http_request_duration_seconds",
+    "Time to serve API requests", ["method", "route"])
+HTTP_REQUESTS = Counter(
+    "securecheck_http_requests_total",
+    "API requests served", ["method", "route", "status"])
+
+# Scans
+SCAN_CHECK_DURATION = Histogram(
+    "securecheck_scan_check_duration_seconds",
+    "Duration of individual scan checks", ["check", "outcome"])
+OUTBOUND_ERRORS = Counter(
+    "securecheck_outbound_errors_total",
+    "Errors talking to scan targets", ["kind", "error"])
+SCANS_COALESCED = Counter(
+    "securecheck_scans_coalesced_total",
+    "Scans that reused the probes of an identical scan in flight", ["scan_type"])
+PROBE_CACHE_LOOKUPS = Counter(
+    "securecheck_probe_cache_lookups_total",
+    "Header and TLS probe results looked up in the cache", ["probe", "result"])
+PORT_PROBES = Counter(
+    "securecheck_port_probes_total",
+    "TCP connect probes sent to scan targets", ["state"])
+
+# Database connection pool
+DB_POOL_WAIT = Histogram(
+    "securecheck_db_pool_checkout_wait_seconds",
+    "Time spent getting a connection from the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+DB_POOL_CHECKOUTS = Counter(
+    "securecheck_db_pool_checkouts_total", "Connections checked out of the pool")
+DB_POOL_IN_USE = Gauge(
+    "securecheck_db_pool_connections_in_use", "Connections currently checked out")
+DB_CONNECTIONS_OPENED = Counter(
+    "securecheck_db_connections_opened_total", "New database connections opened")
+DB_POOL_TIMEOUTS = Counter(
+    "securecheck_db_pool_timeouts_total", "Checkouts that gave up waiting for a connection")
+
+
+def instrument_engine(engine) -> None:
+    """Record pool checkouts, connections in use and checkout wait time"""
+    if getattr(engine, "_metrics_instrumented", False):
+        return
+
+    event.listen(engine, "connect", lambda *args: DB_CONNECTIONS_OPENED.inc())
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(*args):
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_IN_USE.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(*args):
+        DB_POOL_IN_USE.dec()
+
+    # Every pool checkout goes through raw_connection, including ones that
+    # wait for a free connection or open a new one
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return raw_connection(*args, **kwargs)
+        except Exception as e:
+            if type(e).__name__ == "TimeoutError":
+                DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+    engine.raw_connection = timed_raw_connection
+    engine._metrics_instrumented = True
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing requests per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, method=scope["method"], route=template)
+            HTTP_REQUESTS.inc(method=scope["method"], route=template, status=status)
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0", registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve /metrics from a background thread, for processes without an API"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
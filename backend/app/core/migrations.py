@@ -0,0 +1,45 @@
+"""
+Database migrations
+Applies the Alembic migrations in backend/migrations
+"""
+
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from .database import engine as default_engine
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Schema created by create_all before migrations existed
+BASELINE_REVISION = "0001"
+
+
+def alembic_config() -> Config:
+    """Alembic configuration usable from any working directory"""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    return config
+
+
+def upgrade_database(engine: Optional[Engine] = None) -> None:
+    """
+    Bring the database schema up to the latest migration.
+
+    Databases created with create_all have tables but no migration history;
+    they are stamped with the baseline first, and the later migrations only
+    add what such a database is missing.
+    """
+    engine = engine or default_engine
+    with engine.begin() as connection:
+        config = alembic_config()
+        config.attributes["connection"] = connection
+
+        tables = set(inspect(connection).get_table_names())
+        if "alembic_version" not in tables and "users" in tables:
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
@@ -3,6 +3,10 @@
 from app.models.user import User
 from app.models.scan import Scan, ScanStatus, ScanType
 from app.models.vulnerability import Vulnerability, Severity
+from app.models.scan_job import ScanJob, JobStatus
+from app.models.scan_artifact import ScanArtifact
+from app.models.scan_batch import ScanBatch
 
 __all__ = ["User", "Scan", "ScanStatus",
-           "ScanType", "Vulnerability", "Severity"]
+           "ScanType", "Vulnerability", "Severity", "ScanJob", "JobStatus",
+           "ScanArtifact", "ScanBatch"]
@@ -3,9 +3,11 @@ Scan model for security scanning
 Stores information about security scans performed by users
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, JSON, Enum as SQLEnum
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
+from datetime import datetime, timezone
+from urllib.parse import urlparse
 import enum
 
 from app.core.database import Base
@@ -25,6 +27,43 @@ class ScanType(str, enum.Enum):
     HEADERS = "headers"
     SSL = "ssl"
     FULL = "full"
+    PORTS = "ports"  # open TCP ports; not part of "full"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def normalize_domain(url_or_host: str) -> str:
+    """Lowercased host of a URL or bare domain, without port"""
+    value = url_or_host.strip()
+    if '://' not in value:
+        value = f'//{value}'
+    return (urlparse(value).hostname or '').rstrip('.')
+
+
+def normalize_target(target_url: str) -> str:
+    """
+    Canonical form of a scan target: scans of targets with the same canonical
+    form send identical requests.
+
+    Scheme and host are lowercased, default ports and fragments dropped, and
+    an empty path becomes "/". The rest of the path and the query are kept
+    as they are, since servers may treat them case-sensitively.
+    """
+    parsed = urlparse(target_url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').rstrip('.')
+    if ':' in host:
+        host = f'[{host}]'  # IPv6 literal
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    if port is not None and port != {'http': 80, 'https': 443}.get(scheme):
+        host = f'{host}:{port}'
+    query = f'?{parsed.query}' if parsed.query else ''
+    return f'{scheme}://{host}{parsed.path or "/"}{query}'
 
 
 class Scan(Base):
@@ -35,26 +74,76 @@ class Scan(Base):
         id: Unique scan identifier
         user_id: ID of the user who created the scan
         target_url: URL/domain to scan
+        domain: Normalized host of target_url, kept in sync automatically
         scan_type: Type of scan to perform
         status: Current status of the scan
         created_at: Timestamp when scan was created
         completed_at: Timestamp when scan finished
+        vulnerability_count: Total findings (NULL until the scan finishes)
+        critical_count..info_count: Findings per severity
+        security_score: Score from 0 to 100 computed from the findings
+        risk_level: Risk level derived from the security score
+        timings: Wall time, network phase timings and bytes received per check
+        batch_id: ID of the batch request that created the scan, if any
+        probe_max_age: Oldest cached probe result in seconds the scan may use
+            (NULL: PROBE_CACHE_TTL_SECONDS, 0: always probe)
     """
     __tablename__ = "scans"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey(
         "users.id", ondelete="CASCADE"), nullable=False)
+    batch_id = Column(Integer, ForeignKey(
+        "scan_batches.id", ondelete="SET NULL", name="fk_scans_batch_id"), nullable=True)
     target_url = Column(String(500), nullable=False)
+    domain = Column(String(255), nullable=True)
     scan_type = Column(SQLEnum(ScanType),
                        default=ScanType.BASIC, nullable=False)
     status = Column(SQLEnum(ScanStatus),
                     default=ScanStatus.PENDING, nullable=False)
-    created_at = Column(DateTime(timezone=True),
+    # Set in Python as well so every row has sub-second precision, which the
+    # (created_at, id) pagination cursor relies on
+    created_at = Column(DateTime(timezone=True), default=_utcnow,
                         server_default=func.now(), nullable=False)
     completed_at = Column(DateTime(timezone=True), nullable=True)
 
+    # Summary of findings, written together with the final status
+    vulnerability_count = Column(Integer, nullable=True)
+    critical_count = Column(Integer, nullable=True)
+    high_count = Column(Integer, nullable=True)
+    medium_count = Column(Integer, nullable=True)
+    low_count = Column(Integer, nullable=True)
+    info_count = Column(Integer, nullable=True)
+    security_score = Column(Integer, nullable=True)
+    risk_level = Column(String(20), nullable=True)
+
+    # Per-check timings, e.g. {"headers": {"wall_ms": 120.5, "ttfb_ms": 98.1}}
+    timings = Column(JSON, nullable=True)
+
+    probe_max_age = Column(Integer, nullable=True)
+
     # Relationships
     user = relationship("User", back_populates="scans")
+    batch = relationship("ScanBatch", back_populates="scans")
+    # Findings in detection order; without an ORDER BY the database may
+    # return them in (scan_id, severity) index order
     vulnerabilities = relationship(
-        "Vulnerability", back_populates="scan", cascade="all, delete-orphan")
+        "Vulnerability", back_populates="scan", cascade="all, delete-orphan",
+        order_by="Vulnerability.id")
+    job = relationship(
+        "ScanJob", back_populates="scan", uselist=False, cascade="all, delete-orphan")
+    artifacts = relationship(
+        "ScanArtifact", back_populates="scan", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index("ix_scans_user_created", "user_id", "created_at", "id"),
+        Index("ix_scans_user_status_created",
+              "user_id", "status", "created_at", "id"),
+        Index("ix_scans_user_domain_created", "user_id", "domain", "created_at"),
+        Index("ix_scans_batch_status", "batch_id", "status"),
+    )
+
+    @validates('target_url')
+    def _set_domain(self, key, target_url):
+        self.domain = normalize_domain(target_url)
+        return target_url
@@ -0,0 +1,50 @@
+"""
+Scan artifact model for precomputed reports
+Reports are rendered once when a scan completes and served as stored
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, LargeBinary, UniqueConstraint
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class ScanArtifact(Base):
+    """
+    Rendered report of a finished scan
+
+    Attributes:
+        id: Unique artifact identifier
+        scan_id: ID of the scan the report is for
+        kind: Report format ('json' or 'csv')
+        encoding: Content encoding ('identity' or 'gzip')
+        sha256: Hex digest of the stored bytes; also names the file on disk
+        size: Size of the stored bytes
+        path: Location of the file, relative to ARTIFACTS_DIR (file storage)
+        content: The stored bytes (database storage)
+        created_at: Timestamp when the artifact was written
+    """
+    __tablename__ = "scan_artifacts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scan_id = Column(Integer, ForeignKey(
+        "scans.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(20), nullable=False)
+    encoding = Column(String(20), nullable=False, default="identity")
+    sha256 = Column(String(64), nullable=False)
+    size = Column(Integer, nullable=False)
+    path = Column(String(255), nullable=True)
+    content = deferred(Column(LargeBinary, nullable=True))
+    created_at = Column(DateTime(timezone=True),
+                        server_default=func.now(), nullable=False)
+
+    # Relationships
+    scan = relationship("Scan", back_populates="artifacts")
+
+    __table_args__ = (
+        UniqueConstraint("scan_id", "kind", "encoding",
+                         name="uq_scan_artifacts_scan_kind_encoding"),
+        # Finds other artifacts sharing a content-addressed file
+        Index("ix_scan_artifacts_path", "path"),
+    )
@@ -0,0 +1,33 @@
+"""
+Scan batch model
+Groups the scans created together by one batch request
+"""
+
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class ScanBatch(Base):
+    """
+    Scans submitted in a single batch request
+
+    Attributes:
+        id: Unique batch identifier
+        user_id: ID of the user who submitted the batch
+        total: Number of scans created by the batch
+        created_at: Timestamp when the batch was submitted
+    """
+    __tablename__ = "scan_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey(
+        "users.id", ondelete="CASCADE"), nullable=False, index=True)
+    total = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True),
+                        server_default=func.now(), nullable=False)
+
+    # Relationships
+    scans = relationship("Scan", back_populates="batch")
@@ -0,0 +1,62 @@
+"""
+Scan job model for the background work queue
+Each scan is executed by a worker process that claims its job
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, Enum as SQLEnum
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import enum
+
+from app.core.database import Base
+
+
+class JobStatus(str, enum.Enum):
+    """Job status enumeration"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class ScanJob(Base):
+    """
+    Queued execution of a scan
+
+    Attributes:
+        id: Unique job identifier
+        scan_id: ID of the scan to execute
+        status: Current status of the job
+        attempts: Number of times a worker has claimed the job
+        max_attempts: Claims allowed before the job is given up
+        run_after: Earliest time the job may be claimed (used for retry backoff)
+        locked_by: ID of the worker holding the lease
+        lease_expires_at: When the lease lapses if the worker stops renewing it
+        last_error: Error from the most recent failed attempt
+        created_at: Timestamp when job was queued
+        updated_at: Timestamp of the last state change
+    """
+    __tablename__ = "scan_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    scan_id = Column(Integer, ForeignKey(
+        "scans.id", ondelete="CASCADE"), nullable=False, unique=True)
+    status = Column(SQLEnum(JobStatus),
+                    default=JobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(DateTime(timezone=True),
+                       server_default=func.now(), nullable=False)
+    locked_by = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True),
+                        server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    scan = relationship("Scan", back_populates="job")
+
+    __table_args__ = (
+        Index("ix_scan_jobs_status_run_after", "status", "run_after"),
+    )
@@ -3,7 +3,7 @@ Vulnerability model for security findings
 Stores individual security vulnerabilities found during scans
 """
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy import DateTime
@@ -48,3 +48,8 @@ class Vulnerability(Base):
 
     # Relationships
     scan = relationship("Scan", back_populates="vulnerabilities")
+
+    __table_args__ = (
+        # Per-scan reads: exports, severity counts and critical findings
+        Index("ix_vulnerabilities_scan_severity", "scan_id", "severity"),
+    )
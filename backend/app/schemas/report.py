@@ -3,7 +3,7 @@ Report and statistics schemas
 """
 
 from pydantic import BaseModel
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime
 
 
@@ -28,6 +28,8 @@ class ScanSummary(BaseModel):
     severity_breakdown: SeverityBreakdown
     security_score: int
     risk_level: str
+    # Per-check timings recorded by the scanner (see Scan.timings)
+    timings: Optional[Dict[str, Dict[str, Any]]] = None
 
 
 class ReportResponse(BaseModel):
@@ -5,7 +5,7 @@ Scan schemas for request/response validation
 from app.schemas.vulnerability import VulnerabilityResponse
 from pydantic import BaseModel, HttpUrl, Field, field_validator
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from enum import Enum
 
 
@@ -15,6 +15,7 @@ class ScanTypeEnum(str, Enum):
     HEADERS = "headers"
     SSL = "ssl"
     FULL = "full"
+    PORTS = "ports"  # open TCP ports; not part of "full"
 
 
 class ScanStatusEnum(str, Enum):
@@ -31,6 +32,11 @@ class ScanCreate(BaseModel):
                             min_length=3, max_length=500)
     scan_type: ScanTypeEnum = Field(
         default=ScanTypeEnum.BASIC, description="Type of scan to perform")
+    max_age: Optional[int] = Field(
+        default=None, ge=0,
+        description="Reuse header and TLS probe results up to this many seconds old")
+    force_fresh: bool = Field(
+        default=False, description="Probe the target even if recent results are cached")
 
     @field_validator('target_url')
     @classmethod
@@ -41,6 +47,44 @@ class ScanCreate(BaseModel):
             v = f'https://{v}'
         return v
 
+    @property
+    def probe_max_age(self) -> Optional[int]:
+        """Oldest cached probe result the scan may use (None: the default)"""
+        return 0 if self.force_fresh else self.max_age
+
+
+class ScanBatchCreate(BaseModel):
+    """Schema for creating many scans of the same type at once"""
+    targets: List[str] = Field(..., min_length=1,
+                               description="URLs or domains to scan")
+    scan_type: ScanTypeEnum = Field(
+        default=ScanTypeEnum.BASIC, description="Type of scan to perform on every target")
+    max_age: Optional[int] = Field(
+        default=None, ge=0,
+        description="Reuse header and TLS probe results up to this many seconds old")
+    force_fresh: bool = Field(
+        default=False, description="Probe every target even if recent results are cached")
+
+
+class ScanBatchResponse(BaseModel):
+    """Schema for a created batch: scan IDs in the order targets were sent"""
+    batch_id: int
+    total: int
+    scan_ids: List[int]
+
+
+class ScanBatchStatus(BaseModel):
+    """Schema for the aggregate progress of a batch"""
+    batch_id: int
+    created_at: datetime
+    total: int
+    pending: int
+    running: int
+    completed: int
+    failed: int
+    progress: float = Field(..., description="Share of scans that finished, from 0 to 1")
+    done: bool
+
 
 class ScanUpdate(BaseModel):
     """Schema for updating scan status"""
@@ -65,6 +109,7 @@ class ScanBase(BaseModel):
 class ScanResponse(ScanBase):
     """Schema for scan response with vulnerabilities"""
     vulnerabilities: List["VulnerabilityResponse"] = []
+    timings: Optional[Dict[str, Dict[str, Any]]] = None
 
     class Config:
         from_attributes = True
@@ -73,6 +118,14 @@ class ScanResponse(ScanBase):
 class ScanListResponse(ScanBase):
     """Schema for scan list response (without vulnerabilities)"""
     vulnerability_count: int = 0
+    security_score: Optional[int] = None
+    risk_level: Optional[str] = None
+
+    @field_validator('vulnerability_count', mode='before')
+    @classmethod
+    def default_count(cls, v: Optional[int]) -> int:
+        """Unfinished scans have no stored count yet"""
+        return v or 0
 
     class Config:
         from_attributes = True
@@ -5,11 +5,12 @@ Reusable FastAPI dependencies for authentication and authorization
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.security.jwt import decode_access_token
 from app.models.user import User
+from app.security.user_cache import load_user
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
@@ -17,7 +18,7 @@ security = HTTPBearer()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Dependency to get current authenticated user.
@@ -27,7 +28,8 @@ async def get_current_user(
         db: Database session
 
     Returns:
-        Current user object
+        Current user object. Usually served from the user cache, in which
+        case it is detached and only has the cached fields loaded.
 
     Raises:
         HTTPException: If token is invalid or user not found
@@ -51,8 +53,8 @@ async def get_current_user(
     if email is None or user_id is None:
         raise credentials_exception
 
-    # Get user from database
-    user = db.query(User).filter(User.id == user_id).first()
+    # Get user from the cache or the database
+    user = await load_user(db, user_id)
 
     if user is None:
         raise credentials_exception
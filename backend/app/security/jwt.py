@@ -4,11 +4,21 @@ Handles creation and validation of JSON Web Tokens
 """
 
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+import hashlib
+import time
 from jose import JWTError, jwt
 
+from app.core.cache import LRUCache
 from app.core.config import settings
 
+# Verified tokens (by SHA-256 digest) mapped to their claims, kept until
+# the token expires
+token_cache = LRUCache(max_entries=settings.TOKEN_CACHE_MAX_ENTRIES)
+
+# Signing settings the cached tokens were verified with
+_verified_with: Optional[Tuple[str, str]] = None
+
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -35,19 +45,46 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     return encoded_jwt
 
 
+def clear_token_cache() -> None:
+    """Forget all verified tokens, e.g. after rotating the secret key"""
+    token_cache.clear()
+
+
 def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
     """
     Decode and validate a JWT token.
 
+    Tokens that verified once are served from a cache until their ``exp``,
+    so a client reusing its token skips the signature check. The cache is
+    dropped whenever SECRET_KEY or ALGORITHM change.
+
     Args:
         token: JWT token string
 
     Returns:
         Decoded token payload or None if invalid
     """
+    global _verified_with
+
+    signing = (settings.SECRET_KEY, settings.ALGORITHM)
+    if signing != _verified_with:
+        clear_token_cache()
+        _verified_with = signing
+
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY,
                              algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
+
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        ttl = expires_at - time.time()
+        if ttl > 0:
+            token_cache.set(digest, dict(payload), ttl=ttl)
+    return payload
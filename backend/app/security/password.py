@@ -3,11 +3,32 @@ Password Hashing Utilities
 Handles secure password hashing and verification using bcrypt
 """
 
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
 from passlib.context import CryptContext
 
+from app.core.config import settings
+
 # Configure bcrypt context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashing operations are already queued"""
+
+
+# bcrypt releases the GIL, so a thread pool hashes in parallel while the
+# event loop keeps serving other requests
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -34,3 +55,60 @@ def get_password_hash(password: str) -> str:
         Hashed password string
     """
     return pwd_context.hash(password)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+                thread_name_prefix="password-hash"
+            )
+        return _executor
+
+
+def shutdown_password_hasher() -> None:
+    """Stop the hashing threads; a new pool is started on next use"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def password_hasher_load() -> int:
+    """Number of hashing operations running or queued"""
+    return _in_flight
+
+
+async def _run_hasher(func: Callable[..., T], *args) -> T:
+    """
+    Run a hashing function on the hashing pool.
+
+    Raises:
+        PasswordHasherBusy: If PASSWORD_HASH_MAX_PENDING operations are
+            already running or queued
+    """
+    global _in_flight
+
+    with _executor_lock:
+        if _in_flight >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise PasswordHasherBusy()
+        _in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    finally:
+        with _executor_lock:
+            _in_flight -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password without blocking the event loop"""
+    return await _run_hasher(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash without blocking the event loop"""
+    return await _run_hasher(get_password_hash, password)
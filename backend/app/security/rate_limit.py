@@ -0,0 +1,331 @@
+"""
+Request rate limiting
+Per-user and per-IP limits with in-memory or shared (Redis protocol) counters
+"""
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.core.config import settings
+from app.security.jwt import decode_access_token
+
+logger = logging.getLogger(__name__)
+
+# Failures of the counter backend: requests are let through when one occurs.
+# A connection closed mid-reply raises IncompleteReadError (an EOFError);
+# error replies from the server raise ConnectionError.
+BACKEND_ERRORS = (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError)
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of counting one request against a limit"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+
+
+class MemoryBackend:
+    """
+    Token buckets held in this process
+
+    Each key gets a bucket of ``limit`` tokens refilled evenly over the
+    window. Buckets of idle keys are evicted once ``max_keys`` is reached.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        rate = limit / window
+        now = time.monotonic()
+
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(limit), now))
+            tokens = min(float(limit), tokens + (now - updated) * rate)
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        retry_after = 0.0 if allowed else (cost - tokens) / rate
+        return RateLimitResult(allowed, limit, int(tokens), retry_after)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisBackend:
+    """
+    Sliding-window counters in a Redis-compatible server, shared by all processes
+
+    Requests are counted in fixed windows (INCR + PEXPIRE) and the previous
+    window is weighted by how much of it still overlaps the sliding window.
+    Speaks just enough RESP for INCRBY, DECRBY, PEXPIRE and GET, so no
+    client library is needed.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit", timeout: float = 0.5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.prefix = prefix
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop = None
+
+    @staticmethod
+    def _encode(*args) -> bytes:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def _read_reply(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise ConnectionError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2].decode()
+        raise ConnectionError(f"Unexpected reply: {line!r}")
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            await self._pipeline(setup)
+
+    async def _pipeline(self, commands: List[tuple]) -> list:
+        self._writer.write(b"".join(self._encode(*command) for command in commands))
+        await self._writer.drain()
+        return [await self._read_reply() for _ in commands]
+
+    async def _execute(self, commands: List[tuple]) -> list:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Streams belong to the loop that opened them
+            self._reader = self._writer = None
+            self._lock = asyncio.Lock()
+            self._loop = loop
+
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await asyncio.wait_for(self._connect(), self.timeout)
+                return await asyncio.wait_for(self._pipeline(commands), self.timeout)
+            except BaseException:
+                await self._disconnect()
+                raise
+
+    async def _disconnect(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+
+    async def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        window_ms = int(window * 1000)
+        now_ms = int(time.time() * 1000)
+        current_window, elapsed_ms = divmod(now_ms, window_ms)
+        current_key = f"{self.prefix}:{key}:{current_window}"
+        previous_key = f"{self.prefix}:{key}:{current_window - 1}"
+
+        count, _, previous = await self._execute([
+            ("INCRBY", current_key, cost),
+            ("PEXPIRE", current_key, window_ms * 2),
+            ("GET", previous_key),
+        ])
+
+        weight = 1 - elapsed_ms / window_ms
+        estimated = int(previous or 0) * weight + count
+        allowed = estimated <= limit
+
+        retry_after = 0.0
+        if not allowed:
+            # Refused requests are not counted, so a large refused batch
+            # does not use up the budget of later requests
+            await self._execute([("DECRBY", current_key, cost)])
+            retry_after = (window_ms - elapsed_ms) / 1000
+        return RateLimitResult(allowed, limit, max(0, int(limit - estimated)), retry_after)
+
+    async def close(self) -> None:
+        await self._disconnect()
+
+
+@dataclass
+class RateLimitRule:
+    """Extra limit for requests matching a method and path pattern"""
+    name: str
+    method: str
+    path: "re.Pattern"
+    per_minute: Optional[int] = None  # default: RATE_LIMIT_EXPENSIVE_PER_MINUTE
+
+    def limit(self) -> int:
+        return self.per_minute or settings.RATE_LIMIT_EXPENSIVE_PER_MINUTE
+
+
+def expensive_route_rules() -> List[RateLimitRule]:
+    """Routes that start scans or render exports, limited separately"""
+    prefix = re.escape(settings.API_V1_PREFIX)
+    return [
+        # A batch counts as one scan creation request here; its targets are
+        # charged separately once the body is read (see charge_batch_targets)
+        RateLimitRule("scan-create", "POST", re.compile(rf"^{prefix}/scans/(batch/?)?$")),
+        RateLimitRule("export", "GET", re.compile(rf"^{prefix}/scans/(\d+/)?export/")),
+    ]
+
+
+_backend = None
+
+
+def get_rate_limit_backend():
+    """Counter backend selected by RATE_LIMIT_BACKEND, created on first use"""
+    global _backend
+    if _backend is None:
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            _backend = RedisBackend(settings.RATE_LIMIT_REDIS_URL)
+        else:
+            _backend = MemoryBackend()
+    return _backend
+
+
+def reset_rate_limits() -> None:
+    """Forget all in-process counters (shared counters expire on their own)"""
+    global _backend
+    _backend = None
+
+
+async def charge_batch_targets(user_id: int, count: int) -> Optional[RateLimitResult]:
+    """
+    Count the scans of a batch against RATE_LIMIT_BATCH_TARGETS_PER_MINUTE.
+
+    Returns:
+        The outcome, or None if rate limiting is disabled or the shared
+        backend is unreachable (the batch is let through)
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return None
+    try:
+        return await get_rate_limit_backend().hit(
+            f"batch-targets:user:{user_id}",
+            settings.RATE_LIMIT_BATCH_TARGETS_PER_MINUTE, 60, cost=count)
+    except BACKEND_ERRORS as e:
+        logger.warning("Rate limit backend unavailable: %s", e)
+        return None
+
+
+def _client_identity(scope) -> str:
+    """Authenticated user ID when a valid bearer token is sent, else client IP"""
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                payload = decode_access_token(token)
+                if payload and payload.get("user_id") is not None:
+                    return f"user:{payload['user_id']}"
+            break
+
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing RATE_LIMIT_PER_MINUTE per user (or IP)
+
+    Requests to expensive routes also count against their own, lower limit.
+    Limited requests get a 429 with Retry-After. If the shared backend is
+    unreachable requests are let through.
+    """
+
+    def __init__(self, app, backend=None, rules: Optional[List[RateLimitRule]] = None):
+        self.app = app
+        self.backend = backend
+        self.rules = expensive_route_rules() if rules is None else rules
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        backend = self.backend or get_rate_limit_backend()
+
+        identity = _client_identity(scope)
+        limits = [("global", settings.RATE_LIMIT_PER_MINUTE)] + [
+            (rule.name, rule.limit()) for rule in self.rules
+            if rule.method == scope["method"] and rule.path.match(scope["path"])
+        ]
+
+        result = None
+        for name, per_minute in limits:
+            try:
+                outcome = await backend.hit(f"{name}:{identity}", per_minute, 60)
+            except BACKEND_ERRORS as e:
+                logger.warning("Rate limit backend unavailable: %s", e)
+                await self.app(scope, receive, send)
+                return
+            if not outcome.allowed:
+                await self._reject(send, outcome)
+                return
+            # Report the limit closest to running out
+            if result is None or outcome.remaining < result.remaining:
+                result = outcome
+
+        headers = [
+            (b"x-ratelimit-limit", str(result.limit).encode()),
+            (b"x-ratelimit-remaining", str(result.remaining).encode()),
+        ]
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    async def _reject(self, send, result: RateLimitResult) -> None:
+        body = json.dumps({"detail": "Demasiadas solicitudes"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, int(result.retry_after + 0.999))).encode()),
+                (b"x-ratelimit-limit", str(result.limit).encode()),
+                (b"x-ratelimit-remaining", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
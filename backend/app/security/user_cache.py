@@ -0,0 +1,84 @@
+"""
+Authenticated user cache
+Keeps the fields authentication needs so most requests skip the user query
+"""
+
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.user import User
+
+# Columns kept per user; enough for authorization and for /auth/me
+CACHED_USER_FIELDS = (
+    'id', 'email', 'full_name', 'is_active', 'is_superuser', 'created_at', 'updated_at')
+
+user_cache = LRUCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+
+def _detached_user(fields: Dict[str, Any]) -> User:
+    """
+    Rebuild a User from cached fields.
+
+    The object is detached rather than new, so it is never inserted by
+    accident; attributes that were not cached (password hash,
+    relationships) cannot be loaded from it.
+    """
+    user = User(**fields)
+    make_transient_to_detached(user)
+    return user
+
+
+async def load_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """
+    Get a user by ID, from the cache when possible.
+
+    Args:
+        db: Database session, only used on a cache miss
+        user_id: ID of the user
+
+    Returns:
+        The user, or None if it does not exist
+    """
+    fields = user_cache.get(user_id)
+    if fields is not None:
+        return _detached_user(fields)
+
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    if user is not None:
+        user_cache.set(user_id, {name: getattr(user, name) for name in CACHED_USER_FIELDS})
+    return user
+
+
+def invalidate_user(user_id: int) -> None:
+    """Forget a cached user, e.g. after changing it with a bulk UPDATE"""
+    user_cache.delete(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target: User) -> None:
+    # Drop the entry right away, and again once the change is committed so a
+    # request that read the old row in between cannot keep it cached
+    invalidate_user(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for user_id in session.info.pop('changed_user_ids', ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_users(session: Session) -> None:
+    session.info.pop('changed_user_ids', None)
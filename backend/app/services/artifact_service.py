@@ -0,0 +1,208 @@
+"""
+Report artifact service
+Renders the downloadable reports of a scan once, when it completes
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session, undefer
+
+from app.core.config import settings
+from app.models.scan import Scan, ScanStatus
+from app.models.scan_artifact import ScanArtifact
+from app.services.export_service import iter_scan_csv, iter_scan_json, scan_has_findings
+
+IDENTITY = 'identity'
+GZIP = 'gzip'
+
+# File extension of each artifact kind
+ARTIFACT_EXTENSIONS = {'json': '.json', 'csv': '.csv'}
+
+
+class _HashingWriter:
+    """File-like sink that hashes and counts everything written to it"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.digest.update(data)
+        self.size += len(data)
+        return self.fileobj.write(data)
+
+    def flush(self) -> None:
+        self.fileobj.flush()
+
+
+def artifacts_root() -> Path:
+    return Path(settings.ARTIFACTS_DIR)
+
+
+def _content_path(sha256: str, extension: str) -> str:
+    """Content-addressed location relative to the artifacts root"""
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+
+def _open_sink():
+    if settings.ARTIFACTS_STORAGE == "database":
+        return BytesIO()
+    staging = artifacts_root() / "tmp"
+    staging.mkdir(parents=True, exist_ok=True)
+    return tempfile.NamedTemporaryFile(dir=staging, delete=False)
+
+
+def _store(sink, writer: _HashingWriter, extension: str) -> Dict:
+    """Move a written sink to its final place and describe it"""
+    sha256 = writer.digest.hexdigest()
+    values = {'sha256': sha256, 'size': writer.size}
+
+    if isinstance(sink, BytesIO):
+        values['content'] = sink.getvalue()
+        return values
+
+    sink.close()
+    path = _content_path(sha256, extension)
+    target = artifacts_root() / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists():
+        os.unlink(sink.name)  # identical content is already stored
+    else:
+        os.replace(sink.name, target)
+    values['path'] = path
+    return values
+
+
+def _write_variants(chunks: Iterable[str], extension: str) -> Dict[str, Dict]:
+    """Write the plain and gzip-compressed variants in a single pass"""
+    raw_sink, packed_sink = _open_sink(), _open_sink()
+    try:
+        raw = _HashingWriter(raw_sink)
+        packed = _HashingWriter(packed_sink)
+        # mtime=0 keeps the compressed bytes, and so their hash, reproducible
+        with gzip.GzipFile(fileobj=packed, mode='wb', mtime=0,
+                           compresslevel=settings.ARTIFACTS_GZIP_LEVEL) as compressor:
+            for chunk in chunks:
+                data = chunk.encode('utf-8')
+                raw.write(data)
+                compressor.write(data)
+
+        return {
+            IDENTITY: _store(raw_sink, raw, extension),
+            GZIP: _store(packed_sink, packed, extension + '.gz'),
+        }
+    except BaseException:
+        for sink in (raw_sink, packed_sink):
+            if not isinstance(sink, BytesIO):
+                sink.close()
+                if os.path.exists(sink.name):
+                    os.unlink(sink.name)
+        raise
+
+
+def generate_scan_artifacts(db: Session, scan_id: int) -> List[ScanArtifact]:
+    """
+    Render and store the JSON report and CSV export of a completed scan.
+
+    Each is stored as-is and gzip-compressed, either as content-addressed
+    files under ARTIFACTS_DIR or as blobs in the database, depending on
+    ARTIFACTS_STORAGE. Existing artifacts of the scan are replaced.
+
+    Args:
+        db: Database session
+        scan_id: ID of the completed scan
+
+    Returns:
+        The stored artifacts (empty if the scan is not completed)
+    """
+    scan = db.get(Scan, scan_id)
+    if scan is None or scan.status != ScanStatus.COMPLETED:
+        return []
+
+    rendered = {'json': _write_variants(iter_scan_json(db, scan), ARTIFACT_EXTENSIONS['json'])}
+    if scan_has_findings(db, scan):
+        rendered['csv'] = _write_variants(iter_scan_csv(db, scan_id), ARTIFACT_EXTENSIONS['csv'])
+
+    replaced = artifact_paths(db, scan_id)
+    db.execute(delete(ScanArtifact).where(ScanArtifact.scan_id == scan_id))
+
+    artifacts = [
+        ScanArtifact(scan_id=scan_id, kind=kind, encoding=encoding, **values)
+        for kind, variants in rendered.items()
+        for encoding, values in variants.items()
+    ]
+    db.add_all(artifacts)
+    db.commit()
+
+    remove_unreferenced_files(db, replaced)
+    return artifacts
+
+
+def get_artifact(
+    db: Session,
+    scan_id: int,
+    kind: str,
+    encoding: str = IDENTITY,
+    with_content: bool = False
+) -> Optional[ScanArtifact]:
+    """Stored artifact of a scan, or None if it was not generated"""
+    query = select(ScanArtifact).where(
+        ScanArtifact.scan_id == scan_id,
+        ScanArtifact.kind == kind,
+        ScanArtifact.encoding == encoding
+    )
+    if with_content:
+        query = query.options(undefer(ScanArtifact.content))
+    return db.execute(query).scalar_one_or_none()
+
+
+def artifact_file(artifact: ScanArtifact) -> Optional[Path]:
+    """Path of a file-stored artifact, or None if it is stored elsewhere or missing"""
+    if not artifact.path:
+        return None
+    path = artifacts_root() / artifact.path
+    return path if path.is_file() else None
+
+
+def artifact_paths(db: Session, scan_id: int) -> List[str]:
+    """Files stored for a scan, relative to the artifacts root"""
+    return db.execute(
+        select(ScanArtifact.path).where(
+            ScanArtifact.scan_id == scan_id, ScanArtifact.path.isnot(None))
+    ).scalars().all()
+
+
+def remove_unreferenced_files(db: Session, paths: Iterable[str]) -> int:
+    """
+    Delete artifact files that no artifact row points to anymore.
+
+    Files are content-addressed, so another scan may share one; those are kept.
+
+    Returns:
+        Number of files removed
+    """
+    paths = set(paths)
+    if not paths:
+        return 0
+
+    still_used = set(db.execute(
+        select(ScanArtifact.path).where(ScanArtifact.path.in_(paths))
+    ).scalars())
+
+    removed = 0
+    for path in paths - still_used:
+        try:
+            (artifacts_root() / path).unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
@@ -0,0 +1,182 @@
+"""
+Batch scan service
+Creates and tracks many scans submitted in a single request
+"""
+
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.scan import Scan, ScanStatus, ScanType, normalize_domain
+from app.models.scan_batch import ScanBatch
+from app.schemas.scan import ScanCreate, ScanTypeEnum
+from app.services.job_queue import enqueue_scans
+
+# Validates a whole list in one call and reports every invalid item by index
+_scan_list = TypeAdapter(List[ScanCreate])
+
+
+class BatchTooLarge(Exception):
+    """Raised when a batch has more than SCAN_BATCH_MAX_TARGETS targets"""
+
+
+def check_batch_size(count: int) -> None:
+    if count > settings.SCAN_BATCH_MAX_TARGETS:
+        raise BatchTooLarge(
+            f"A batch may hold at most {settings.SCAN_BATCH_MAX_TARGETS} targets")
+
+
+def validate_targets(items: List[Dict[str, Any]]) -> List[ScanCreate]:
+    """
+    Validate and normalize the targets of a batch.
+
+    Every item goes through ScanCreate, so URLs are normalized exactly as
+    for single scans.
+
+    Raises:
+        pydantic.ValidationError: Listing every invalid item by its index
+    """
+    return _scan_list.validate_python(items)
+
+
+def _ndjson_item(line: bytes, number: int, scan_type: ScanTypeEnum) -> Dict[str, Any]:
+    try:
+        value = json.loads(line)
+    except ValueError:
+        raise ValueError(f"Line {number}: invalid JSON") from None
+
+    if isinstance(value, str):
+        return {'target_url': value, 'scan_type': scan_type}
+    if isinstance(value, dict):
+        return {'scan_type': scan_type, **value}
+    raise ValueError(f"Line {number}: expected a string or an object")
+
+
+async def read_ndjson_targets(
+    chunks: AsyncIterator[bytes],
+    scan_type: ScanTypeEnum = ScanTypeEnum.BASIC
+) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Read batch targets from a newline-delimited JSON body as it arrives.
+
+    Each line is a target, either as a string or as an object with the
+    fields of ScanCreate; ``scan_type`` applies where a line has none. Blank
+    lines are skipped. Oversized lines and batches are rejected before the
+    rest of the body is read.
+
+    Returns:
+        The targets, each with the number of the line it came from
+
+    Raises:
+        ValueError: If a line is too long or not a string or object
+        BatchTooLarge: If there are more than SCAN_BATCH_MAX_TARGETS targets
+    """
+    max_line = settings.SCAN_BATCH_MAX_LINE_BYTES
+    items: List[Tuple[int, Dict[str, Any]]] = []
+    buffer = b''
+    number = 0
+
+    def add(line: bytes) -> None:
+        if len(line) > max_line:
+            raise ValueError(f"Line {number}: longer than {max_line} bytes")
+        line = line.strip()
+        if line:
+            items.append((number, _ndjson_item(line, number, scan_type)))
+            check_batch_size(len(items))
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            number += 1
+            add(line)
+        if len(buffer) > max_line:
+            raise ValueError(f"Line {number + 1}: longer than {max_line} bytes")
+
+    number += 1
+    add(buffer)
+    return items
+
+
+async def create_batch(
+    db: AsyncSession,
+    scans: List[ScanCreate],
+    user_id: int
+) -> Tuple[ScanBatch, List[int]]:
+    """
+    Create the scans of a batch and queue them for workers.
+
+    All scan rows go in with one INSERT and all jobs with another, in the
+    same transaction as the batch itself.
+
+    Returns:
+        The batch and the scan IDs, in the order of ``scans``
+    """
+    batch = ScanBatch(user_id=user_id, total=len(scans))
+    db.add(batch)
+    await db.flush()
+
+    # A multi-row INSERT assigns increasing IDs in VALUES order, but RETURNING
+    # rows come back unordered. Asking SQLAlchemy to sort them would split the
+    # INSERT into one statement per row on SQLite, so the IDs are sorted here.
+    scan_ids = (await db.execute(
+        insert(Scan).returning(Scan.id),
+        [
+            {
+                'user_id': user_id,
+                'batch_id': batch.id,
+                'target_url': scan.target_url,
+                # Bulk inserts bypass the ORM validator that fills this in
+                'domain': normalize_domain(scan.target_url),
+                'scan_type': ScanType(scan.scan_type.value),
+                'probe_max_age': scan.probe_max_age,
+                'status': ScanStatus.PENDING
+            }
+            for scan in scans
+        ]
+    )).scalars().all()
+    scan_ids = sorted(scan_ids)
+
+    await db.run_sync(enqueue_scans, scan_ids, commit=False)
+    await db.commit()
+    return batch, scan_ids
+
+
+async def get_batch_status(
+    db: AsyncSession,
+    batch_id: int,
+    user_id: int
+) -> Optional[Dict[str, Any]]:
+    """Aggregate progress of a batch (only if owned by user)"""
+    batch = (await db.execute(
+        select(ScanBatch).where(ScanBatch.id == batch_id, ScanBatch.user_id == user_id)
+    )).scalar_one_or_none()
+    if batch is None:
+        return None
+
+    counts = {status: 0 for status in ScanStatus}
+    for status, count in await db.execute(
+        select(Scan.status, func.count(Scan.id))
+        .where(Scan.batch_id == batch_id)
+        .group_by(Scan.status)
+    ):
+        counts[status] = count
+
+    # Deleted scans count as finished, so progress still reaches 1
+    remaining = counts[ScanStatus.PENDING] + counts[ScanStatus.RUNNING]
+    finished = batch.total - remaining
+    return {
+        'batch_id': batch.id,
+        'created_at': batch.created_at,
+        'total': batch.total,
+        'pending': counts[ScanStatus.PENDING],
+        'running': counts[ScanStatus.RUNNING],
+        'completed': counts[ScanStatus.COMPLETED],
+        'failed': counts[ScanStatus.FAILED],
+        'progress': round(finished / batch.total, 4) if batch.total else 1.0,
+        'done': remaining == 0
+    }
@@ -0,0 +1,273 @@
+"""
+Streaming export service
+Writes scan findings out in chunks straight from a database cursor
+"""
+
+import csv
+import json
+from io import StringIO
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.scan import Scan
+from app.models.vulnerability import Vulnerability, Severity
+from app.services.report_service import (
+    ReportGenerator, TOP_CRITICAL_RECOMMENDATIONS, build_recommendations,
+    count_findings_by_severity, report_generated_at)
+
+CSV_FIELDS = ['Severity', 'Title', 'Description', 'Recommendation', 'Detected']
+
+# Extra leading columns when findings of several scans share one file
+MULTI_SCAN_CSV_FIELDS = ['Scan ID', 'Target'] + CSV_FIELDS
+
+# Rows fetched from the cursor per round trip
+EXPORT_BATCH_SIZE = 500
+
+# Rows buffered before a chunk is handed to the client
+CSV_CHUNK_ROWS = 200
+JSON_CHUNK_ROWS = 200
+
+
+def _findings_query(*leading_columns):
+    """Select the exported columns only; no ORM objects are built"""
+    return select(
+        *leading_columns,
+        Vulnerability.severity,
+        Vulnerability.title,
+        Vulnerability.description,
+        Vulnerability.recommendation,
+        Vulnerability.created_at
+    ).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+def _csv_values(row) -> List[str]:
+    return [
+        row.severity.value.upper(),
+        row.title,
+        row.description,
+        row.recommendation or 'N/A',
+        row.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    ]
+
+
+def _iter_csv(header: List[str], rows: Iterable[List[str]]) -> Iterator[str]:
+    """Render rows as CSV, yielding every CSV_CHUNK_ROWS rows"""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    for count, values in enumerate(rows, 1):
+        writer.writerow(values)
+        if count % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    remainder = buffer.getvalue()
+    if remainder:
+        yield remainder
+
+
+def scan_has_findings(db: Session, scan: Scan) -> bool:
+    """Whether a scan has anything to export, without loading its findings"""
+    if scan.vulnerability_count is not None:
+        return scan.vulnerability_count > 0
+    return db.execute(
+        select(exists().where(Vulnerability.scan_id == scan.id))
+    ).scalar()
+
+
+def iter_scan_csv(db: Session, scan_id: int) -> Iterator[str]:
+    """
+    Stream the findings of one scan as CSV.
+
+    Args:
+        db: Database session, kept open until the iterator is exhausted
+        scan_id: ID of the scan to export
+
+    Yields:
+        CSV text chunks, starting with the header row
+    """
+    result = db.execute(
+        _findings_query()
+        .where(Vulnerability.scan_id == scan_id)
+        .order_by(Vulnerability.id)
+    )
+    return _iter_csv(CSV_FIELDS, (_csv_values(row) for row in result))
+
+
+def iter_user_scans_csv(
+    db: Session,
+    user_id: int,
+    scan_ids: Optional[List[int]] = None
+) -> Iterator[str]:
+    """
+    Stream the findings of many scans as one CSV file.
+
+    Args:
+        db: Database session, kept open until the iterator is exhausted
+        user_id: Owner of the scans
+        scan_ids: Scans to include; all of the user's scans if omitted
+
+    Yields:
+        CSV text chunks, starting with the header row
+    """
+    query = (
+        _findings_query(Scan.id.label('scan_id'), Scan.target_url)
+        .join(Scan, Scan.id == Vulnerability.scan_id)
+        .where(Scan.user_id == user_id)
+    )
+    if scan_ids:
+        query = query.where(Scan.id.in_(scan_ids))
+
+    result = db.execute(query.order_by(Scan.id, Vulnerability.id))
+    return _iter_csv(
+        MULTI_SCAN_CSV_FIELDS,
+        ([row.scan_id, row.target_url] + _csv_values(row) for row in result)
+    )
+
+
+def _report_summary(db: Session, scan: Scan) -> Dict[str, Any]:
+    """Scan summary from the stored counters, or counted in SQL for old scans"""
+    severity_counts = None
+    if scan.vulnerability_count is None:
+        severity_counts = count_findings_by_severity(db, scan.id)
+    return ReportGenerator(scan, severity_counts).generate_summary()
+
+
+def _report_recommendations(db: Session, scan_id: int, summary: Dict[str, Any]) -> List[str]:
+    top_critical = db.execute(
+        select(Vulnerability.title, Vulnerability.recommendation)
+        .where(
+            Vulnerability.scan_id == scan_id,
+            Vulnerability.severity == Severity.CRITICAL
+        )
+        .order_by(Vulnerability.id)
+        .limit(TOP_CRITICAL_RECOMMENDATIONS)
+    ).all()
+    return build_recommendations(summary['severity_breakdown'], top_critical)
+
+
+def _report_findings(db: Session, scan_id: int) -> Iterator[Dict[str, Any]]:
+    """Findings of a scan in report format, read from the cursor in batches"""
+    result = db.execute(
+        _findings_query(Vulnerability.id)
+        .where(Vulnerability.scan_id == scan_id)
+        .order_by(Vulnerability.id)
+    )
+    for row in result:
+        yield {
+            'id': row.id,
+            'severity': row.severity.value,
+            'title': row.title,
+            'description': row.description,
+            'recommendation': row.recommendation,
+            'detected_at': row.created_at.isoformat()
+        }
+
+
+def iter_scan_json(db: Session, scan: Scan) -> Iterator[str]:
+    """
+    Stream a scan report as one JSON document.
+
+    The document has the same shape as ``ReportGenerator.generate_json_report``,
+    but findings are encoded one at a time as they come off the cursor.
+
+    Args:
+        db: Database session, kept open until the iterator is exhausted
+        scan: Scan to export
+
+    Yields:
+        JSON text chunks
+    """
+    summary = _report_summary(db, scan)
+    return _iter_json(db, scan.id, summary, report_generated_at(scan))
+
+
+def _iter_json(
+    db: Session,
+    scan_id: int,
+    summary: Dict[str, Any],
+    generated_at: str
+) -> Iterator[str]:
+    yield (
+        '{"report_generated_at": ' + json.dumps(generated_at)
+        + ', "summary": ' + json.dumps(summary)
+        + ', "vulnerabilities": ['
+    )
+
+    batch = []
+    for count, finding in enumerate(_report_findings(db, scan_id)):
+        batch.append((', ' if count else '') + json.dumps(finding))
+        if len(batch) == JSON_CHUNK_ROWS:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+    recommendations = _report_recommendations(db, scan_id, summary)
+    yield '], "recommendations": ' + json.dumps(recommendations) + '}'
+
+
+def iter_scan_ndjson(db: Session, scan: Scan) -> Iterator[str]:
+    """
+    Stream a scan report as newline-delimited JSON.
+
+    The first line is the summary, followed by one line per finding and a
+    final line with the recommendations. Every line carries ``record_type``
+    and the scan ID so lines can be ingested independently.
+
+    Args:
+        db: Database session, kept open until the iterator is exhausted
+        scan: Scan to export
+
+    Yields:
+        Chunks of complete JSON lines
+    """
+    summary = _report_summary(db, scan)
+    return _iter_ndjson(db, summary, report_generated_at(scan))
+
+
+def _iter_ndjson(db: Session, summary: Dict[str, Any], generated_at: str) -> Iterator[str]:
+    scan_id = summary['scan_id']
+    yield json.dumps({
+        'record_type': 'summary',
+        'report_generated_at': generated_at,
+        **summary
+    }) + '\n'
+
+    batch = []
+    for finding in _report_findings(db, scan_id):
+        batch.append(json.dumps({
+            'record_type': 'vulnerability',
+            'scan_id': scan_id,
+            'target_url': summary['target_url'],
+            **finding
+        }) + '\n')
+        if len(batch) == JSON_CHUNK_ROWS:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+    yield json.dumps({
+        'record_type': 'recommendations',
+        'scan_id': scan_id,
+        'recommendations': _report_recommendations(db, scan_id, summary)
+    }) + '\n'
+
+
+def stream_in_session(render: Callable[[Session], Iterator[str]]) -> Iterator[str]:
+    """
+    Run a report generator in a session of its own.
+
+    Starlette iterates synchronous response bodies in a worker thread, so
+    the cursor reads of a streamed export never block the event loop. The
+    session is created with the first chunk and closed once the response
+    has been fully sent.
+    """
+    with SessionLocal() as db:
+        yield from render(db)
@@ -0,0 +1,99 @@
+"""
+Shared outbound HTTP client
+One pooled httpx client per process, reused by every scan check
+"""
+
+import asyncio
+import importlib.util
+import weakref
+from contextlib import asynccontextmanager
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from app.core.config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_host_slots: 'weakref.WeakValueDictionary[str, asyncio.Semaphore]' = weakref.WeakValueDictionary()
+
+
+class _RejectCookies(DefaultCookiePolicy):
+    """Cookie policy that neither stores nor sends any cookie"""
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+
+def _http2_available() -> bool:
+    """HTTP/2 support needs the optional h2 package (httpx[http2])"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create a pooled client configured from settings.
+
+    The client is shared by the scans of every user, so it keeps no cookies:
+    each request must see the Set-Cookie headers a first visit gets, and must
+    not send cookies another scan received.
+    """
+    return httpx.AsyncClient(
+        cookies=CookieJar(policy=_RejectCookies()),
+        timeout=settings.HTTP_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        http2=settings.HTTP_ENABLE_HTTP2 and _http2_available(),
+        follow_redirects=True
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide HTTP client.
+
+    The client is created on first use. Its connection pool belongs to the
+    running event loop, so a new client is created if the loop has changed.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = create_http_client()
+        _client_loop = loop
+        _host_slots.clear()
+
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the process-wide client and release its connections"""
+    global _client, _client_loop
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+    _host_slots.clear()
+
+
+@asynccontextmanager
+async def host_slot(host: str) -> AsyncIterator[None]:
+    """
+    Limit the number of concurrent requests sent to a single host.
+
+    Entries disappear once no request to the host holds the semaphore.
+    """
+    semaphore = _host_slots.get(host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.HTTP_MAX_CONNECTIONS_PER_HOST)
+        _host_slots[host] = semaphore
+
+    async with semaphore:
+        yield
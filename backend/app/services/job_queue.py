@@ -0,0 +1,366 @@
+"""
+Database-backed scan job queue
+Workers claim jobs with time-limited leases so crashed jobs are retried
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.scan import Scan, ScanStatus, normalize_target
+from app.models.scan_job import ScanJob, JobStatus
+
+# Number of candidate jobs read per claim attempt. Other workers may win the
+# race for some of them, so more than one is tried before giving up.
+CLAIM_CANDIDATES = 5
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_scan(db: Session, scan_id: int, commit: bool = True) -> ScanJob:
+    """
+    Queue a scan for execution by a worker.
+
+    Args:
+        db: Database session
+        scan_id: ID of the scan to execute
+        commit: Commit immediately; pass False to queue in the caller's transaction
+
+    Returns:
+        The queued job
+    """
+    job = ScanJob(
+        scan_id=scan_id,
+        status=JobStatus.QUEUED,
+        attempts=0,
+        max_attempts=settings.SCAN_JOB_MAX_ATTEMPTS,
+        run_after=_utcnow()
+    )
+    db.add(job)
+    if commit:
+        db.commit()
+    return job
+
+
+def enqueue_scans(db: Session, scan_ids: List[int], commit: bool = True) -> int:
+    """
+    Queue many scans with a single INSERT, released to workers in waves.
+
+    Every SCAN_BATCH_RELEASE_SIZE jobs become due
+    SCAN_BATCH_RELEASE_INTERVAL_SECONDS after the previous ones, so a large
+    batch cannot take every worker slot from other users' scans.
+
+    Args:
+        db: Database session
+        scan_ids: IDs of the scans to execute, in release order
+        commit: Commit immediately; pass False to queue in the caller's transaction
+
+    Returns:
+        Number of jobs queued
+    """
+    if not scan_ids:
+        return 0
+
+    now = _utcnow()
+    wave_size = max(settings.SCAN_BATCH_RELEASE_SIZE, 1)
+    db.execute(insert(ScanJob), [
+        {
+            'scan_id': scan_id,
+            'status': JobStatus.QUEUED,
+            'attempts': 0,
+            'max_attempts': settings.SCAN_JOB_MAX_ATTEMPTS,
+            'run_after': now + timedelta(
+                seconds=(i // wave_size) * settings.SCAN_BATCH_RELEASE_INTERVAL_SECONDS)
+        }
+        for i, scan_id in enumerate(scan_ids)
+    ])
+    if commit:
+        db.commit()
+    return len(scan_ids)
+
+
+def _claimable(now: datetime):
+    """Queued jobs that are due, plus running jobs whose worker lost its lease"""
+    return or_(
+        and_(ScanJob.status == JobStatus.QUEUED, ScanJob.run_after <= now),
+        and_(
+            ScanJob.status == JobStatus.RUNNING,
+            ScanJob.lease_expires_at < now,
+            ScanJob.attempts < ScanJob.max_attempts
+        )
+    )
+
+
+def _claim(
+    db: Session,
+    job_id: int,
+    worker_id: str,
+    now: datetime,
+    lease_seconds: int
+) -> Optional[ScanJob]:
+    """Conditionally claim one job; None if another worker got it first"""
+    result = db.execute(
+        update(ScanJob)
+        .where(ScanJob.id == job_id, _claimable(now))
+        .values(
+            status=JobStatus.RUNNING,
+            locked_by=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            attempts=ScanJob.attempts + 1,
+            updated_at=now
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    if result.rowcount == 1:
+        return db.get(ScanJob, job_id, populate_existing=True)
+    return None
+
+
+def claim_next_job(
+    db: Session,
+    worker_id: str,
+    lease_seconds: Optional[int] = None
+) -> Optional[ScanJob]:
+    """
+    Claim the next due job for a worker.
+
+    The claim is a conditional UPDATE, so when several workers race for the
+    same job exactly one of them wins.
+
+    Args:
+        db: Database session
+        worker_id: Unique ID of the claiming worker
+        lease_seconds: Lease length; the worker must renew it before it lapses
+
+    Returns:
+        The claimed job, or None if no job is due
+    """
+    lease_seconds = lease_seconds or settings.SCAN_JOB_LEASE_SECONDS
+    now = _utcnow()
+
+    candidates = db.execute(
+        select(ScanJob.id)
+        .where(_claimable(now))
+        .order_by(ScanJob.run_after, ScanJob.id)
+        .limit(CLAIM_CANDIDATES)
+    ).scalars().all()
+
+    for job_id in candidates:
+        job = _claim(db, job_id, worker_id, now, lease_seconds)
+        if job is not None:
+            return job
+
+    return None
+
+
+def claim_same_target_jobs(
+    db: Session,
+    worker_id: str,
+    scan_id: int,
+    limit: Optional[int] = None,
+    lease_seconds: Optional[int] = None
+) -> List[ScanJob]:
+    """
+    Claim due jobs that scan the same target, with the same type and probe
+    cache max age, as a scan the worker is about to run.
+
+    Scans only share probes when they run in the same process, so a worker
+    takes identical scans along with the one it claimed. The filter matches
+    the coalescing key of scan_service, so every job taken can share.
+
+    Args:
+        db: Database session
+        worker_id: Unique ID of the claiming worker
+        scan_id: Scan of the job the worker already holds
+        limit: Maximum number of jobs to claim (default: SCAN_COALESCE_MAX_JOBS)
+        lease_seconds: Lease length; the worker must renew it before it lapses
+
+    Returns:
+        The claimed jobs
+    """
+    limit = limit or settings.SCAN_COALESCE_MAX_JOBS
+    lease_seconds = lease_seconds or settings.SCAN_JOB_LEASE_SECONDS
+    scan = db.get(Scan, scan_id)
+    if scan is None:
+        return []
+
+    now = _utcnow()
+    target = normalize_target(scan.target_url)
+    candidates = db.execute(
+        select(ScanJob.id, Scan.target_url)
+        .join(Scan, Scan.id == ScanJob.scan_id)
+        .where(
+            _claimable(now),
+            Scan.domain == scan.domain,
+            Scan.scan_type == scan.scan_type,
+            Scan.probe_max_age.is_not_distinct_from(scan.probe_max_age),
+            Scan.id != scan_id
+        )
+        .order_by(ScanJob.run_after, ScanJob.id)
+        .limit(limit * 2)
+    ).all()
+
+    claimed = []
+    for job_id, target_url in candidates:
+        if len(claimed) == limit:
+            break
+        # Same host but a different path or port sends different requests
+        if normalize_target(target_url) != target:
+            continue
+        job = _claim(db, job_id, worker_id, now, lease_seconds)
+        if job is not None:
+            claimed.append(job)
+    return claimed
+
+
+def renew_lease(
+    db: Session,
+    job_id: int,
+    worker_id: str,
+    lease_seconds: Optional[int] = None
+) -> bool:
+    """
+    Extend the lease on a running job.
+
+    Returns:
+        False if the worker no longer holds the lease
+    """
+    lease_seconds = lease_seconds or settings.SCAN_JOB_LEASE_SECONDS
+    now = _utcnow()
+
+    result = db.execute(
+        update(ScanJob)
+        .where(
+            ScanJob.id == job_id,
+            ScanJob.locked_by == worker_id,
+            ScanJob.status == JobStatus.RUNNING
+        )
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def complete_job(db: Session, job_id: int, worker_id: str) -> bool:
+    """Mark a job as succeeded. Returns False if the worker lost the lease."""
+    result = db.execute(
+        update(ScanJob)
+        .where(ScanJob.id == job_id, ScanJob.locked_by == worker_id)
+        .values(
+            status=JobStatus.SUCCEEDED,
+            locked_by=None,
+            lease_expires_at=None,
+            updated_at=_utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def fail_job(
+    db: Session,
+    job_id: int,
+    worker_id: str,
+    error: str,
+    retry: bool = True
+) -> Optional[ScanJob]:
+    """
+    Record a failed attempt.
+
+    The job is queued again with exponential backoff while it has attempts
+    left and ``retry`` is set. Otherwise it fails permanently, and so does
+    its scan.
+
+    Returns:
+        The updated job, or None if the worker lost the lease
+    """
+    job = db.get(ScanJob, job_id, populate_existing=True)
+    if job is None or job.locked_by != worker_id:
+        return None
+
+    now = _utcnow()
+    job.last_error = error
+    job.locked_by = None
+    job.lease_expires_at = None
+    job.updated_at = now
+
+    if retry and job.attempts < job.max_attempts:
+        backoff = settings.SCAN_JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+        job.status = JobStatus.QUEUED
+        job.run_after = now + timedelta(seconds=backoff)
+    else:
+        job.status = JobStatus.FAILED
+        _fail_scan(db, job.scan_id, now)
+
+    db.commit()
+    return job
+
+
+def recover_abandoned_jobs(db: Session) -> int:
+    """
+    Fail jobs whose worker died on their last allowed attempt.
+
+    Jobs with attempts left are picked up again by claim_next_job once
+    their lease lapses, so only exhausted jobs need handling here.
+
+    Returns:
+        Number of jobs failed
+    """
+    now = _utcnow()
+    jobs = db.execute(
+        select(ScanJob).where(
+            ScanJob.status == JobStatus.RUNNING,
+            ScanJob.lease_expires_at < now,
+            ScanJob.attempts >= ScanJob.max_attempts
+        )
+    ).scalars().all()
+
+    for job in jobs:
+        job.status = JobStatus.FAILED
+        job.last_error = "Worker stopped responding on the final attempt"
+        job.locked_by = None
+        job.lease_expires_at = None
+        job.updated_at = now
+        _fail_scan(db, job.scan_id, now)
+
+    db.commit()
+    return len(jobs)
+
+
+def _fail_scan(db: Session, scan_id: int, now: datetime) -> None:
+    """Mark a scan as failed unless it already finished"""
+    db.execute(
+        update(Scan)
+        .where(
+            Scan.id == scan_id,
+            Scan.status.notin_([ScanStatus.COMPLETED, ScanStatus.FAILED])
+        )
+        .values(status=ScanStatus.FAILED, completed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def queue_depth(db: Session) -> int:
+    """Number of jobs waiting to be claimed"""
+    return db.execute(
+        select(func.count(ScanJob.id)).where(ScanJob.status == JobStatus.QUEUED)
+    ).scalar_one()
+
+
+def job_counts(db: Session) -> Dict[str, int]:
+    """Number of jobs in each status"""
+    counts = {status.value: 0 for status in JobStatus}
+    rows = db.execute(
+        select(ScanJob.status, func.count(ScanJob.id)).group_by(ScanJob.status))
+    for status, count in rows:
+        counts[status.value] = count
+    return counts
@@ -0,0 +1,285 @@
+"""
+Port scanning engine
+Asyncio TCP connect scans with concurrency caps and adaptive timeouts
+"""
+
+import asyncio
+import socket
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import settings
+
+# Most frequently open TCP ports, in nmap-services order
+TOP_20_PORTS = (
+    21, 22, 23, 25, 53, 80, 110, 111, 135, 139,
+    143, 443, 445, 993, 995, 1723, 3306, 3389, 5900, 8080,
+)
+TOP_100_PORTS = (
+    7, 9, 13, 21, 22, 23, 25, 26, 37, 53, 79, 80, 81, 88, 106, 110, 111, 113,
+    119, 135, 139, 143, 144, 179, 199, 389, 427, 443, 444, 445, 465, 513, 514,
+    515, 543, 544, 548, 554, 587, 631, 646, 873, 990, 993, 995, 1025, 1026,
+    1027, 1028, 1029, 1110, 1433, 1720, 1723, 1755, 1900, 2000, 2001, 2049,
+    2121, 2717, 3000, 3128, 3306, 3389, 3986, 4899, 5000, 5009, 5051, 5060,
+    5101, 5190, 5357, 5432, 5631, 5666, 5800, 5900, 6000, 6001, 6646, 7070,
+    8000, 8008, 8009, 8080, 8081, 8443, 8888, 9100, 9999, 10000, 32768, 49152,
+    49153, 49154, 49155, 49156, 49157,
+)
+PORT_PROFILES = {
+    'top-20': TOP_20_PORTS,
+    'top-100': TOP_100_PORTS,
+}
+
+OPEN = 'open'
+CLOSED = 'closed'  # the host refused the connection
+FILTERED = 'filtered'  # no answer before the timeout
+
+BANNER_MAX_BYTES = 256
+
+# Clock granularity floor for the retransmission-style timeout (RFC 6298)
+_MIN_VARIANCE_SECONDS = 0.01
+
+# Caps shared by every scan in the process. Semaphores belong to the event
+# loop they were created on, so they are recreated when the loop changes.
+_global_slot: Optional[asyncio.Semaphore] = None
+_global_slot_loop: Optional[asyncio.AbstractEventLoop] = None
+_host_slots: 'weakref.WeakValueDictionary[str, asyncio.Semaphore]' = weakref.WeakValueDictionary()
+
+
+def parse_ports(spec: str) -> List[int]:
+    """
+    Parse a port list such as ``"22,80,8000-8100"``.
+
+    Returns:
+        Sorted unique ports
+
+    Raises:
+        ValueError: If the list is empty or holds an invalid port or range
+    """
+    ports = set()
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        first, dash, last = item.partition('-')
+        try:
+            start = int(first)
+            end = int(last) if dash else start
+        except ValueError:
+            raise ValueError(f"Invalid port or range: {item!r}") from None
+        if not 1 <= start <= end <= 65535:
+            raise ValueError(f"Invalid port or range: {item!r}")
+        ports.update(range(start, end + 1))
+
+    if not ports:
+        raise ValueError("No ports given")
+    return sorted(ports)
+
+
+def ports_for_profile(profile: str, custom_ports: str = "") -> List[int]:
+    """
+    Ports scanned by a profile: ``top-20``, ``top-100`` or ``custom``.
+
+    Raises:
+        ValueError: If the profile is unknown or the custom list is invalid
+    """
+    if profile == 'custom':
+        return parse_ports(custom_ports)
+    if profile not in PORT_PROFILES:
+        raise ValueError(f"Unknown port profile: {profile!r}")
+    return list(PORT_PROFILES[profile])
+
+
+class AdaptiveTimeout:
+    """
+    Connect timeout derived from the round-trip times seen so far.
+
+    Open and closed ports both answer within one round trip, so every
+    answered probe is a sample. The timeout follows the TCP retransmission
+    timer (RFC 6298): the smoothed RTT plus four times its variance, clamped
+    to [minimum, maximum]. Until the first sample the initial value is used.
+    """
+
+    def __init__(self, initial: float, minimum: float, maximum: float):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self._initial = min(max(initial, minimum), maximum)
+
+    @property
+    def value(self) -> float:
+        if self.srtt is None:
+            return self._initial
+        timeout = self.srtt + max(4 * self.rttvar, _MIN_VARIANCE_SECONDS)
+        return min(max(timeout, self.minimum), self.maximum)
+
+    def observe(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+
+@dataclass
+class PortResult:
+    """Outcome of probing a single port"""
+    port: int
+    state: str
+    rtt_ms: Optional[float] = None
+    banner: Optional[str] = None
+
+
+@dataclass
+class PortScanResult:
+    """Outcome of scanning one host"""
+    hostname: str
+    address: str
+    ports: List[PortResult]
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def open_ports(self) -> List[PortResult]:
+        return [result for result in self.ports if result.state == OPEN]
+
+    def count(self, state: str) -> int:
+        return sum(1 for result in self.ports if result.state == state)
+
+
+def _global_semaphore() -> asyncio.Semaphore:
+    global _global_slot, _global_slot_loop
+    loop = asyncio.get_running_loop()
+    if _global_slot is None or _global_slot_loop is not loop:
+        _global_slot = asyncio.Semaphore(settings.PORT_SCAN_CONCURRENCY)
+        _global_slot_loop = loop
+        _host_slots.clear()
+    return _global_slot
+
+
+def _host_semaphore(address: str, limit: int) -> asyncio.Semaphore:
+    """
+    Per-host cap, shared by concurrent scans of the same address.
+
+    Entries disappear once no running scan holds the semaphore.
+    """
+    semaphore = _host_slots.get(address)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(limit)
+        _host_slots[address] = semaphore
+    return semaphore
+
+
+def _clean_banner(data: bytes) -> Optional[str]:
+    """First line of a banner, printable characters only"""
+    text = data.decode('utf-8', errors='replace').strip()
+    line = text.splitlines()[0] if text else ''
+    line = ''.join(c for c in line if c.isprintable())
+    return line or None
+
+
+async def _close(writer: asyncio.StreamWriter) -> None:
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+
+async def _probe(
+    address: str,
+    port: int,
+    timeout: AdaptiveTimeout,
+    grab_banner: bool,
+    banner_timeout: float
+) -> PortResult:
+    start = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(address, port), timeout.value)
+    except asyncio.TimeoutError:
+        return PortResult(port, FILTERED)
+    except ConnectionRefusedError:
+        rtt = time.perf_counter() - start
+        timeout.observe(rtt)
+        return PortResult(port, CLOSED, rtt_ms=round(rtt * 1000, 2))
+    except OSError:
+        # Unreachable networks and ICMP rejections: nothing answered on the port
+        return PortResult(port, FILTERED)
+
+    rtt = time.perf_counter() - start
+    timeout.observe(rtt)
+    result = PortResult(port, OPEN, rtt_ms=round(rtt * 1000, 2))
+    try:
+        if grab_banner:
+            # Services such as SSH, FTP and SMTP greet first; HTTP waits for
+            # the client and simply times out here
+            try:
+                data = await asyncio.wait_for(reader.read(BANNER_MAX_BYTES), banner_timeout)
+                result.banner = _clean_banner(data)
+            except (asyncio.TimeoutError, OSError):
+                pass
+    finally:
+        await _close(writer)
+    return result
+
+
+async def scan_ports(
+    hostname: str,
+    ports: Iterable[int],
+    per_host_limit: Optional[int] = None,
+    grab_banners: Optional[bool] = None,
+    timeout: Optional[AdaptiveTimeout] = None
+) -> PortScanResult:
+    """
+    TCP connect scan of a host.
+
+    The host is resolved once and every port is probed against that address.
+    Probes are bounded by the process-wide cap (PORT_SCAN_CONCURRENCY) and a
+    per-host cap shared with concurrent scans of the same address.
+
+    Args:
+        hostname: Host name or IP address
+        ports: Ports to probe
+        per_host_limit: Concurrent connections to the host
+        grab_banners: Read what open ports send right after connecting
+        timeout: Connect timeout tracker, shared by the probes of this scan
+
+    Returns:
+        The state of every port, in the order given
+
+    Raises:
+        socket.gaierror: If the host cannot be resolved
+    """
+    per_host_limit = per_host_limit or settings.PORT_SCAN_CONCURRENCY_PER_HOST
+    if grab_banners is None:
+        grab_banners = settings.PORT_SCAN_GRAB_BANNERS
+    timeout = timeout or AdaptiveTimeout(
+        settings.PORT_SCAN_CONNECT_TIMEOUT_SECONDS,
+        settings.PORT_SCAN_MIN_TIMEOUT_SECONDS,
+        settings.PORT_SCAN_MAX_TIMEOUT_SECONDS)
+    banner_timeout = settings.PORT_SCAN_BANNER_TIMEOUT_SECONDS
+    loop = asyncio.get_running_loop()
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    addresses = await loop.getaddrinfo(hostname, None, type=socket.SOCK_STREAM)
+    address = addresses[0][4][0]
+    timings['dns_ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+    global_slot = _global_semaphore()
+    host_slot = _host_semaphore(address, per_host_limit)
+
+    async def probe(port: int) -> PortResult:
+        async with host_slot, global_slot:
+            return await _probe(address, port, timeout, grab_banners, banner_timeout)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(probe(port) for port in ports))
+    timings['scan_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    timings['timeout_ms'] = round(timeout.value * 1000, 2)
+
+    return PortScanResult(hostname, address, list(results), timings)
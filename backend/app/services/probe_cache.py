@@ -0,0 +1,72 @@
+"""
+Probe cache
+Raw header and TLS probe results, reused by scans of the same target for a
+few minutes (per process)
+"""
+
+import time
+from typing import Awaitable, Callable, Hashable, Optional, Tuple, TypeVar
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.metrics import PROBE_CACHE_LOOKUPS
+
+T = TypeVar("T")
+
+probe_cache = LRUCache(
+    max_entries=settings.PROBE_CACHE_MAX_ENTRIES,
+    ttl=settings.PROBE_CACHE_TTL_SECONDS
+)
+
+
+def headers_key(scheme: str, host: str, port: int, path: str) -> Tuple[str, ...]:
+    """Cache key of the response headers of a URL (the path selects the resource)"""
+    return ('headers', scheme, host, port, path)
+
+
+def tls_key(host: str, port: int) -> Tuple[str, ...]:
+    """Cache key of the certificate and TLS version of an endpoint"""
+    return ('tls', 'https', host, port)
+
+
+async def cached_probe(
+    key: Hashable,
+    probe: Callable[[], Awaitable[T]],
+    max_age: Optional[float] = None
+) -> Tuple[T, Optional[float]]:
+    """
+    Return a recent result of a probe, or run the probe and cache its result.
+
+    Only successful probes are cached: if ``probe`` raises, nothing is stored
+    and the next scan probes again. Cached results are shared, so callers
+    must not modify them.
+
+    Args:
+        key: Cache key, see headers_key and tls_key
+        probe: Coroutine function performing the network probe
+        max_age: Oldest acceptable result in seconds; 0 always probes. Results
+            never outlive PROBE_CACHE_TTL_SECONDS, whatever the max_age.
+
+    Returns:
+        The result and its age in seconds, or None as the age of a new result
+    """
+    name = key[0] if isinstance(key, tuple) else 'probe'
+    ttl = settings.PROBE_CACHE_TTL_SECONDS
+
+    if ttl > 0 and max_age != 0:
+        entry = probe_cache.get(key)
+        if entry is not None:
+            result, probed_at = entry
+            age = time.monotonic() - probed_at
+            if max_age is None or age <= max_age:
+                PROBE_CACHE_LOOKUPS.inc(probe=name, result='hit')
+                return result, age
+        PROBE_CACHE_LOOKUPS.inc(probe=name, result='miss')
+    else:
+        PROBE_CACHE_LOOKUPS.inc(probe=name, result='bypass')
+
+    result = await probe()
+    # Fresh results replace older ones even when the cache was bypassed
+    if ttl > 0:
+        probe_cache.set(key, (result, time.monotonic()), ttl=ttl)
+    return result, None
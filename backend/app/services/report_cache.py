@@ -0,0 +1,70 @@
+"""
+Report cache
+Reports of finished scans never change, so they are rendered once per process
+"""
+
+import hashlib
+from typing import Optional, Tuple
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.scan import Scan, ScanStatus
+
+ReportKey = Tuple[str, int, str]
+
+report_cache = LRUCache(
+    max_entries=settings.REPORT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.REPORT_CACHE_MAX_BYTES
+)
+
+
+def report_cache_key(scan: Scan, kind: str) -> Optional[ReportKey]:
+    """
+    Cache key of a rendered report.
+
+    Args:
+        scan: Scan the report is for
+        kind: Report format, e.g. 'json' or 'csv'
+
+    Returns:
+        (kind, scan id, completed_at), or None while the scan can still change
+    """
+    if scan.status not in (ScanStatus.COMPLETED, ScanStatus.FAILED) or scan.completed_at is None:
+        return None
+    return (kind, scan.id, scan.completed_at.isoformat())
+
+
+def is_cacheable(scan: Scan) -> bool:
+    """Whether a finished scan is small enough to keep its rendered report in memory"""
+    return (
+        scan.vulnerability_count is not None
+        and scan.vulnerability_count <= settings.REPORT_CACHE_MAX_FINDINGS
+    )
+
+
+def report_etag(key: ReportKey) -> str:
+    """Strong ETag of a report, derived from its cache key"""
+    digest = hashlib.sha256('|'.join(map(str, key)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against an ETag (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def invalidate_scan_reports(scan_id: int) -> int:
+    """Drop every cached report of a scan. Returns the number removed."""
+    return report_cache.delete_where(lambda key: key[1] == scan_id)
@@ -4,45 +4,151 @@ Creates PDF and JSON reports for security scans
 """
 
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.models.scan import Scan
+from app.models.scan import Scan, ScanStatus, normalize_domain
 from app.models.vulnerability import Vulnerability, Severity
 
 
+SEVERITY_LEVELS = ['critical', 'high', 'medium', 'low', 'info']
+
+# Score penalty per finding of each severity
+SEVERITY_WEIGHTS = {'critical': 10, 'high': 5, 'medium': 2, 'low': 1, 'info': 0}
+
+
+def calculate_security_score(severity_counts: Dict[str, int]) -> int:
+    """
+    Calculate security score (0-100) from severity counts.
+    Lower score = more/worse vulnerabilities
+    """
+    total_weight = sum(
+        SEVERITY_WEIGHTS[severity] * count
+        for severity, count in severity_counts.items()
+    )
+    return max(0, 100 - total_weight)
+
+
+def calculate_risk_level(score: int) -> str:
+    """Calculate risk level based on score"""
+    if score >= 80:
+        return 'low'
+    elif score >= 60:
+        return 'medium'
+    elif score >= 40:
+        return 'high'
+    else:
+        return 'critical'
+
+
+def scan_summary_values(severity_counts: Dict[str, int]) -> Dict[str, Any]:
+    """Build the denormalized summary columns stored on a Scan"""
+    score = calculate_security_score(severity_counts)
+    values = {
+        f'{severity}_count': severity_counts.get(severity, 0)
+        for severity in SEVERITY_LEVELS
+    }
+    values['vulnerability_count'] = sum(values.values())
+    values['security_score'] = score
+    values['risk_level'] = calculate_risk_level(score)
+    return values
+
+
+def report_generated_at(scan: Scan) -> str:
+    """
+    Generation time written into a report.
+
+    Reports of finished scans are served under a strong ETag, so every
+    render of them must be byte-identical: they use the completion time.
+    """
+    if scan.status in (ScanStatus.COMPLETED, ScanStatus.FAILED) and scan.completed_at:
+        return scan.completed_at.isoformat()
+    return datetime.now().isoformat()
+
+
+# Critical findings whose fix is quoted in the recommendations
+TOP_CRITICAL_RECOMMENDATIONS = 3
+
+
+def build_recommendations(
+    severity_counts: Dict[str, int],
+    top_critical: List[Tuple[str, Optional[str]]]
+) -> List[str]:
+    """
+    Build the top recommendations of a report.
+
+    Args:
+        severity_counts: Number of findings per severity
+        top_critical: (title, recommendation) of the first critical findings
+    """
+    recommendations = []
+
+    if severity_counts.get('critical'):
+        recommendations.append(
+            f"⚠️ URGENT: You have {severity_counts['critical']} critical vulnerabilities that need immediate attention.")
+
+    if severity_counts.get('high'):
+        recommendations.append(
+            f"⚠️ HIGH PRIORITY: Address {severity_counts['high']} high-severity issues as soon as possible.")
+
+    # Add specific recommendations
+    for title, recommendation in top_critical[:TOP_CRITICAL_RECOMMENDATIONS]:
+        if recommendation:
+            recommendations.append(f"• {title}: {recommendation}")
+
+    return recommendations
+
+
+def count_findings_by_severity(db: Session, scan_id: int) -> Dict[str, int]:
+    """Count the findings of one scan per severity in the database"""
+    severity_counts = {severity: 0 for severity in SEVERITY_LEVELS}
+    rows = db.execute(
+        select(Vulnerability.severity, func.count(Vulnerability.id))
+        .where(Vulnerability.scan_id == scan_id)
+        .group_by(Vulnerability.severity)
+    )
+    for severity, count in rows:
+        severity_counts[severity.value] = count
+    return severity_counts
+
+
 class ReportGenerator:
     """Generate reports from scan data"""
 
-    def __init__(self, scan: Scan):
+    def __init__(self, scan: Scan, severity_counts: Optional[Dict[str, int]] = None):
         self.scan = scan
+        self.severity_counts = severity_counts
 
-    def generate_summary(self) -> Dict[str, Any]:
-        """Generate a summary of the scan results"""
-        vulnerabilities = self.scan.vulnerabilities
-
-        # Count by severity
-        severity_counts = {
-            'critical': 0,
-            'high': 0,
-            'medium': 0,
-            'low': 0,
-            'info': 0
-        }
+    def _severity_counts(self) -> Dict[str, int]:
+        """Count findings by severity, preferring the counters stored on the scan"""
+        if self.severity_counts is not None:
+            return dict(self.severity_counts)
 
-        for vuln in vulnerabilities:
-            severity_counts[vuln.severity.value] += 1
+        if self.scan.vulnerability_count is not None:
+            return {
+                severity: getattr(self.scan, f'{severity}_count') or 0
+                for severity in SEVERITY_LEVELS
+            }
+
+        severity_counts = {severity: 0 for severity in SEVERITY_LEVELS}
 
-        # Calculate security score (0-100)
-        # Lower score = more/worse vulnerabilities
-        total_vulns = len(vulnerabilities)
-        critical_weight = severity_counts['critical'] * 10
-        high_weight = severity_counts['high'] * 5
-        medium_weight = severity_counts['medium'] * 2
-        low_weight = severity_counts['low'] * 1
+        # Unfinished scans have no findings yet
+        if self.scan.status in (ScanStatus.PENDING, ScanStatus.RUNNING):
+            return severity_counts
 
-        total_weight = critical_weight + high_weight + medium_weight + low_weight
-        score = max(0, 100 - total_weight)
+        # Scans finished before the counters existed (see backfill_scans.py)
+        for vuln in self.scan.vulnerabilities:
+            severity_counts[vuln.severity.value] += 1
+        return severity_counts
+
+    def generate_summary(self) -> Dict[str, Any]:
+        """Generate a summary of the scan results"""
+        severity_counts = self._severity_counts()
+        score = self.scan.security_score
+        if score is None:
+            score = calculate_security_score(severity_counts)
 
         return {
             'scan_id': self.scan.id,
@@ -51,22 +157,16 @@ class ReportGenerator:
             'status': self.scan.status.value,
             'created_at': self.scan.created_at.isoformat(),
             'completed_at': self.scan.completed_at.isoformat() if self.scan.completed_at else None,
-            'total_vulnerabilities': total_vulns,
+            'total_vulnerabilities': sum(severity_counts.values()),
             'severity_breakdown': severity_counts,
             'security_score': score,
-            'risk_level': self._calculate_risk_level(score)
+            'risk_level': self.scan.risk_level or self._calculate_risk_level(score),
+            'timings': self.scan.timings
         }
 
     def _calculate_risk_level(self, score: int) -> str:
         """Calculate risk level based on score"""
-        if score >= 80:
-            return 'low'
-        elif score >= 60:
-            return 'medium'
-        elif score >= 40:
-            return 'high'
-        else:
-            return 'critical'
+        return calculate_risk_level(score)
 
     def generate_json_report(self) -> Dict[str, Any]:
         """Generate complete JSON report"""
@@ -85,7 +185,7 @@ class ReportGenerator:
         ]
 
         return {
-            'report_generated_at': datetime.now().isoformat(),
+            'report_generated_at': report_generated_at(self.scan),
             'summary': summary,
             'vulnerabilities': vulnerabilities,
             'recommendations': self._generate_recommendations()
@@ -93,30 +193,14 @@ class ReportGenerator:
 
     def _generate_recommendations(self) -> List[str]:
         """Generate top recommendations based on vulnerabilities"""
-        recommendations = []
-        vulnerabilities = self.scan.vulnerabilities
-
-        # Group by severity
         critical_vulns = [
-            v for v in vulnerabilities if v.severity == Severity.CRITICAL]
-        high_vulns = [
-            v for v in vulnerabilities if v.severity == Severity.HIGH]
-
-        if critical_vulns:
-            recommendations.append(
-                f"⚠️ URGENT: You have {len(critical_vulns)} critical vulnerabilities that need immediate attention.")
+            (v.title, v.recommendation)
+            for v in self.scan.vulnerabilities if v.severity == Severity.CRITICAL]
+        high_count = sum(
+            1 for v in self.scan.vulnerabilities if v.severity == Severity.HIGH)
 
-        if high_vulns:
-            recommendations.append(
-                f"⚠️ HIGH PRIORITY: Address {len(high_vulns)} high-severity issues as soon as possible.")
-
-        # Add specific recommendations
-        for vuln in critical_vulns[:3]:  # Top 3 critical
-            if vuln.recommendation:
-                recommendations.append(
-                    f"• {vuln.title}: {vuln.recommendation}")
-
-        return recommendations
+        return build_recommendations(
+            {'critical': len(critical_vulns), 'high': high_count}, critical_vulns)
 
     def generate_csv_data(self) -> List[Dict[str, Any]]:
         """Generate CSV-compatible data"""
@@ -132,73 +216,76 @@ class ReportGenerator:
         ]
 
 
-def get_user_statistics(db: Session, user_id: int) -> Dict[str, Any]:
-    """Get statistics for a user"""
-    from app.models.scan import Scan, ScanStatus
-
-    scans = db.query(Scan).filter(Scan.user_id == user_id).all()
-
-    total_scans = len(scans)
-    completed_scans = len(
-        [s for s in scans if s.status == ScanStatus.COMPLETED])
-    pending_scans = len([s for s in scans if s.status == ScanStatus.PENDING])
-    failed_scans = len([s for s in scans if s.status == ScanStatus.FAILED])
-
-    # Count all vulnerabilities
-    all_vulnerabilities = []
-    for scan in scans:
-        all_vulnerabilities.extend(scan.vulnerabilities)
-
-    severity_counts = {
-        'critical': 0,
-        'high': 0,
-        'medium': 0,
-        'low': 0,
-        'info': 0
+async def get_user_statistics(db: AsyncSession, user_id: int) -> Dict[str, Any]:
+    """
+    Get statistics for a user.
+
+    Everything is aggregated in the database, so memory use does not grow
+    with the number of scans or findings.
+    """
+    # Scans per status
+    status_counts = {
+        status: count
+        for status, count in await db.execute(
+            select(Scan.status, func.count(Scan.id))
+            .where(Scan.user_id == user_id)
+            .group_by(Scan.status)
+        )
     }
 
-    for vuln in all_vulnerabilities:
-        severity_counts[vuln.severity.value] += 1
+    # Findings per severity across all of the user's scans
+    severity_counts = {severity: 0 for severity in SEVERITY_LEVELS}
+    for severity, count in await db.execute(
+        select(Vulnerability.severity, func.count(Vulnerability.id))
+        .join(Scan, Scan.id == Vulnerability.scan_id)
+        .where(Scan.user_id == user_id)
+        .group_by(Vulnerability.severity)
+    ):
+        severity_counts[severity.value] = count
 
     # Most scanned domain
-    domain_counts = {}
-    for scan in scans:
-        from urllib.parse import urlparse
-        domain = urlparse(scan.target_url).netloc or scan.target_url
-        domain_counts[domain] = domain_counts.get(domain, 0) + 1
-
-    most_scanned = max(domain_counts.items(),
-                       key=lambda x: x[1]) if domain_counts else (None, 0)
+    most_scanned = (await db.execute(
+        select(Scan.domain, func.count(Scan.id))
+        .where(Scan.user_id == user_id)
+        .group_by(Scan.domain)
+        .order_by(func.count(Scan.id).desc(), Scan.domain)
+        .limit(1)
+    )).first() or (None, 0)
 
     return {
-        'total_scans': total_scans,
-        'completed_scans': completed_scans,
-        'pending_scans': pending_scans,
-        'failed_scans': failed_scans,
-        'total_vulnerabilities': len(all_vulnerabilities),
+        'total_scans': sum(status_counts.values()),
+        'completed_scans': status_counts.get(ScanStatus.COMPLETED, 0),
+        'pending_scans': status_counts.get(ScanStatus.PENDING, 0),
+        'failed_scans': status_counts.get(ScanStatus.FAILED, 0),
+        'total_vulnerabilities': sum(severity_counts.values()),
         'severity_breakdown': severity_counts,
         'most_scanned_domain': most_scanned[0],
         'most_scanned_count': most_scanned[1]
     }
 
 
-def get_site_history(db: Session, user_id: int, domain: str) -> List[Dict[str, Any]]:
-    """Get scan history for a specific domain"""
-    from app.models.scan import Scan
-    from urllib.parse import urlparse
-
-    scans = db.query(Scan).filter(Scan.user_id == user_id).all()
-
-    # Filter scans for this domain
-    domain_scans = []
-    for scan in scans:
-        scan_domain = urlparse(scan.target_url).netloc or scan.target_url
-        if scan_domain == domain:
-            generator = ReportGenerator(scan)
-            summary = generator.generate_summary()
-            domain_scans.append(summary)
-
-    # Sort by date
-    domain_scans.sort(key=lambda x: x['created_at'], reverse=True)
-
-    return domain_scans
+async def get_site_history(
+    db: AsyncSession,
+    user_id: int,
+    domain: str,
+    skip: int = 0,
+    limit: int = 50
+) -> List[Dict[str, Any]]:
+    """
+    Get scan history for a specific domain, newest first.
+
+    Served by the (user_id, domain, created_at) index, so only the requested
+    page of scans is read whatever the size of the history.
+    """
+    scans = (await db.execute(
+        select(Scan)
+        .where(Scan.user_id == user_id, Scan.domain == normalize_domain(domain))
+        .order_by(Scan.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+    )).scalars().all()
+
+    # Scans finished before the summary columns existed count their findings
+    # through a lazy load, which async sessions only allow inside run_sync
+    return await db.run_sync(
+        lambda _: [ReportGenerator(scan).generate_summary() for scan in scans])
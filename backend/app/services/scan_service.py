@@ -3,127 +3,361 @@ Scan service for database operations
 Handles CRUD operations for scans
 """
 
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
+import asyncio
+import base64
+import binascii
+import logging
 
-from app.models.scan import Scan, ScanStatus
-from app.models.vulnerability import Vulnerability
+from app.core.cache import SingleFlight
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import SCANS_COALESCED
+from app.models.scan import Scan, ScanStatus, normalize_domain, normalize_target
+from app.models.vulnerability import Vulnerability, Severity
 from app.schemas.scan import ScanCreate, ScanUpdate
 from app.services.scanner import SecurityScanner
+from app.services.job_queue import enqueue_scan
+from app.services.report_service import scan_summary_values
+from app.services.report_cache import invalidate_scan_reports
+from app.services.artifact_service import (
+    artifact_paths, generate_scan_artifacts, remove_unreferenced_files)
 
+logger = logging.getLogger(__name__)
 
-async def create_scan(db: Session, scan_data: ScanCreate, user_id: int) -> Scan:
-    """Create a new scan"""
+# Scans of the same target and type running at the same time in this
+# process share one set of probes
+scan_flights = SingleFlight()
+
+
+async def create_scan(db: AsyncSession, scan_data: ScanCreate, user_id: int) -> Scan:
+    """Create a new scan and queue it for a worker"""
     db_scan = Scan(
         user_id=user_id,
         target_url=scan_data.target_url,
         scan_type=scan_data.scan_type,
-        status=ScanStatus.PENDING
+        probe_max_age=scan_data.probe_max_age,
+        status=ScanStatus.PENDING,
+        vulnerabilities=[]
     )
     db.add(db_scan)
-    db.commit()
-    db.refresh(db_scan)
+    await db.flush()
+    await db.run_sync(enqueue_scan, db_scan.id, commit=False)
+    await db.commit()
     return db_scan
 
 
-async def execute_scan(db: Session, scan_id: int) -> Scan:
+def _store_artifacts(scan_id: int) -> None:
+    """Render report artifacts in a worker thread with its own session"""
+    with SessionLocal() as db:
+        generate_scan_artifacts(db, scan_id)
+
+
+async def execute_scan(db: AsyncSession, scan_id: int) -> Scan:
     """Execute the security scan and store results"""
     # Get the scan
-    scan = db.query(Scan).filter(Scan.id == scan_id).first()
+    scan = await db.get(Scan, scan_id)
     if not scan:
         raise ValueError("Scan not found")
 
+    # A job can be claimed again after its results were saved (the worker
+    # died or lost its lease before completing it). Running the scan again
+    # would add a second set of findings.
+    if scan.status in (ScanStatus.COMPLETED, ScanStatus.FAILED):
+        logger.info("Scan %s already finished, not running it again", scan_id)
+        return scan
+
     # Update status to running
     scan.status = ScanStatus.RUNNING
-    db.commit()
+    await db.commit()
 
+    scanner = SecurityScanner(scan.target_url, max_age=scan.probe_max_age)
     try:
-        # Perform the scan
-        scanner = SecurityScanner(scan.target_url)
-        findings = await scanner.perform_scan(scan.scan_type.value)
-
-        # Save vulnerabilities
-        for finding in findings:
-            vulnerability = Vulnerability(
-                scan_id=scan.id,
-                severity=finding['severity'],
-                title=finding['title'],
-                description=finding['description'],
-                recommendation=finding['recommendation']
-            )
-            db.add(vulnerability)
+        # Perform the scan, or join an identical one already in flight
+        findings, timings = await _run_scanner(scanner, scan.scan_type.value)
 
-        # Update scan status to completed
-        scan.status = ScanStatus.COMPLETED
-        scan.completed_at = datetime.now()
-        db.commit()
-        db.refresh(scan)
+        await save_scan_results(db, scan_id, findings, ScanStatus.COMPLETED, timings)
 
     except Exception as e:
-        # Update scan status to failed
-        scan.status = ScanStatus.FAILED
-        scan.completed_at = datetime.now()
+        await db.rollback()
+
+        # Record the error as a finding and mark the scan as failed
+        error_finding = {
+            'severity': Severity.HIGH,
+            'title': "Scan execution error",
+            'description': f"An error occurred during scan: {str(e)}",
+            'recommendation': "Contact support if this persists"
+        }
+        await save_scan_results(
+            db, scan_id, [error_finding], ScanStatus.FAILED, scanner.timings or None)
+
+        raise
+
+    # Render the downloadable reports once, now that the scan can no longer
+    # change. Exports fall back to rendering on request if this fails.
+    if settings.ARTIFACTS_ENABLED:
+        try:
+            await asyncio.to_thread(_store_artifacts, scan_id)
+        except Exception:
+            logger.exception("Could not store report artifacts for scan %s", scan_id)
+
+    return scan
+
+
+async def _run_scanner(
+    scanner: SecurityScanner,
+    scan_type: str
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Run a scanner, coalesced with identical scans in flight in this process.
+
+    Scans coalesce when their targets normalize to the same URL and they have
+    the same type and probe cache max age. Every scan gets its own copy of
+    the findings and timings; the timings of a scan that joined another's
+    probes are marked ``coalesced``.
+
+    Returns:
+        The findings and the per-check timings
+    """
+    async def scan():
+        findings = await scanner.perform_scan(scan_type)
+        return findings, scanner.timings
+
+    if not settings.SCAN_COALESCE_ENABLED:
+        return await scan()
+
+    key = (normalize_target(scanner.target_url), scan_type, scanner.max_age)
+    (findings, timings), shared = await scan_flights.do(key, scan)
+    if shared:
+        SCANS_COALESCED.inc(scan_type=scan_type)
+        for check_timings in timings.values():
+            check_timings['coalesced'] = True
+    return findings, timings
+
+
+async def save_scan_results(
+    db: AsyncSession,
+    scan_id: int,
+    findings: List[Dict[str, Any]],
+    status: ScanStatus,
+    timings: Optional[Dict[str, Dict[str, Any]]] = None
+) -> None:
+    """
+    Persist scan findings and the final scan status in one transaction.
+
+    Findings are written with a single multi-row INSERT rather than one ORM
+    object per finding, and nothing is refreshed afterwards. The severity
+    counters, score and risk level are stored on the scan in the same UPDATE
+    so summaries never need to read the findings back, together with the
+    per-check timings collected by the scanner.
+    """
+    severity_counts = {}
+    for finding in findings:
+        severity = Severity(finding['severity']).value
+        severity_counts[severity] = severity_counts.get(severity, 0) + 1
+
+    if findings:
+        await db.execute(
+            insert(Vulnerability),
+            [
+                {
+                    'scan_id': scan_id,
+                    'severity': Severity(finding['severity']),
+                    'title': finding['title'],
+                    'description': finding['description'],
+                    'recommendation': finding['recommendation']
+                }
+                for finding in findings
+            ]
+        )
+
+    await db.execute(
+        update(Scan)
+        .where(Scan.id == scan_id)
+        .values(
+            status=status,
+            completed_at=datetime.now(),
+            timings=timings,
+            **scan_summary_values(severity_counts)
+        )
+    )
+    await db.commit()
+
+
+def backfill_scan_summaries(db: Session, batch_size: int = 500) -> int:
+    """
+    Compute the summary columns for finished scans that do not have them.
+
+    Returns:
+        Number of scans updated
+    """
+    updated = 0
+
+    while True:
+        scan_ids = db.execute(
+            select(Scan.id)
+            .where(
+                Scan.status.in_([ScanStatus.COMPLETED, ScanStatus.FAILED]),
+                Scan.vulnerability_count.is_(None)
+            )
+            .order_by(Scan.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not scan_ids:
+            return updated
+
+        # Count findings per scan and severity in one aggregate query
+        counts = {scan_id: {} for scan_id in scan_ids}
+        rows = db.execute(
+            select(Vulnerability.scan_id, Vulnerability.severity,
+                   func.count(Vulnerability.id))
+            .where(Vulnerability.scan_id.in_(scan_ids))
+            .group_by(Vulnerability.scan_id, Vulnerability.severity)
+        )
+        for scan_id, severity, count in rows:
+            counts[scan_id][severity.value] = count
+
+        db.execute(
+            update(Scan),
+            [
+                {'id': scan_id, **scan_summary_values(severity_counts)}
+                for scan_id, severity_counts in counts.items()
+            ]
+        )
         db.commit()
+        updated += len(scan_ids)
+
+
+def backfill_scan_domains(db: Session, batch_size: int = 500) -> int:
+    """
+    Fill the normalized domain column for scans created before it existed.
+
+    Returns:
+        Number of scans updated
+    """
+    updated = 0
 
-        # Add error as vulnerability
-        error_vuln = Vulnerability(
-            scan_id=scan.id,
-            severity="high",
-            title="Scan execution error",
-            description=f"An error occurred during scan: {str(e)}",
-            recommendation="Contact support if this persists"
+    while True:
+        rows = db.execute(
+            select(Scan.id, Scan.target_url)
+            .where(Scan.domain.is_(None))
+            .order_by(Scan.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return updated
+
+        db.execute(
+            update(Scan),
+            [
+                {'id': scan_id, 'domain': normalize_domain(target_url)}
+                for scan_id, target_url in rows
+            ]
         )
-        db.add(error_vuln)
         db.commit()
+        updated += len(rows)
 
-        raise
 
-    return scan
+async def get_scan(
+    db: AsyncSession,
+    scan_id: int,
+    user_id: int,
+    with_vulnerabilities: bool = False
+) -> Optional[Scan]:
+    """
+    Get a scan by ID (only if owned by user)
 
+    Relationships cannot be loaded lazily from an async session, so the
+    findings are only available when requested with ``with_vulnerabilities``.
+    """
+    query = select(Scan).where(Scan.id == scan_id, Scan.user_id == user_id)
+    if with_vulnerabilities:
+        query = query.options(selectinload(Scan.vulnerabilities))
+    return (await db.execute(query)).scalar_one_or_none()
 
-def get_scan(db: Session, scan_id: int, user_id: int) -> Optional[Scan]:
-    """Get a scan by ID (only if owned by user)"""
-    return db.query(Scan).filter(
-        Scan.id == scan_id,
-        Scan.user_id == user_id
-    ).first()
 
+def encode_cursor(scan: Scan) -> str:
+    """Build the opaque pagination cursor pointing after a scan"""
+    raw = f"{scan.created_at.isoformat()}|{scan.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
 
-def get_user_scans(
-    db: Session,
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a pagination cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, scan_id = base64.urlsafe_b64decode(
+            padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(scan_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def get_user_scans(
+    db: AsyncSession,
     user_id: int,
-    skip: int = 0,
     limit: int = 100,
-    status: Optional[str] = None
-) -> List[Scan]:
-    """Get all scans for a user with pagination"""
-    query = db.query(Scan).filter(Scan.user_id == user_id)
+    status: Optional[ScanStatus] = None,
+    cursor: Optional[str] = None
+) -> Tuple[List[Scan], Optional[str]]:
+    """
+    Get a page of a user's scans, newest first.
+
+    Pages are keyed on (created_at, id) rather than an offset, so each page
+    is an index range scan and rows inserted while paging never cause
+    duplicates or gaps.
+
+    Returns:
+        The scans and the cursor for the next page (None on the last page)
+    """
+    query = select(Scan).where(Scan.user_id == user_id)
 
     if status:
-        query = query.filter(Scan.status == status)
+        query = query.where(Scan.status == status)
+
+    if cursor:
+        created_at, scan_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(Scan.created_at, Scan.id) < tuple_(created_at, scan_id))
+
+    # Fetch one extra row to find out whether there is a next page
+    scans = (await db.execute(
+        query.order_by(Scan.created_at.desc(), Scan.id.desc()).limit(limit + 1)
+    )).scalars().all()
 
-    return query.order_by(Scan.created_at.desc()).offset(skip).limit(limit).all()
+    if len(scans) > limit:
+        scans = scans[:limit]
+        return scans, encode_cursor(scans[-1])
+    return scans, None
 
 
-def delete_scan(db: Session, scan_id: int, user_id: int) -> bool:
+async def delete_scan(db: AsyncSession, scan_id: int, user_id: int) -> bool:
     """Delete a scan (only if owned by user)"""
-    scan = db.query(Scan).filter(
-        Scan.id == scan_id,
-        Scan.user_id == user_id
-    ).first()
+    scan = await get_scan(db, scan_id, user_id)
 
     if not scan:
         return False
 
-    db.delete(scan)
-    db.commit()
+    stored_files = await db.run_sync(artifact_paths, scan_id)
+    await db.delete(scan)
+    await db.commit()
+    invalidate_scan_reports(scan_id)
+    await db.run_sync(remove_unreferenced_files, stored_files)
     return True
 
 
-def update_scan_status(db: Session, scan_id: int, status: ScanStatus) -> Optional[Scan]:
+async def update_scan_status(db: AsyncSession, scan_id: int, status: ScanStatus) -> Optional[Scan]:
     """Update scan status"""
-    scan = db.query(Scan).filter(Scan.id == scan_id).first()
+    scan = await db.get(Scan, scan_id)
     if not scan:
         return None
 
@@ -131,6 +365,6 @@ def update_scan_status(db: Session, scan_id: int, status: ScanStatus) -> Optiona
     if status == ScanStatus.COMPLETED or status == ScanStatus.FAILED:
         scan.completed_at = datetime.now()
 
-    db.commit()
-    db.refresh(scan)
+    await db.commit()
+    await db.refresh(scan)
     return scan
@@ -3,23 +3,129 @@ Security scanning service
 Performs various security checks on target URLs
 """
 
+import asyncio
 import httpx
 import ssl
 import socket
+import time
 from urllib.parse import urlparse
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+from app.core.config import settings
+from app.core.metrics import OUTBOUND_ERRORS, PORT_PROBES, SCAN_CHECK_DURATION
 from app.schemas.vulnerability import VulnerabilityCreate, SeverityEnum
+from app.services.http_client import get_http_client, host_slot
+from app.services.port_scanner import CLOSED, FILTERED, OPEN, ports_for_profile, scan_ports
+from app.services.probe_cache import cached_probe, headers_key, tls_key
+from app.services.tls_probe import probe_tls
+
+
+# Open ports worth reporting above INFO: service name, severity and why
+EXPOSED_SERVICES = {
+    21: ('FTP', SeverityEnum.MEDIUM, 'FTP sends credentials and data unencrypted.'),
+    22: ('SSH', SeverityEnum.LOW, 'SSH is a frequent target of brute-force attacks.'),
+    23: ('Telnet', SeverityEnum.HIGH, 'Telnet sends credentials and sessions unencrypted.'),
+    25: ('SMTP', SeverityEnum.LOW, 'Mail servers can be abused as open relays if misconfigured.'),
+    111: ('rpcbind', SeverityEnum.MEDIUM, 'rpcbind exposes the RPC services running on the host.'),
+    135: ('MSRPC', SeverityEnum.HIGH, 'Windows RPC should never be reachable from the Internet.'),
+    139: ('NetBIOS', SeverityEnum.HIGH, 'NetBIOS file sharing should never be reachable from the Internet.'),
+    445: ('SMB', SeverityEnum.HIGH, 'SMB has a long history of remotely exploitable vulnerabilities.'),
+    1433: ('Microsoft SQL Server', SeverityEnum.HIGH, 'Databases should only be reachable from the application servers.'),
+    2049: ('NFS', SeverityEnum.HIGH, 'Exposed NFS shares can leak or allow modifying files.'),
+    3306: ('MySQL', SeverityEnum.HIGH, 'Databases should only be reachable from the application servers.'),
+    3389: ('RDP', SeverityEnum.HIGH, 'Remote desktop is a frequent target of brute-force and exploit attempts.'),
+    5432: ('PostgreSQL', SeverityEnum.HIGH, 'Databases should only be reachable from the application servers.'),
+    5900: ('VNC', SeverityEnum.HIGH, 'VNC often allows weak or no authentication.'),
+    6379: ('Redis', SeverityEnum.HIGH, 'Redis has no authentication by default.'),
+    9200: ('Elasticsearch', SeverityEnum.HIGH, 'Elasticsearch often has no authentication.'),
+    11211: ('Memcached', SeverityEnum.HIGH, 'Memcached has no authentication and can be abused for amplification attacks.'),
+    27017: ('MongoDB', SeverityEnum.HIGH, 'Databases should only be reachable from the application servers.'),
+}
+
+# Ports expected to be open on a web server
+WEB_PORTS = {80, 443, 8080, 8443}
+
+
+# Port implied by each URL scheme
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def _cache_timings(age: Optional[float]) -> Dict[str, Any]:
+    """Timings entries telling whether a probe result came from the probe cache"""
+    if age is None:
+        return {'from_cache': False}
+    return {'from_cache': True, 'cache_age_ms': _ms(age)}
+
+
+class _RequestTrace:
+    """
+    Collects connection phase timings from httpx trace events.
+
+    httpx resolves the host inside its TCP connect, so for HTTP checks
+    ``connect_ms`` includes DNS resolution. Phases are summed over redirects;
+    they are absent when a pooled connection was reused.
+    """
+
+    PHASES = {
+        'connection.connect_tcp': 'connect_ms',
+        'connection.start_tls': 'tls_handshake_ms',
+    }
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self._phase_started: Dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        phase, _, stage = event_name.rpartition('.')
+        now = time.perf_counter()
+        if phase in self.PHASES:
+            if stage == 'started':
+                self._phase_started[phase] = now
+            elif stage == 'complete' and phase in self._phase_started:
+                key = self.PHASES[phase]
+                elapsed = _ms(now - self._phase_started.pop(phase))
+                self.timings[key] = round(self.timings.get(key, 0) + elapsed, 2)
+        elif phase.endswith('.receive_response_headers') and stage == 'complete':
+            # Time to the first byte of the final response
+            self.timings['ttfb_ms'] = _ms(now - self.started)
 
 
 class SecurityScanner:
     """Main security scanner class"""
 
-    def __init__(self, target_url: str):
+    # Checks run for each scan type, in the order their findings are reported.
+    # Checks are independent of each other, so they all run concurrently.
+    CHECKS = {
+        'https': ('basic', 'full'),
+        'headers': ('headers', 'full'),
+        'ssl': ('ssl', 'full'),
+        'ports': ('ports',),
+    }
+
+    def __init__(
+        self,
+        target_url: str,
+        check_timeout: Optional[float] = None,
+        total_timeout: Optional[float] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        max_age: Optional[float] = None
+    ):
         self.target_url = target_url
         self.parsed_url = urlparse(target_url)
         self.vulnerabilities: List[VulnerabilityCreate] = []
+        self.check_timeout = check_timeout or settings.SCAN_CHECK_TIMEOUT_SECONDS
+        self.total_timeout = total_timeout or settings.SCAN_TOTAL_TIMEOUT_SECONDS
+        self.http_client = http_client
+        # Oldest cached probe result the checks may use; 0 always probes
+        self.max_age = max_age
+        # Per-check wall time, network phase timings and bytes received
+        self.timings: Dict[str, Dict[str, Any]] = {}
 
     async def scan_https(self) -> List[Dict[str, Any]]:
         """Check if the site uses HTTPS"""
@@ -45,86 +151,112 @@ class SecurityScanner:
     async def scan_headers(self) -> List[Dict[str, Any]]:
         """Check security headers"""
         findings = []
+        trace = _RequestTrace()
+        timings = self.timings.setdefault('headers', {})
+
+        async def fetch() -> Dict[str, Any]:
+            client = self.http_client or get_http_client()
+            async with host_slot(self.parsed_url.netloc):
+                response = await client.get(
+                    self.target_url, extensions={'trace': trace})
+            return {
+                'headers': response.headers,
+                'bytes_received': sum(
+                    r.num_bytes_downloaded for r in (*response.history, response)),
+                'redirects': len(response.history)
+            }
 
         try:
-            async with httpx.AsyncClient(timeout=10.0, follow_redirects=True) as client:
-                response = await client.get(self.target_url)
-                headers = response.headers
+            scheme = self.parsed_url.scheme
+            path = self.parsed_url.path or '/'
+            if self.parsed_url.query:
+                path = f'{path}?{self.parsed_url.query}'
+            probe, age = await cached_probe(
+                headers_key(scheme, self.parsed_url.hostname,
+                            self.parsed_url.port or DEFAULT_PORTS.get(scheme), path),
+                fetch, self.max_age)
+            timings.update(
+                bytes_received=probe['bytes_received'],
+                redirects=probe['redirects'],
+                **_cache_timings(age)
+            )
+            headers = probe['headers']
 
-                # Check for security headers
-                security_headers = {
-                    'Strict-Transport-Security': {
-                        'severity': SeverityEnum.MEDIUM,
-                        'title': 'Missing HSTS header',
-                        'description': 'The Strict-Transport-Security header is not set. This header forces browsers to use HTTPS.',
-                        'recommendation': 'Add the header: Strict-Transport-Security: max-age=31536000; includeSubDomains'
-                    },
-                    'X-Content-Type-Options': {
-                        'severity': SeverityEnum.LOW,
-                        'title': 'Missing X-Content-Type-Options header',
-                        'description': 'This header prevents MIME-sniffing attacks.',
-                        'recommendation': 'Add the header: X-Content-Type-Options: nosniff'
-                    },
-                    'X-Frame-Options': {
-                        'severity': SeverityEnum.MEDIUM,
-                        'title': 'Missing X-Frame-Options header',
-                        'description': 'This header prevents clickjacking attacks by controlling if the site can be framed.',
-                        'recommendation': 'Add the header: X-Frame-Options: DENY or SAMEORIGIN'
-                    },
-                    'Content-Security-Policy': {
-                        'severity': SeverityEnum.MEDIUM,
-                        'title': 'Missing Content-Security-Policy header',
-                        'description': 'CSP helps prevent XSS and other code injection attacks.',
-                        'recommendation': 'Implement a Content-Security-Policy appropriate for your site'
-                    },
-                    'X-XSS-Protection': {
-                        'severity': SeverityEnum.LOW,
-                        'title': 'Missing X-XSS-Protection header',
-                        'description': 'This header enables the browser\'s XSS filter.',
-                        'recommendation': 'Add the header: X-XSS-Protection: 1; mode=block'
-                    }
+            # Check for security headers
+            security_headers = {
+                'Strict-Transport-Security': {
+                    'severity': SeverityEnum.MEDIUM,
+                    'title': 'Missing HSTS header',
+                    'description': 'The Strict-Transport-Security header is not set. This header forces browsers to use HTTPS.',
+                    'recommendation': 'Add the header: Strict-Transport-Security: max-age=31536000; includeSubDomains'
+                },
+                'X-Content-Type-Options': {
+                    'severity': SeverityEnum.LOW,
+                    'title': 'Missing X-Content-Type-Options header',
+                    'description': 'This header prevents MIME-sniffing attacks.',
+                    'recommendation': 'Add the header: X-Content-Type-Options: nosniff'
+                },
+                'X-Frame-Options': {
+                    'severity': SeverityEnum.MEDIUM,
+                    'title': 'Missing X-Frame-Options header',
+                    'description': 'This header prevents clickjacking attacks by controlling if the site can be framed.',
+                    'recommendation': 'Add the header: X-Frame-Options: DENY or SAMEORIGIN'
+                },
+                'Content-Security-Policy': {
+                    'severity': SeverityEnum.MEDIUM,
+                    'title': 'Missing Content-Security-Policy header',
+                    'description': 'CSP helps prevent XSS and other code injection attacks.',
+                    'recommendation': 'Implement a Content-Security-Policy appropriate for your site'
+                },
+                'X-XSS-Protection': {
+                    'severity': SeverityEnum.LOW,
+                    'title': 'Missing X-XSS-Protection header',
+                    'description': 'This header enables the browser\'s XSS filter.',
+                    'recommendation': 'Add the header: X-XSS-Protection: 1; mode=block'
                 }
+            }
 
-                for header, info in security_headers.items():
-                    if header not in headers:
-                        findings.append(info)
-                    else:
-                        findings.append({
-                            'severity': SeverityEnum.INFO,
-                            'title': f'{header} header present',
-                            'description': f'The {header} security header is configured.',
-                            'recommendation': None
-                        })
-
-                # Check for information disclosure
-                server_header = headers.get('Server', '')
-                if server_header and len(server_header) > 0:
+            for header, info in security_headers.items():
+                if header not in headers:
+                    findings.append(info)
+                else:
                     findings.append({
-                        'severity': SeverityEnum.LOW,
-                        'title': 'Server information disclosure',
-                        'description': f'The Server header reveals: {server_header}. This can help attackers identify vulnerabilities.',
-                        'recommendation': 'Remove or minimize the Server header information.'
+                        'severity': SeverityEnum.INFO,
+                        'title': f'{header} header present',
+                        'description': f'The {header} security header is configured.',
+                        'recommendation': None
                     })
 
-                # Check cookies
-                set_cookie = headers.get('Set-Cookie', '')
-                if set_cookie:
-                    if 'Secure' not in set_cookie:
-                        findings.append({
-                            'severity': SeverityEnum.MEDIUM,
-                            'title': 'Cookie without Secure flag',
-                            'description': 'Cookies are set without the Secure flag, allowing transmission over HTTP.',
-                            'recommendation': 'Add the Secure flag to all cookies: Set-Cookie: name=value; Secure'
-                        })
-                    if 'HttpOnly' not in set_cookie:
-                        findings.append({
-                            'severity': SeverityEnum.MEDIUM,
-                            'title': 'Cookie without HttpOnly flag',
-                            'description': 'Cookies are accessible via JavaScript, increasing XSS risk.',
-                            'recommendation': 'Add the HttpOnly flag: Set-Cookie: name=value; HttpOnly'
-                        })
+            # Check for information disclosure
+            server_header = headers.get('Server', '')
+            if server_header and len(server_header) > 0:
+                findings.append({
+                    'severity': SeverityEnum.LOW,
+                    'title': 'Server information disclosure',
+                    'description': f'The Server header reveals: {server_header}. This can help attackers identify vulnerabilities.',
+                    'recommendation': 'Remove or minimize the Server header information.'
+                })
+
+            # Check cookies
+            set_cookie = headers.get('Set-Cookie', '')
+            if set_cookie:
+                if 'Secure' not in set_cookie:
+                    findings.append({
+                        'severity': SeverityEnum.MEDIUM,
+                        'title': 'Cookie without Secure flag',
+                        'description': 'Cookies are set without the Secure flag, allowing transmission over HTTP.',
+                        'recommendation': 'Add the Secure flag to all cookies: Set-Cookie: name=value; Secure'
+                    })
+                if 'HttpOnly' not in set_cookie:
+                    findings.append({
+                        'severity': SeverityEnum.MEDIUM,
+                        'title': 'Cookie without HttpOnly flag',
+                        'description': 'Cookies are accessible via JavaScript, increasing XSS risk.',
+                        'recommendation': 'Add the HttpOnly flag: Set-Cookie: name=value; HttpOnly'
+                    })
 
         except httpx.RequestError as e:
+            OUTBOUND_ERRORS.inc(kind='http', error=type(e).__name__)
             findings.append({
                 'severity': SeverityEnum.HIGH,
                 'title': 'Unable to connect to target',
@@ -132,6 +264,7 @@ class SecurityScanner:
                 'recommendation': 'Verify the URL is correct and the server is accessible.'
             })
         except Exception as e:
+            OUTBOUND_ERRORS.inc(kind='http', error=type(e).__name__)
             findings.append({
                 'severity': SeverityEnum.MEDIUM,
                 'title': 'Error during header scan',
@@ -139,6 +272,8 @@ class SecurityScanner:
                 'recommendation': 'Check the target URL and try again.'
             })
 
+        # Recorded for failed requests too, to show where they stalled
+        timings.update(trace.timings)
         return findings
 
     async def scan_ssl(self) -> List[Dict[str, Any]]:
@@ -152,57 +287,60 @@ class SecurityScanner:
             hostname = self.parsed_url.hostname
             port = self.parsed_url.port or 443
 
-            context = ssl.create_default_context()
-
-            with socket.create_connection((hostname, port), timeout=10) as sock:
-                with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                    cert = ssock.getpeercert()
-
-                    # Check certificate expiration
-                    not_after = datetime.strptime(
-                        cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
-                    days_until_expiry = (not_after - datetime.now()).days
-
-                    if days_until_expiry < 0:
-                        findings.append({
-                            'severity': SeverityEnum.CRITICAL,
-                            'title': 'SSL certificate expired',
-                            'description': f'The SSL certificate expired {abs(days_until_expiry)} days ago.',
-                            'recommendation': 'Renew the SSL certificate immediately.'
-                        })
-                    elif days_until_expiry < 30:
-                        findings.append({
-                            'severity': SeverityEnum.MEDIUM,
-                            'title': 'SSL certificate expiring soon',
-                            'description': f'The SSL certificate will expire in {days_until_expiry} days.',
-                            'recommendation': 'Renew the SSL certificate before it expires.'
-                        })
-                    else:
-                        findings.append({
-                            'severity': SeverityEnum.INFO,
-                            'title': 'Valid SSL certificate',
-                            'description': f'SSL certificate is valid for {days_until_expiry} more days.',
-                            'recommendation': None
-                        })
-
-                    # Check protocol version
-                    version = ssock.version()
-                    if version in ['TLSv1', 'TLSv1.1', 'SSLv2', 'SSLv3']:
-                        findings.append({
-                            'severity': SeverityEnum.HIGH,
-                            'title': 'Outdated SSL/TLS protocol',
-                            'description': f'The server supports {version} which has known vulnerabilities.',
-                            'recommendation': 'Disable old protocols and use TLS 1.2 or higher.'
-                        })
-                    else:
-                        findings.append({
-                            'severity': SeverityEnum.INFO,
-                            'title': f'Using {version}',
-                            'description': f'The connection uses {version} protocol.',
-                            'recommendation': None
-                        })
+            probe, age = await cached_probe(
+                tls_key(hostname, port), lambda: probe_tls(hostname, port), self.max_age)
+            timings = self.timings.setdefault('ssl', {})
+            if age is None:
+                timings.update(probe.timings)
+            timings.update(_cache_timings(age))
+            cert = probe.certificate
+
+            # Check certificate expiration
+            not_after = datetime.strptime(
+                cert['notAfter'], '%b %d %H:%M:%S %Y %Z')
+            days_until_expiry = (not_after - datetime.now()).days
+
+            if days_until_expiry < 0:
+                findings.append({
+                    'severity': SeverityEnum.CRITICAL,
+                    'title': 'SSL certificate expired',
+                    'description': f'The SSL certificate expired {abs(days_until_expiry)} days ago.',
+                    'recommendation': 'Renew the SSL certificate immediately.'
+                })
+            elif days_until_expiry < 30:
+                findings.append({
+                    'severity': SeverityEnum.MEDIUM,
+                    'title': 'SSL certificate expiring soon',
+                    'description': f'The SSL certificate will expire in {days_until_expiry} days.',
+                    'recommendation': 'Renew the SSL certificate before it expires.'
+                })
+            else:
+                findings.append({
+                    'severity': SeverityEnum.INFO,
+                    'title': 'Valid SSL certificate',
+                    'description': f'SSL certificate is valid for {days_until_expiry} more days.',
+                    'recommendation': None
+                })
+
+            # Check protocol version
+            version = probe.version
+            if version in ['TLSv1', 'TLSv1.1', 'SSLv2', 'SSLv3']:
+                findings.append({
+                    'severity': SeverityEnum.HIGH,
+                    'title': 'Outdated SSL/TLS protocol',
+                    'description': f'The server supports {version} which has known vulnerabilities.',
+                    'recommendation': 'Disable old protocols and use TLS 1.2 or higher.'
+                })
+            else:
+                findings.append({
+                    'severity': SeverityEnum.INFO,
+                    'title': f'Using {version}',
+                    'description': f'The connection uses {version} protocol.',
+                    'recommendation': None
+                })
 
         except ssl.SSLError as e:
+            OUTBOUND_ERRORS.inc(kind='tls', error=type(e).__name__)
             findings.append({
                 'severity': SeverityEnum.CRITICAL,
                 'title': 'SSL/TLS error',
@@ -210,13 +348,23 @@ class SecurityScanner:
                 'recommendation': 'Check the SSL certificate configuration.'
             })
         except socket.gaierror:
+            OUTBOUND_ERRORS.inc(kind='dns', error='gaierror')
             findings.append({
                 'severity': SeverityEnum.HIGH,
                 'title': 'Unable to resolve hostname',
                 'description': f'Could not resolve hostname: {self.parsed_url.hostname}',
                 'recommendation': 'Verify the domain name is correct and DNS is configured.'
             })
+        except asyncio.TimeoutError:
+            OUTBOUND_ERRORS.inc(kind='tls', error='TimeoutError')
+            findings.append({
+                'severity': SeverityEnum.HIGH,
+                'title': 'SSL/TLS handshake timed out',
+                'description': f'The TLS handshake with {self.parsed_url.hostname} did not complete in time.',
+                'recommendation': 'Verify the server is reachable and accepting TLS connections.'
+            })
         except Exception as e:
+            OUTBOUND_ERRORS.inc(kind='tls', error=type(e).__name__)
             findings.append({
                 'severity': SeverityEnum.MEDIUM,
                 'title': 'Error during SSL scan',
@@ -226,17 +374,123 @@ class SecurityScanner:
 
         return findings
 
+    async def scan_ports(self) -> List[Dict[str, Any]]:
+        """Check for open TCP ports (connect scan of the configured profile)"""
+        findings = []
+        hostname = self.parsed_url.hostname
+
+        try:
+            ports = ports_for_profile(
+                settings.PORT_SCAN_PROFILE, settings.PORT_SCAN_CUSTOM_PORTS)
+            result = await scan_ports(hostname, ports)
+        except ValueError as e:
+            # A misconfigured profile must not fail the other checks of the scan
+            return [{
+                'severity': SeverityEnum.MEDIUM,
+                'title': 'Error during port scan',
+                'description': f'The port scan is misconfigured: {str(e)}',
+                'recommendation': 'Check PORT_SCAN_PROFILE and PORT_SCAN_CUSTOM_PORTS.'
+            }]
+        except socket.gaierror:
+            OUTBOUND_ERRORS.inc(kind='dns', error='gaierror')
+            return [{
+                'severity': SeverityEnum.HIGH,
+                'title': 'Unable to resolve hostname',
+                'description': f'Could not resolve hostname: {hostname}',
+                'recommendation': 'Verify the domain name is correct and DNS is configured.'
+            }]
+
+        counts = {state: result.count(state) for state in (OPEN, CLOSED, FILTERED)}
+        for state, count in counts.items():
+            PORT_PROBES.inc(count, state=state)
+        self.timings.setdefault('ports', {}).update(
+            result.timings, ports_scanned=len(ports), **counts)
+
+        for port in result.open_ports:
+            banner = f' It identifies itself as: {port.banner}' if port.banner else ''
+            if port.port in EXPOSED_SERVICES:
+                service, severity, reason = EXPOSED_SERVICES[port.port]
+                findings.append({
+                    'severity': severity,
+                    'title': f'{service} port {port.port} open',
+                    'description': f'Port {port.port} ({service}) accepts connections. {reason}{banner}',
+                    'recommendation': f'Close port {port.port} or restrict it to trusted addresses with a firewall.'
+                })
+            elif port.port in WEB_PORTS:
+                findings.append({
+                    'severity': SeverityEnum.INFO,
+                    'title': f'Web port {port.port} open',
+                    'description': f'Port {port.port} accepts connections.{banner}',
+                    'recommendation': None
+                })
+            else:
+                findings.append({
+                    'severity': SeverityEnum.LOW,
+                    'title': f'Port {port.port} open',
+                    'description': f'Port {port.port} accepts connections.{banner}',
+                    'recommendation': 'Verify that this service needs to be reachable and close the port otherwise.'
+                })
+
+        findings.append({
+            'severity': SeverityEnum.INFO,
+            'title': 'Port scan summary',
+            'description': (
+                f'{counts[OPEN]} open, {counts[CLOSED]} closed and {counts[FILTERED]} '
+                f'filtered of {len(ports)} TCP ports scanned on {result.address}.'),
+            'recommendation': None
+        })
+        return findings
+
+    def _timeout_finding(self, check: str, timeout: float) -> Dict[str, Any]:
+        """Build the finding reported when a check exceeds its time budget"""
+        return {
+            'severity': SeverityEnum.MEDIUM,
+            'title': f'{check.upper()} check timed out',
+            'description': f'The {check} check did not finish within {timeout:g} seconds.',
+            'recommendation': 'Verify the server is responsive and try again.'
+        }
+
+    async def _run_check(self, check: str) -> List[Dict[str, Any]]:
+        """Run a single check within its own time budget"""
+        scan_check = getattr(self, f'scan_{check}')
+        started = time.perf_counter()
+        outcome = 'cancelled'  # the scan's total budget ran out
+        try:
+            findings = await asyncio.wait_for(scan_check(), timeout=self.check_timeout)
+            outcome = 'completed'
+            return findings
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            return [self._timeout_finding(check, self.check_timeout)]
+        finally:
+            elapsed = time.perf_counter() - started
+            SCAN_CHECK_DURATION.observe(elapsed, check=check, outcome=outcome)
+            self.timings.setdefault(check, {}).update(
+                wall_ms=_ms(elapsed), outcome=outcome)
+
     async def perform_scan(self, scan_type: str) -> List[Dict[str, Any]]:
         """Perform the complete scan based on type"""
-        all_findings = []
-
-        if scan_type in ['basic', 'full']:
-            all_findings.extend(await self.scan_https())
+        tasks = {
+            check: asyncio.create_task(self._run_check(check))
+            for check, scan_types in self.CHECKS.items()
+            if scan_type in scan_types
+        }
+        if not tasks:
+            return []
 
-        if scan_type in ['headers', 'full']:
-            all_findings.extend(await self.scan_headers())
+        # Wait for every check, bounded by the budget for the whole scan
+        _, pending = await asyncio.wait(tasks.values(), timeout=self.total_timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
 
-        if scan_type in ['ssl', 'full']:
-            all_findings.extend(await self.scan_ssl())
+        # Collect in the fixed CHECKS order, regardless of completion order
+        all_findings = []
+        for check, task in tasks.items():
+            if task in pending:
+                all_findings.append(
+                    self._timeout_finding(check, self.total_timeout))
+            else:
+                all_findings.extend(task.result())
 
         return all_findings
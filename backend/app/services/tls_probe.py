@@ -0,0 +1,181 @@
+"""
+TLS probe engine
+Collects certificate and handshake details without blocking the event loop
+"""
+
+import asyncio
+import socket
+import ssl
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple, Union
+
+from app.core.config import settings
+
+ALPN_PROTOCOLS = ['h2', 'http/1.1']
+
+
+def create_probe_context() -> ssl.SSLContext:
+    """Create the verifying SSL context used for probes"""
+    context = ssl.create_default_context()
+    context.set_alpn_protocols(ALPN_PROTOCOLS)
+    return context
+
+
+# Loading the CA bundle is expensive, so one context is shared by every probe
+_default_context: Optional[ssl.SSLContext] = None
+
+
+def get_probe_context() -> ssl.SSLContext:
+    """Get the shared probe context, creating it on first use"""
+    global _default_context
+    if _default_context is None:
+        _default_context = create_probe_context()
+    return _default_context
+
+
+@dataclass
+class TLSProbeResult:
+    """Details collected from a single TLS handshake"""
+    hostname: str
+    port: int
+    address: str
+    certificate: Dict[str, Any]
+    version: Optional[str]
+    cipher: Optional[Tuple[str, str, int]]
+    alpn_protocol: Optional[str]
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def _result_from_ssl_object(
+    ssl_object: Union[ssl.SSLObject, ssl.SSLSocket],
+    hostname: str,
+    port: int,
+    address: str,
+    timings: Dict[str, float]
+) -> TLSProbeResult:
+    return TLSProbeResult(
+        hostname=hostname,
+        port=port,
+        address=address,
+        certificate=ssl_object.getpeercert() or {},
+        version=ssl_object.version(),
+        cipher=ssl_object.cipher(),
+        alpn_protocol=ssl_object.selected_alpn_protocol(),
+        timings=timings
+    )
+
+
+async def _probe_with_streams(
+    hostname: str,
+    port: int,
+    timeout: float,
+    context: ssl.SSLContext
+) -> TLSProbeResult:
+    """Probe using asyncio streams, upgrading the TCP connection to TLS"""
+    loop = asyncio.get_running_loop()
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    addresses = await loop.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)
+    timings['dns_ms'] = _elapsed_ms(start)
+
+    # Try each resolved address until one accepts the connection
+    last_error: Optional[OSError] = None
+    for _, _, _, _, sockaddr in addresses:
+        start = time.perf_counter()
+        try:
+            _, writer = await asyncio.open_connection(sockaddr[0], port)
+        except OSError as e:
+            last_error = e
+            continue
+        timings['connect_ms'] = _elapsed_ms(start)
+        break
+    else:
+        raise last_error or OSError(f"No addresses found for {hostname}")
+
+    transport = writer.transport
+    try:
+        start = time.perf_counter()
+        transport = await loop.start_tls(
+            transport,
+            transport.get_protocol(),
+            context,
+            server_hostname=hostname,
+            ssl_handshake_timeout=timeout
+        )
+        timings['tls_handshake_ms'] = _elapsed_ms(start)
+
+        ssl_object = transport.get_extra_info('ssl_object')
+        return _result_from_ssl_object(
+            ssl_object, hostname, port, sockaddr[0], timings)
+    finally:
+        transport.close()
+
+
+def _probe_blocking(
+    hostname: str,
+    port: int,
+    timeout: float,
+    context: ssl.SSLContext
+) -> TLSProbeResult:
+    """Probe using blocking sockets (runs in a worker thread)"""
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    addresses = socket.getaddrinfo(hostname, port, type=socket.SOCK_STREAM)
+    timings['dns_ms'] = _elapsed_ms(start)
+    address = addresses[0][4][0]
+
+    start = time.perf_counter()
+    with socket.create_connection((address, port), timeout=timeout) as sock:
+        timings['connect_ms'] = _elapsed_ms(start)
+
+        start = time.perf_counter()
+        with context.wrap_socket(sock, server_hostname=hostname) as ssock:
+            timings['tls_handshake_ms'] = _elapsed_ms(start)
+            return _result_from_ssl_object(
+                ssock, hostname, port, address, timings)
+
+
+async def probe_tls(
+    hostname: str,
+    port: int = 443,
+    timeout: Optional[float] = None,
+    context: Optional[ssl.SSLContext] = None
+) -> TLSProbeResult:
+    """
+    Perform a TLS handshake with a host and collect its details.
+
+    The certificate, negotiated version, cipher and ALPN protocol all come
+    from the same connection. Event loops that cannot upgrade a connection
+    to TLS fall back to a blocking probe in the default thread pool.
+
+    Args:
+        hostname: Host to connect to (also used for SNI and verification)
+        port: TCP port
+        timeout: Budget for the whole probe, in seconds
+        context: SSL context to use instead of the shared default
+
+    Returns:
+        Handshake details
+
+    Raises:
+        asyncio.TimeoutError: If the probe exceeds its budget
+        ssl.SSLError: If the handshake or verification fails
+        OSError: If the host cannot be resolved or reached
+    """
+    timeout = timeout or settings.TLS_PROBE_TIMEOUT_SECONDS
+    context = context or get_probe_context()
+
+    try:
+        return await asyncio.wait_for(
+            _probe_with_streams(hostname, port, timeout, context), timeout)
+    except NotImplementedError:
+        return await asyncio.wait_for(
+            asyncio.to_thread(_probe_blocking, hostname, port, timeout, context),
+            timeout)
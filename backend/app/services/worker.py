@@ -0,0 +1,179 @@
+"""
+Scan worker
+Claims queued scan jobs and executes them outside the API process
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+from typing import Callable, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine, engine
+from app.core.metrics import instrument_engine, start_metrics_server
+from app.models.scan import Scan, ScanStatus
+from app.models.scan_job import ScanJob
+from app.services import job_queue, scan_service
+from app.services.http_client import close_http_client
+
+logger = logging.getLogger(__name__)
+
+
+class ScanWorker:
+    """Runs claimed scan jobs concurrently on one event loop"""
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal
+    ):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = concurrency or settings.WORKER_CONCURRENCY
+        self.poll_interval = poll_interval or settings.WORKER_POLL_INTERVAL_SECONDS
+        self.session_factory = session_factory
+        self.stopping = asyncio.Event()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def stop(self) -> None:
+        """Stop claiming new jobs; running jobs are allowed to finish"""
+        self.stopping.set()
+
+    async def claim_jobs(self) -> int:
+        """Claim jobs until the worker is at capacity. Returns the number claimed."""
+        claimed = 0
+        async with self.session_factory() as db:
+            await db.run_sync(job_queue.recover_abandoned_jobs)
+            while len(self._tasks) < self.concurrency:
+                job = await db.run_sync(job_queue.claim_next_job, self.worker_id)
+                if job is None:
+                    break
+                jobs = [job]
+                if settings.SCAN_COALESCE_ENABLED:
+                    # Identical scans share one set of probes in this process,
+                    # so they are taken along even past the concurrency limit
+                    jobs += await db.run_sync(
+                        job_queue.claim_same_target_jobs, self.worker_id, job.scan_id)
+                for job in jobs:
+                    self._start(job)
+                claimed += len(jobs)
+        return claimed
+
+    def _start(self, job: ScanJob) -> None:
+        task = asyncio.create_task(self.process_job(job.id, job.scan_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run(self) -> None:
+        """Poll for jobs until stopped, then wait for running jobs"""
+        logger.info("Worker %s started", self.worker_id)
+
+        while not self.stopping.is_set():
+            await self.claim_jobs()
+
+            # Wake up when a slot frees, the poll interval passes or we are stopped
+            waiters = set(self._tasks)
+            stop_waiter = asyncio.create_task(self.stopping.wait())
+            waiters.add(stop_waiter)
+            await asyncio.wait(
+                waiters,
+                timeout=self.poll_interval,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            stop_waiter.cancel()
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info("Worker %s stopped", self.worker_id)
+
+    async def process_job(self, job_id: int, scan_id: int) -> None:
+        """
+        Execute one claimed job in its own database session.
+
+        If the worker loses the lease, another worker may already have
+        claimed the job again, so the scan is cancelled rather than left to
+        store a second set of findings.
+        """
+        db = self.session_factory()
+        scan_task = asyncio.create_task(scan_service.execute_scan(db, scan_id))
+        heartbeat = asyncio.create_task(self._keep_lease(job_id, scan_task))
+        try:
+            await scan_task
+            await db.run_sync(job_queue.complete_job, job_id, self.worker_id)
+
+        except asyncio.CancelledError:
+            if not scan_task.cancelled() or not heartbeat.done():
+                raise
+            # Lost the lease: the job belongs to whichever worker holds it now
+            logger.warning("Cancelled scan %s of job %s after losing its lease",
+                           scan_id, job_id)
+            await db.rollback()
+
+        except Exception as e:
+            logger.exception("Job %s for scan %s failed", job_id, scan_id)
+            await db.rollback()
+
+            # execute_scan records scan errors itself; only retry jobs whose
+            # scan never reached a final state (e.g. a database error)
+            scan = await db.get(Scan, scan_id, populate_existing=True)
+            retry = scan is not None and scan.status not in (
+                ScanStatus.COMPLETED, ScanStatus.FAILED)
+            await db.run_sync(
+                job_queue.fail_job, job_id, self.worker_id, str(e), retry=retry)
+
+        finally:
+            heartbeat.cancel()
+            await db.close()
+
+    async def _keep_lease(self, job_id: int, scan_task: asyncio.Task) -> None:
+        """Renew the job lease until cancelled; cancel ``scan_task`` if it is lost"""
+        interval = max(settings.SCAN_JOB_LEASE_SECONDS / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            async with self.session_factory() as db:
+                renewed = await db.run_sync(job_queue.renew_lease, job_id, self.worker_id)
+            if not renewed:
+                # Finishes in the same step, so process_job sees it done
+                logger.warning("Worker %s lost the lease on job %s",
+                               self.worker_id, job_id)
+                scan_task.cancel()
+                return
+
+
+def run_worker(concurrency: Optional[int] = None, metrics_port: Optional[int] = None) -> None:
+    """Process entry point: run one worker until SIGINT/SIGTERM"""
+    logging.basicConfig(
+        level=settings.LOG_LEVEL,
+        format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+
+    # Never reuse connections inherited from a parent process
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+    if metrics_port:
+        start_metrics_server(metrics_port)
+        logger.info("Serving metrics on port %s", metrics_port)
+
+    async def main():
+        worker = ScanWorker(concurrency=concurrency)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, worker.stop)
+            except NotImplementedError:  # Windows
+                pass
+        try:
+            await worker.run()
+        finally:
+            await close_http_client()
+            await async_engine.dispose()
+
+    asyncio.run(main())
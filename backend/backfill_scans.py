@@ -0,0 +1,30 @@
+"""
+Scan backfill script
+Fills derived columns on scans created before those columns existed:
+severity counters, score and risk level, and the normalized domain.
+The schema is upgraded first, so the columns exist on older databases.
+"""
+
+from app.core.database import SessionLocal
+from app.core.migrations import upgrade_database
+from app.services.scan_service import backfill_scan_summaries, backfill_scan_domains
+
+
+def backfill():
+    """Backfill derived columns for all scans"""
+    print("Applying database migrations...")
+    upgrade_database()
+
+    db = SessionLocal()
+    try:
+        print("Backfilling scan summaries...")
+        print(f"✅ {backfill_scan_summaries(db)} scans updated")
+
+        print("Backfilling scan domains...")
+        print(f"✅ {backfill_scan_domains(db)} scans updated")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill()
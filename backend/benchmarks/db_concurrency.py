@@ -0,0 +1,162 @@
+"""
+Database concurrency benchmark
+Fires concurrent read-heavy requests and measures how they affect other requests
+
+Usage:
+    python benchmarks/db_concurrency.py --requests 200 --concurrency 20
+    python benchmarks/db_concurrency.py --blocking   # queries on the event loop, for comparison
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+ENDPOINTS = (
+    "/api/v1/stats/user",
+    "/api/v1/scans/?limit=200",
+    "/api/v1/stats/site/bench-0.example.com",
+)
+
+
+def percentile(samples, pct):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100)[pct - 1]
+
+
+class BlockingSession:
+    """
+    Async session interface over a synchronous session.
+
+    Every query runs on the event loop thread, which is how request handlers
+    used the database before they had async sessions.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def execute(self, *args, **kwargs):
+        return self.session.execute(*args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return self.session.get(*args, **kwargs)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.session, *args, **kwargs)
+
+
+def seed(scans, findings_per_scan):
+    """Create one user with many finished scans; returns the user's token"""
+    from sqlalchemy import insert
+
+    from app.core.database import SessionLocal
+    from app.models.scan import Scan, ScanStatus, ScanType
+    from app.models.user import User
+    from app.models.vulnerability import Vulnerability, Severity
+    from app.security.jwt import create_access_token
+    from app.services.report_service import scan_summary_values
+
+    with SessionLocal() as db:
+        user = User(email="bench@example.com", hashed_password="unused", is_active=True)
+        db.add(user)
+        db.commit()
+
+        severities = list(Severity)
+        for i in range(scans):
+            counts = {}
+            for j in range(findings_per_scan):
+                severity = severities[j % len(severities)].value
+                counts[severity] = counts.get(severity, 0) + 1
+            scan = Scan(user_id=user.id, target_url=f"https://bench-{i % 20}.example.com",
+                        scan_type=ScanType.FULL, status=ScanStatus.COMPLETED,
+                        **scan_summary_values(counts))
+            db.add(scan)
+            db.flush()
+            db.execute(insert(Vulnerability), [
+                {'scan_id': scan.id, 'severity': severities[j % len(severities)],
+                 'title': f"Finding {j}", 'description': "Benchmark finding"}
+                for j in range(findings_per_scan)
+            ])
+        db.commit()
+        return create_access_token(data={"email": user.email, "user_id": user.id})
+
+
+async def run(args, token):
+    import httpx
+
+    from main import app
+    from app.core.database import SessionLocal, get_db
+
+    if args.blocking:
+        async def blocking_db():
+            with SessionLocal() as session:
+                yield BlockingSession(session)
+        app.dependency_overrides[get_db] = blocking_db
+
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(args.concurrency)
+        statuses = {}
+
+        async def fetch(i):
+            async with semaphore:
+                response = await client.get(ENDPOINTS[i % len(ENDPOINTS)], headers=headers)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        probe_latencies = []
+        done = asyncio.Event()
+
+        async def probe():
+            # A tick every 10ms throughout the burst. Latency counts from when
+            # the tick was due, so a blocked loop shows up.
+            while not done.is_set():
+                due = time.perf_counter() + 0.01
+                await asyncio.sleep(0.01)
+                probe_latencies.append((time.perf_counter() - due) * 1000)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    print(f"mode:            {'blocking sessions' if args.blocking else 'async sessions'}")
+    print(f"requests:        {args.requests} in {elapsed:.2f}s ({args.requests / elapsed:.1f}/s)")
+    print(f"status codes:    {dict(sorted(statuses.items()))}")
+    print(f"loop lag p50:    {percentile(probe_latencies, 50):.1f} ms")
+    print(f"loop lag p99:    {percentile(probe_latencies, 99):.1f} ms")
+    print(f"loop lag max:    {max(probe_latencies, default=0):.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scans", type=int, default=500)
+    parser.add_argument("--findings", type=int, default=20, help="findings per scan")
+    parser.add_argument("--blocking", action="store_true",
+                        help="run queries on the event loop instead of async sessions")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/benchmark.db"
+        os.environ["ENVIRONMENT"] = "benchmark"
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+        os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+        import main  # noqa: F401  (creates the tables)
+        token = seed(args.scans, args.findings)
+        asyncio.run(run(args, token))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Login throughput benchmark
+Fires concurrent logins and measures how they affect other requests
+
+Usage:
+    python benchmarks/login_throughput.py --logins 100 --concurrency 20
+    python benchmarks/login_throughput.py --inline   # hash on the event loop, for comparison
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def percentile(samples, pct):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100)[pct - 1]
+
+
+async def run(args):
+    import httpx
+
+    from main import app
+    from app.api import auth
+    from app.security.password import shutdown_password_hasher, verify_password
+
+    if args.inline:
+        async def verify_inline(plain_password, hashed_password):
+            return verify_password(plain_password, hashed_password)
+        auth.verify_password_async = verify_inline
+
+    credentials = {"email": "bench@example.com", "password": "benchmark-password"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/v1/auth/register", json=credentials)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        statuses = {}
+
+        async def login():
+            async with semaphore:
+                response = await client.post("/api/v1/auth/login", json=credentials)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        probe_latencies = []
+        done = asyncio.Event()
+
+        async def probe():
+            # A cheap request every 10ms throughout the burst. Latency counts
+            # from when the request was due, so a blocked loop shows up.
+            while not done.is_set():
+                due = time.perf_counter() + 0.01
+                await asyncio.sleep(0.01)
+                await client.get("/health")
+                probe_latencies.append((time.perf_counter() - due) * 1000)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    shutdown_password_hasher()
+
+    print(f"mode:            {'inline' if args.inline else 'thread pool'}")
+    print(f"logins:          {args.logins} in {elapsed:.2f}s ({args.logins / elapsed:.1f}/s)")
+    print(f"status codes:    {dict(sorted(statuses.items()))}")
+    print(f"/health samples: {len(probe_latencies)}")
+    print(f"/health p50:     {percentile(probe_latencies, 50):.1f} ms")
+    print(f"/health p99:     {percentile(probe_latencies, 99):.1f} ms")
+    print(f"/health max:     {max(probe_latencies, default=0):.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--inline", action="store_true",
+                        help="verify passwords on the event loop instead of the pool")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/benchmark.db"
+        os.environ["ENVIRONMENT"] = "benchmark"
+        os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Port scan benchmark
+Scans a farm of local listeners and reports how long each concurrency level takes
+
+Usage:
+    python benchmarks/port_scan.py --listeners 200 --closed 300
+    python benchmarks/port_scan.py --per-host 1 10 100 --no-banners
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BANNERS = (b"SSH-2.0-OpenSSH_9.6\r\n", b"220 mail.example.com ESMTP\r\n", b"")
+
+
+async def start_farm(count):
+    """Listeners on random local ports; a third of them greet like SSH or SMTP"""
+    servers = []
+
+    for i in range(count):
+        banner = BANNERS[i % len(BANNERS)]
+
+        async def handle(reader, writer, banner=banner):
+            if banner:
+                writer.write(banner)
+                await writer.drain()
+            await reader.read()
+            writer.close()
+
+        servers.append(await asyncio.start_server(handle, "127.0.0.1", 0))
+    return servers
+
+
+def free_ports(count, taken):
+    """Ports nothing listens on, to be reported as closed"""
+    ports = []
+    sockets = []
+    while len(ports) < count:
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        sockets.append(sock)
+        port = sock.getsockname()[1]
+        if port not in taken:
+            ports.append(port)
+    for sock in sockets:
+        sock.close()
+    return ports
+
+
+async def run(args):
+    from app.services.port_scanner import CLOSED, OPEN, scan_ports
+
+    servers = await start_farm(args.listeners)
+    open_ports = [server.sockets[0].getsockname()[1] for server in servers]
+    ports = sorted(open_ports + free_ports(args.closed, set(open_ports)))
+
+    print(f"ports per scan: {len(ports)} ({len(open_ports)} listening)")
+    print(f"banners:        {'off' if args.no_banners else 'on'}")
+    print(f"{'per host':>9} {'seconds':>9} {'ports/s':>9} {'open':>6} {'closed':>7}")
+    try:
+        for limit in args.per_host:
+            started = time.perf_counter()
+            result = await scan_ports(
+                "127.0.0.1", ports, per_host_limit=limit, grab_banners=not args.no_banners)
+            elapsed = time.perf_counter() - started
+            print(f"{limit:>9} {elapsed:>9.3f} {len(ports) / elapsed:>9.0f} "
+                  f"{result.count(OPEN):>6} {result.count(CLOSED):>7}")
+    finally:
+        for server in servers:
+            server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--listeners", type=int, default=200)
+    parser.add_argument("--closed", type=int, default=300, help="ports with no listener")
+    parser.add_argument("--per-host", type=int, nargs="+", default=[1, 10, 100],
+                        help="per-host concurrency levels to compare")
+    parser.add_argument("--no-banners", action="store_true")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ["PORT_SCAN_CONCURRENCY"] = str(max(args.per_host))
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,20 @@
 """
 Database initialization script
-Creates all tables and optionally seeds initial data
+Creates or upgrades all tables by applying the migrations
 """
 
-from app.core.database import engine, Base
-from app.models.user import User
-from app.models.scan import Scan
-from app.models.vulnerability import Vulnerability
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.core.database import Base
+from app.core.migrations import upgrade_database
 
 
 def init_db():
-    """Create all database tables"""
-    print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully!")
-    print("  - users")
-    print("  - scans")
-    print("  - vulnerabilities")
+    """Apply all database migrations"""
+    print("Applying database migrations...")
+    upgrade_database()
+    print("✅ Database is up to date!")
+    for table in Base.metadata.sorted_tables:
+        print(f"  - {table.name}")
 
 
 if __name__ == "__main__":
@@ -3,19 +3,47 @@ SecureCheck Backend - Main Entry Point
 FastAPI application setup and configuration
 """
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api import auth, scans, reports
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import engine, async_engine, get_db
+from app.core.migrations import upgrade_database
+from app.core.metrics import MetricsMiddleware, instrument_engine
+from app.api import auth, scans, reports, metrics
+from app.services.http_client import get_http_client, close_http_client
+from app.security.password import shutdown_password_hasher
+from app.security.rate_limit import RateLimitMiddleware, get_rate_limit_backend
 
 # Load environment variables
 load_dotenv()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Apply database migrations (run `alembic upgrade head` instead when
+# DATABASE_AUTO_MIGRATE is disabled)
+if settings.DATABASE_AUTO_MIGRATE:
+    upgrade_database()
+
+# Record connection pool usage
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources on startup and release them on shutdown"""
+    get_http_client()
+    yield
+    await close_http_client()
+    await get_rate_limit_backend().close()
+    shutdown_password_hasher()
+    await async_engine.dispose()
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -23,9 +51,13 @@ app = FastAPI(
     description="Plataforma de análisis de seguridad básica para pequeñas empresas",
     version=settings.VERSION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
+# Rate limiting (added first so CORS headers are also set on 429 responses)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
@@ -33,8 +65,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After",
+                    "X-RateLimit-Limit", "X-RateLimit-Remaining"],
 )
 
+# Request timing (outermost, so it covers everything above)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(
     auth.router,
@@ -54,6 +91,8 @@ app.include_router(
     tags=["Reports & Statistics"]
 )
 
+app.include_router(metrics.router)
+
 
 @app.get("/")
 async def root():
@@ -66,12 +105,18 @@ async def root():
 
 
 @app.get("/health")
-async def health_check():
+async def health_check(db: AsyncSession = Depends(get_db)):
     """Detailed health check"""
+    try:
+        await db.execute(text("SELECT 1"))
+        database = "connected"
+    except Exception:
+        database = "unavailable"
+
     return {
-        "status": "healthy",
+        "status": "healthy" if database == "connected" else "degraded",
         "environment": settings.ENVIRONMENT,
-        "database": "connected",
+        "database": database,
         "api_version": settings.VERSION
     }
 
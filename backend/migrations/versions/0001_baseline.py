@@ -0,0 +1,76 @@
+"""
+Baseline schema: users, scans and vulnerabilities
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases created with create_all before migrations existed are stamped
+with this revision and brought up to date by the following ones.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+SCAN_TYPES = ('BASIC', 'HEADERS', 'SSL', 'FULL')
+SCAN_STATUSES = ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED')
+SEVERITIES = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'INFO')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=True),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('is_superuser', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'scans',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(),
+                  sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('target_url', sa.String(500), nullable=False),
+        sa.Column('scan_type', sa.Enum(*SCAN_TYPES, name='scantype'), nullable=False),
+        sa.Column('status', sa.Enum(*SCAN_STATUSES, name='scanstatus'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.func.now(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_scans_id', 'scans', ['id'])
+
+    op.create_table(
+        'vulnerabilities',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('scan_id', sa.Integer(),
+                  sa.ForeignKey('scans.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('severity', sa.Enum(*SEVERITIES, name='severity'), nullable=False),
+        sa.Column('title', sa.String(200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('recommendation', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_vulnerabilities_id', 'vulnerabilities', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('vulnerabilities')
+    op.drop_table('scans')
+    op.drop_table('users')
+    sa.Enum(name='severity').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='scanstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='scantype').drop(op.get_bind(), checkfirst=True)
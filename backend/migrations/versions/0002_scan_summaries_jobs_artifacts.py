@@ -0,0 +1,110 @@
+"""
+Scan summaries, normalized domain, timings, job queue and report artifacts
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Everything added to the schema since the baseline. Databases created with
+create_all may already have some of it, so each object is only created
+when it is missing. Summary columns of existing scans are filled in by
+backfill_scans.py.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+JOB_STATUSES = ('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED')
+
+# Nullable columns added to scans
+SCAN_COLUMNS = (
+    ('domain', sa.String(255)),
+    ('vulnerability_count', sa.Integer()),
+    ('critical_count', sa.Integer()),
+    ('high_count', sa.Integer()),
+    ('medium_count', sa.Integer()),
+    ('low_count', sa.Integer()),
+    ('info_count', sa.Integer()),
+    ('security_score', sa.Integer()),
+    ('risk_level', sa.String(20)),
+    ('timings', sa.JSON()),
+)
+
+SCAN_INDEXES = {
+    'ix_scans_user_created': ['user_id', 'created_at', 'id'],
+    'ix_scans_user_status_created': ['user_id', 'status', 'created_at', 'id'],
+    'ix_scans_user_domain_created': ['user_id', 'domain', 'created_at'],
+}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    existing = {column['name'] for column in inspector.get_columns('scans')}
+    for name, type_ in SCAN_COLUMNS:
+        if name not in existing:
+            op.add_column('scans', sa.Column(name, type_, nullable=True))
+
+    indexes = {index['name'] for index in inspector.get_indexes('scans')}
+    for name, columns in SCAN_INDEXES.items():
+        if name not in indexes:
+            op.create_index(name, 'scans', columns)
+
+    if 'scan_jobs' not in tables:
+        op.create_table(
+            'scan_jobs',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('scan_id', sa.Integer(),
+                      sa.ForeignKey('scans.id', ondelete='CASCADE'),
+                      nullable=False, unique=True),
+            sa.Column('status', sa.Enum(*JOB_STATUSES, name='jobstatus'), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('max_attempts', sa.Integer(), nullable=False),
+            sa.Column('run_after', sa.DateTime(timezone=True),
+                      server_default=sa.func.now(), nullable=False),
+            sa.Column('locked_by', sa.String(100), nullable=True),
+            sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True),
+                      server_default=sa.func.now(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index('ix_scan_jobs_id', 'scan_jobs', ['id'])
+        op.create_index('ix_scan_jobs_status_run_after', 'scan_jobs', ['status', 'run_after'])
+
+    if 'scan_artifacts' not in tables:
+        op.create_table(
+            'scan_artifacts',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('scan_id', sa.Integer(),
+                      sa.ForeignKey('scans.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('kind', sa.String(20), nullable=False),
+            sa.Column('encoding', sa.String(20), nullable=False),
+            sa.Column('sha256', sa.String(64), nullable=False),
+            sa.Column('size', sa.Integer(), nullable=False),
+            sa.Column('path', sa.String(255), nullable=True),
+            sa.Column('content', sa.LargeBinary(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True),
+                      server_default=sa.func.now(), nullable=False),
+            sa.UniqueConstraint('scan_id', 'kind', 'encoding',
+                                name='uq_scan_artifacts_scan_kind_encoding'),
+        )
+        op.create_index('ix_scan_artifacts_id', 'scan_artifacts', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_table('scan_artifacts')
+    op.drop_table('scan_jobs')
+    sa.Enum(name='jobstatus').drop(op.get_bind(), checkfirst=True)
+
+    for name in SCAN_INDEXES:
+        op.drop_index(name, table_name='scans')
+    with op.batch_alter_table('scans') as batch:
+        for name, _ in reversed(SCAN_COLUMNS):
+            batch.drop_column(name)
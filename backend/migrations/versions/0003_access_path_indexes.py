@@ -0,0 +1,40 @@
+"""
+Access-path indexes for findings and artifact files
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+vulnerabilities(scan_id, severity) serves every per-scan read of findings:
+exports, severity counts, the top critical recommendations and the join
+in user statistics. scan_artifacts(path) serves the check for files still
+referenced by other scans before one is deleted.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'vulnerabilities': {'ix_vulnerabilities_scan_severity': ['scan_id', 'severity']},
+    'scan_artifacts': {'ix_scan_artifacts_path': ['path']},
+}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, indexes in INDEXES.items():
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        for name, columns in indexes.items():
+            if name not in existing:
+                op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for table, indexes in INDEXES.items():
+        for name in indexes:
+            op.drop_index(name, table_name=table)
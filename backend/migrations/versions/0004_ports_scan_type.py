@@ -0,0 +1,29 @@
+"""
+Ports scan type
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Scan types are stored by name. Only PostgreSQL keeps them in a native enum
+type; elsewhere the column is a plain string and nothing changes.
+"""
+
+from alembic import op
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # New enum values cannot be used in the transaction that adds them
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE scantype ADD VALUE IF NOT EXISTS 'PORTS'")
+
+
+def downgrade() -> None:
+    # PostgreSQL cannot drop enum values; PORTS stays defined but unused
+    pass
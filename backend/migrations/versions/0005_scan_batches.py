@@ -0,0 +1,53 @@
+"""
+Scan batches
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+Adds the scan_batches table and the batch each scan was created by.
+Skips what a database created with create_all already has.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if 'scan_batches' not in inspector.get_table_names():
+        op.create_table(
+            'scan_batches',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(),
+                      sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('total', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True),
+                      server_default=sa.func.now(), nullable=False),
+        )
+        op.create_index('ix_scan_batches_id', 'scan_batches', ['id'])
+        op.create_index('ix_scan_batches_user_id', 'scan_batches', ['user_id'])
+
+    if 'batch_id' not in {column['name'] for column in inspector.get_columns('scans')}:
+        with op.batch_alter_table('scans') as batch:
+            batch.add_column(sa.Column('batch_id', sa.Integer(), nullable=True))
+            batch.create_foreign_key(
+                'fk_scans_batch_id', 'scan_batches', ['batch_id'], ['id'],
+                ondelete='SET NULL')
+
+    if 'ix_scans_batch_status' not in {index['name'] for index in inspector.get_indexes('scans')}:
+        op.create_index('ix_scans_batch_status', 'scans', ['batch_id', 'status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scans_batch_status', table_name='scans')
+    with op.batch_alter_table('scans') as batch:
+        batch.drop_constraint('fk_scans_batch_id', type_='foreignkey')
+        batch.drop_column('batch_id')
+    op.drop_table('scan_batches')
@@ -0,0 +1,30 @@
+"""
+Probe cache max age per scan
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+Adds the oldest cached probe result each scan may use.
+Skips what a database created with create_all already has.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    if 'probe_max_age' not in {column['name'] for column in inspector.get_columns('scans')}:
+        op.add_column('scans', sa.Column('probe_max_age', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('scans') as batch:
+        batch.drop_column('probe_max_age')
@@ -0,0 +1,35 @@
+"""
+Sub-second precision for scan creation times on SQLite
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+SQLite stores datetimes as text. Scans created before the application set
+created_at itself got the server default, CURRENT_TIMESTAMP, which has no
+fractional part ('2026-01-01 10:00:00'), while the application writes
+'2026-01-01 10:00:00.000000'. Text comparison ranks the short form before
+every long form of the same second, which breaks the (created_at, id)
+pagination cursor, so the short values are padded to the long form.
+Other databases store real timestamps and need nothing.
+"""
+
+from alembic import op
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "UPDATE scans SET created_at = created_at || '.000000' "
+        "WHERE length(created_at) = 19"
+    )
+
+
+def downgrade() -> None:
+    pass
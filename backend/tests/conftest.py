@@ -2,18 +2,27 @@
 Test configuration and fixtures
 """
 
+import os
+import tempfile
+
+# The sync and async engines must see the same database, so tests use a
+# temporary file rather than an in-memory database
+TEST_DB_DIR = tempfile.mkdtemp(prefix="securecheck-tests-")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_DIR}/test.db"
+os.environ["DATABASE_URL"] = SQLALCHEMY_DATABASE_URL
+
 from app.security.jwt import create_access_token
 from app.security.password import get_password_hash
 from app.models.user import User
-from app.core.database import Base, get_db
+from app.core.database import Base, async_database_url, engine, get_db
 from app.main import app
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from fastapi.testclient import TestClient
 import pytest
+import pytest_asyncio
 import sys
-import os
 from pathlib import Path
 
 # Add backend directory to Python path
@@ -21,16 +30,39 @@ backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
 
 
-# Create test database
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
+# Test database: the application's sync engine already points at it. Async
+# connections are not pooled, since every test runs on a new event loop.
 TestingSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(
+    async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty in-process caches"""
+    from app.security.jwt import clear_token_cache
+    from app.security.rate_limit import reset_rate_limits
+    from app.security.user_cache import user_cache
+    from app.services.probe_cache import probe_cache
+    from app.services.report_cache import report_cache
+    probe_cache.clear()
+    report_cache.clear()
+    user_cache.clear()
+    clear_token_cache()
+    reset_rate_limits()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def artifacts_dir(tmp_path, monkeypatch):
+    """Write report artifacts to a per-test directory"""
+    from app.core.config import settings
+    path = tmp_path / "artifacts"
+    monkeypatch.setattr(settings, "ARTIFACTS_DIR", str(path))
+    return path
 
 
 @pytest.fixture(scope="function")
@@ -45,14 +77,25 @@ def test_db():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def async_session_factory(test_db):
+    """Factory of async sessions on the test database"""
+    return TestingAsyncSessionLocal
+
+
+@pytest_asyncio.fixture
+async def async_db(test_db):
+    """Async session on the test database, as used by request handlers"""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 @pytest.fixture(scope="function")
 def client(test_db):
     """Create a test client"""
-    def override_get_db():
-        try:
-            yield test_db
-        finally:
-            test_db.close()
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
 
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as test_client:
@@ -76,5 +119,5 @@ def test_user(test_db):
 
 @pytest.fixture
 def test_user_token(test_user):
-    """Create an access token for the test user"""
-    return create_access_token(data={"sub": test_user.email})
+    """Create an access token for the test user, as /auth/login does"""
+    return create_access_token(data={"email": test_user.email, "user_id": test_user.id})
@@ -0,0 +1,133 @@
+"""
+Tests for report artifacts rendered at scan completion
+"""
+
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.models.scan_artifact import ScanArtifact
+from app.models.user import User
+from app.schemas.vulnerability import SeverityEnum
+from app.services import scan_service
+from app.services.artifact_service import generate_scan_artifacts
+from app.services.scanner import SecurityScanner
+
+
+async def _completed_scan(db: Session, async_db: AsyncSession, user: User, monkeypatch) -> Scan:
+    async def fake_scan(self, scan_type):
+        return [{
+            'severity': SeverityEnum.CRITICAL,
+            'title': "Exposed admin",
+            'description': "Admin panel reachable",
+            'recommendation': "Restrict access"
+        }]
+
+    monkeypatch.setattr(SecurityScanner, "perform_scan", fake_scan)
+    scan = Scan(user_id=user.id, target_url="https://artifact.example.com",
+                scan_type=ScanType.FULL, status=ScanStatus.PENDING)
+    db.add(scan)
+    db.commit()
+    await scan_service.execute_scan(async_db, scan.id)
+    return scan
+
+
+@pytest.mark.asyncio
+async def test_completed_scan_stores_artifacts(test_db: Session, async_db: AsyncSession, test_user: User, monkeypatch, artifacts_dir):
+    """JSON and CSV reports are written once, plain and gzipped, content-addressed"""
+    scan = await _completed_scan(test_db, async_db, test_user, monkeypatch)
+
+    artifacts = {
+        (a.kind, a.encoding): a
+        for a in test_db.query(ScanArtifact).filter(ScanArtifact.scan_id == scan.id)
+    }
+    assert set(artifacts) == {("json", "identity"), ("json", "gzip"),
+                              ("csv", "identity"), ("csv", "gzip")}
+
+    plain = artifacts[("json", "identity")]
+    assert plain.path.endswith(f"{plain.sha256}.json")
+    raw = (artifacts_dir / plain.path).read_bytes()
+    assert len(raw) == plain.size
+    assert json.loads(raw)["summary"]["severity_breakdown"]["critical"] == 1
+
+    packed = artifacts_dir / artifacts[("json", "gzip")].path
+    assert gzip.decompress(packed.read_bytes()) == raw
+
+
+@pytest.mark.asyncio
+async def test_exports_are_served_from_artifacts(client: TestClient, test_user_token: str, test_db: Session, async_db: AsyncSession, test_user: User, monkeypatch, artifacts_dir):
+    """Downloads send the stored files; the gzip variant goes to clients accepting it"""
+    scan = await _completed_scan(test_db, async_db, test_user, monkeypatch)
+    stored = test_db.query(ScanArtifact).filter(
+        ScanArtifact.scan_id == scan.id,
+        ScanArtifact.kind == "csv",
+        ScanArtifact.encoding == "identity"
+    ).one()
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+
+    plain = client.get(f"/api/v1/scans/{scan.id}/export/csv",
+                       headers={**headers, "Accept-Encoding": "identity"})
+    assert plain.status_code == 200
+    assert plain.content == (artifacts_dir / stored.path).read_bytes()
+    assert plain.headers["etag"] == f'"{stored.sha256}"'
+    assert "content-encoding" not in plain.headers
+
+    packed = client.get(f"/api/v1/scans/{scan.id}/export/csv",
+                        headers={**headers, "Accept-Encoding": "gzip"})
+    assert packed.headers["content-encoding"] == "gzip"
+    assert packed.content == plain.content  # decoded by the client
+
+    not_modified = client.get(
+        f"/api/v1/scans/{scan.id}/export/csv",
+        headers={**headers, "Accept-Encoding": "identity",
+                 "If-None-Match": plain.headers["etag"]})
+    assert not_modified.status_code == 304
+
+    report = client.get(f"/api/v1/scans/{scan.id}/report", headers=headers)
+    assert report.json()["recommendations"][-1] == "• Exposed admin: Restrict access"
+
+
+@pytest.mark.asyncio
+async def test_artifacts_in_database(client: TestClient, test_user_token: str, test_db: Session, async_db: AsyncSession, test_user: User, monkeypatch, artifacts_dir):
+    """With database storage the artifacts are blobs and no files are written"""
+    monkeypatch.setattr(settings, "ARTIFACTS_STORAGE", "database")
+    scan = await _completed_scan(test_db, async_db, test_user, monkeypatch)
+
+    assert not artifacts_dir.exists() or not any(artifacts_dir.rglob("*.json"))
+
+    response = client.get(
+        f"/api/v1/scans/{scan.id}/export/json",
+        headers={"Authorization": f"Bearer {test_user_token}",
+                 "Accept-Encoding": "identity"}
+    )
+    assert response.status_code == 200
+    assert response.json()["summary"]["scan_id"] == scan.id
+    assert "etag" in response.headers
+
+
+@pytest.mark.asyncio
+async def test_deleting_scan_removes_artifact_files(test_db: Session, async_db: AsyncSession, test_user: User, monkeypatch, artifacts_dir):
+    """Files no other artifact points to are removed with the scan"""
+    scan = await _completed_scan(test_db, async_db, test_user, monkeypatch)
+    paths = [a.path for a in test_db.query(ScanArtifact)]
+    assert all((artifacts_dir / p).is_file() for p in paths)
+
+    assert await scan_service.delete_scan(async_db, scan.id, test_user.id)
+    assert test_db.query(ScanArtifact).count() == 0
+    assert not any((artifacts_dir / p).exists() for p in paths)
+
+
+def test_unfinished_scan_has_no_artifacts(test_db: Session, test_user: User):
+    """Artifacts are only rendered for completed scans"""
+    scan = Scan(user_id=test_user.id, target_url="https://pending.example.com",
+                scan_type=ScanType.BASIC, status=ScanStatus.PENDING)
+    test_db.add(scan)
+    test_db.commit()
+
+    assert generate_scan_artifacts(test_db, scan.id) == []
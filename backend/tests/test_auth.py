@@ -131,3 +131,125 @@ def test_get_current_user_invalid_token(client):
     )
 
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_authenticated_user_is_cached(client, test_user_token, test_db, test_user):
+    """Repeated requests authenticate without querying the users table"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    from app.security.user_cache import user_cache
+
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Requests use their own async engine, so listen on every engine
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        response = client.get("/api/v1/auth/me", headers=headers)
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    assert response.json()["email"] == "test@example.com"
+    assert not any("FROM users" in s for s in statements)
+    assert user_cache.stats()["hits"] == 1
+
+
+def test_deactivated_user_is_rejected_immediately(client, test_user_token, test_db, test_user):
+    """Updating a user invalidates its cached entry"""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    assert client.get("/api/v1/auth/me", headers=headers).status_code == 200
+
+    from app.models.user import User
+
+    user = test_db.get(User, test_user.id)
+    user.is_active = False
+    test_db.commit()
+
+    response = client.get("/api/v1/auth/me", headers=headers)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_verified_token_is_cached(monkeypatch):
+    """A token is only verified once; rotating the secret drops the cache"""
+    from app.core.config import settings
+    from app.security import jwt as jwt_module
+
+    token = jwt_module.create_access_token(data={"email": "a@example.com", "user_id": 1})
+
+    calls = []
+    real_decode = jwt_module.jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(1)
+        return real_decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt_module.jwt, "decode", counting_decode)
+
+    assert jwt_module.decode_access_token(token)["user_id"] == 1
+    assert jwt_module.decode_access_token(token)["user_id"] == 1
+    assert len(calls) == 1
+
+    monkeypatch.setattr(settings, "SECRET_KEY", settings.SECRET_KEY + "-rotated")
+    assert jwt_module.decode_access_token(token) is None
+    assert len(calls) == 2
+
+
+def test_expired_token_is_not_cached():
+    """Expired tokens are rejected and never enter the cache"""
+    from datetime import timedelta
+
+    from app.security import jwt as jwt_module
+
+    token = jwt_module.create_access_token(
+        data={"email": "a@example.com", "user_id": 1},
+        expires_delta=timedelta(seconds=-1))
+
+    assert jwt_module.decode_access_token(token) is None
+    assert len(jwt_module.token_cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_runs_off_the_event_loop():
+    """Other coroutines keep running while a password is verified"""
+    import asyncio
+
+    from app.security.password import get_password_hash, verify_password_async
+
+    hashed = get_password_hash("testpassword123")
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    try:
+        assert await verify_password_async("testpassword123", hashed)
+        assert not await verify_password_async("wrong-password", hashed)
+    finally:
+        task.cancel()
+
+    assert ticks >= 5
+
+
+def test_login_when_hasher_is_saturated(client, test_user, monkeypatch):
+    """Logins beyond the hashing queue limit get a 503 with Retry-After"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 0)
+    response = client.post(
+        "/api/v1/auth/login",
+        json={"email": "test@example.com", "password": "testpassword123"}
+    )
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)
@@ -0,0 +1,190 @@
+"""
+Tests for batch scan creation
+"""
+
+import json
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.models.scan_batch import ScanBatch
+from app.models.scan_job import ScanJob
+from app.models.user import User
+from app.security.password import get_password_hash
+from app.services.batch_service import BatchTooLarge, read_ndjson_targets
+
+BATCH_URL = "/api/v1/scans/batch"
+
+
+def _auth(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_create_batch_json(client: TestClient, test_user_token: str, test_db: Session):
+    targets = [f"site-{i}.example.com" for i in range(50)]
+    inserts = []
+
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO scans"):
+            inserts.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", count_inserts)
+    try:
+        response = client.post(
+            BATCH_URL, headers=_auth(test_user_token),
+            json={"targets": targets, "scan_type": "headers", "force_fresh": True})
+    finally:
+        event.remove(Engine, "before_cursor_execute", count_inserts)
+
+    assert response.status_code == 201
+    data = response.json()
+    assert data["total"] == 50
+    assert len(inserts) == 1
+
+    scans = {scan.id: scan for scan in test_db.execute(select(Scan)).scalars()}
+    # IDs come back in the order the targets were sent, normalized like POST /scans
+    assert [scans[i].target_url for i in data["scan_ids"]] == [f"https://{t}" for t in targets]
+    assert {scan.batch_id for scan in scans.values()} == {data["batch_id"]}
+    assert {scan.scan_type for scan in scans.values()} == {ScanType.HEADERS}
+    assert scans[data["scan_ids"][0]].domain == "site-0.example.com"
+    assert {scan.probe_max_age for scan in scans.values()} == {0}
+
+
+def test_batch_jobs_are_released_in_waves(
+    client: TestClient, test_user_token: str, test_db: Session, monkeypatch
+):
+    monkeypatch.setattr(settings, "SCAN_BATCH_RELEASE_SIZE", 4)
+    monkeypatch.setattr(settings, "SCAN_BATCH_RELEASE_INTERVAL_SECONDS", 30)
+
+    response = client.post(
+        BATCH_URL, headers=_auth(test_user_token),
+        json={"targets": [f"site-{i}.example.com" for i in range(10)]})
+    scan_ids = response.json()["scan_ids"]
+
+    jobs = {job.scan_id: job for job in test_db.execute(select(ScanJob)).scalars()}
+    first = jobs[scan_ids[0]].run_after
+    offsets = [(jobs[scan_id].run_after - first) for scan_id in scan_ids]
+    assert offsets == [timedelta(seconds=30 * (i // 4)) for i in range(10)]
+
+
+def test_create_batch_ndjson(client: TestClient, test_user_token: str, test_db: Session):
+    body = "\n".join([
+        json.dumps("one.example.com"),
+        "",
+        json.dumps({"target_url": "http://two.example.com", "scan_type": "full"}),
+        json.dumps("three.example.com"),
+    ]) + "\n"
+
+    response = client.post(
+        f"{BATCH_URL}?scan_type=ssl", headers={
+            **_auth(test_user_token), "Content-Type": "application/x-ndjson"},
+        content=body.encode())
+
+    assert response.status_code == 201
+    scans = [test_db.get(Scan, scan_id) for scan_id in response.json()["scan_ids"]]
+    assert [(s.target_url, s.scan_type) for s in scans] == [
+        ("https://one.example.com", ScanType.SSL),
+        ("http://two.example.com", ScanType.FULL),
+        ("https://three.example.com", ScanType.SSL),
+    ]
+
+
+def test_invalid_targets_create_nothing(client: TestClient, test_user_token: str, test_db: Session):
+    response = client.post(
+        BATCH_URL, headers=_auth(test_user_token),
+        json={"targets": ["good.example.com", "x", "fine.example.com", "y" * 600]})
+
+    assert response.status_code == 422
+    locations = [error["loc"] for error in response.json()["detail"]]
+    assert locations == [["body", "targets", 1, "target_url"], ["body", "targets", 3, "target_url"]]
+    assert test_db.execute(select(Scan)).first() is None
+
+
+def test_ndjson_errors_give_line_numbers(client: TestClient, test_user_token: str, test_db: Session):
+    """Blank lines are skipped but still counted in error locations"""
+    body = b'"good.example.com"\n\n"x"\n{"target_url": "fine.example.com", "max_age": -1}\n'
+
+    response = client.post(
+        BATCH_URL, headers={
+            **_auth(test_user_token), "Content-Type": "application/x-ndjson"},
+        content=body)
+
+    assert response.status_code == 422
+    locations = [error["loc"] for error in response.json()["detail"]]
+    assert locations == [["body", 3, "target_url"], ["body", 4, "max_age"]]
+    assert test_db.execute(select(Scan)).first() is None
+
+
+def test_batch_limits(client: TestClient, test_user_token: str, monkeypatch):
+    monkeypatch.setattr(settings, "SCAN_BATCH_MAX_TARGETS", 3)
+    headers = _auth(test_user_token)
+
+    too_many = client.post(BATCH_URL, headers=headers, json={"targets": ["a.com"] * 4})
+    assert too_many.status_code == 413
+
+    malformed = client.post(
+        BATCH_URL, headers={**headers, "Content-Type": "application/x-ndjson"},
+        content=b'"a.com"\n{not json\n')
+    assert malformed.status_code == 400
+    assert "Line 2" in malformed.json()["detail"]
+
+    empty = client.post(BATCH_URL, headers=headers, json={"targets": []})
+    assert empty.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_ndjson_reader_stops_at_the_limit(monkeypatch):
+    """Oversized batches are rejected without reading the rest of the body"""
+    monkeypatch.setattr(settings, "SCAN_BATCH_MAX_TARGETS", 2)
+    consumed = []
+
+    async def body():
+        for chunk in (b'"a.com"\n"b', b'.com"\n"c.com"\n', b'"d.com"\n'):
+            consumed.append(chunk)
+            yield chunk
+
+    with pytest.raises(BatchTooLarge):
+        await read_ndjson_targets(body())
+    assert len(consumed) == 2
+
+
+def test_batch_status(client: TestClient, test_user_token: str, test_db: Session):
+    headers = _auth(test_user_token)
+    data = client.post(
+        BATCH_URL, headers=headers,
+        json={"targets": [f"site-{i}.example.com" for i in range(4)]}).json()
+
+    status = client.get(f"{BATCH_URL}/{data['batch_id']}", headers=headers).json()
+    assert (status["total"], status["pending"], status["progress"], status["done"]) == (4, 4, 0, False)
+
+    for scan_id, scan_status in zip(data["scan_ids"], (
+            ScanStatus.COMPLETED, ScanStatus.FAILED, ScanStatus.RUNNING)):
+        test_db.get(Scan, scan_id).status = scan_status
+    test_db.commit()
+
+    status = client.get(f"{BATCH_URL}/{data['batch_id']}", headers=headers).json()
+    assert {key: status[key] for key in ("pending", "running", "completed", "failed")} == {
+        "pending": 1, "running": 1, "completed": 1, "failed": 1}
+    assert status["progress"] == 0.5
+    assert status["done"] is False
+
+
+def test_batch_status_of_another_user(client: TestClient, test_user_token: str, test_db: Session):
+    other_user = User(
+        email="other@test.com",
+        hashed_password=get_password_hash("otherpassword1")
+    )
+    test_db.add(other_user)
+    test_db.commit()
+    batch = ScanBatch(user_id=other_user.id, total=0)
+    test_db.add(batch)
+    test_db.commit()
+
+    response = client.get(f"{BATCH_URL}/{batch.id}", headers=_auth(test_user_token))
+    assert response.status_code == 404
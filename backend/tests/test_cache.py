@@ -0,0 +1,111 @@
+"""
+Tests for the in-process LRU cache and call coalescing
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.cache import LRUCache, SingleFlight
+
+
+def test_least_recently_used_entry_is_evicted():
+    """Reading an entry protects it from eviction"""
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_size_cap():
+    """Entries are evicted to stay under max_bytes; oversized values are refused"""
+    cache = LRUCache(max_entries=10, max_bytes=100)
+    cache.set("a", b"x" * 60, size=60)
+    cache.set("b", b"x" * 60, size=60)
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 60
+
+    assert not cache.set("c", b"x" * 101, size=101)
+    assert cache.get("c") is None
+
+
+def test_entries_expire():
+    """Entries are dropped once their TTL passes"""
+    cache = LRUCache(max_entries=10, ttl=60)
+    cache.set("a", 1, ttl=0.01)
+    cache.set("b", 2)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+def test_delete_where_and_stats():
+    """Entries can be removed by key predicate; stats count hits and misses"""
+    cache = LRUCache(max_entries=10)
+    cache.set(("json", 1), "r1")
+    cache.set(("csv", 1), "c1")
+    cache.set(("json", 2), "r2")
+
+    assert cache.delete_where(lambda key: key[1] == 1) == 2
+    assert cache.get(("json", 2)) == "r2"
+    assert cache.get(("json", 1)) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_one_call():
+    """Concurrent callers share one call and each get their own copy"""
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {'findings': ['a']}
+
+    results = await asyncio.gather(*(flights.do('key', fetch) for _ in range(3)))
+
+    assert len(calls) == 1
+    assert [shared for _, shared in results] == [False, True, True]
+    results[0][0]['findings'].append('b')
+    assert results[1][0] == {'findings': ['a']}
+    assert flights.in_flight() == 0
+
+    # Once finished, the next call runs again
+    await flights.do('key', fetch)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_errors_and_survives_cancellation():
+    flights = SingleFlight()
+    started = asyncio.Event()
+
+    async def fail():
+        started.set()
+        await asyncio.sleep(0.05)
+        raise RuntimeError("boom")
+
+    first = asyncio.create_task(flights.do('key', fail))
+    await started.wait()
+    second = asyncio.create_task(flights.do('key', fail))
+    await asyncio.sleep(0)
+
+    # The caller that started the call goes away; the other still gets the outcome
+    first.cancel()
+    with pytest.raises(RuntimeError, match="boom"):
+        await second
+    assert flights.in_flight() == 0
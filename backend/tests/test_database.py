@@ -0,0 +1,32 @@
+"""
+Tests for database configuration
+"""
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_database_url
+from app.models.user import User
+
+
+def test_async_database_url():
+    """The configured URL is reached through the backend's async driver"""
+    assert async_database_url("sqlite:///./securecheck.db") == "sqlite+aiosqlite:///./securecheck.db"
+    assert async_database_url(
+        "postgresql://user:secret@db:5432/securecheck"
+    ) == "postgresql+asyncpg://user:secret@db:5432/securecheck"
+    assert async_database_url(
+        "postgresql+psycopg2://user:secret@db/securecheck"
+    ) == "postgresql+asyncpg://user:secret@db/securecheck"
+
+    with pytest.raises(ValueError):
+        async_database_url("oracle://user:secret@db/securecheck")
+
+
+@pytest.mark.asyncio
+async def test_async_session_sees_sync_writes(test_user: User, async_db: AsyncSession):
+    """Request handlers and workers share one database through both engines"""
+    email = (await async_db.execute(
+        select(User.email).where(User.id == test_user.id))).scalar_one()
+    assert email == test_user.email
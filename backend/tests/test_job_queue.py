@@ -0,0 +1,258 @@
+"""
+Tests for the scan job queue and worker
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.models.scan_job import ScanJob, JobStatus
+from app.models.user import User
+from app.models.vulnerability import Severity, Vulnerability
+from app.services import job_queue
+from app.services.scanner import SecurityScanner
+from app.services.worker import ScanWorker
+
+
+def _queued_scan(db: Session, user: User, target_url: str = "https://example.com") -> ScanJob:
+    scan = Scan(
+        user_id=user.id,
+        target_url=target_url,
+        scan_type=ScanType.BASIC,
+        status=ScanStatus.PENDING
+    )
+    db.add(scan)
+    db.flush()
+    job = job_queue.enqueue_scan(db, scan.id)
+    db.refresh(job)
+    return job
+
+
+def _expire_lease(db: Session, job_id: int):
+    db.execute(
+        update(ScanJob)
+        .where(ScanJob.id == job_id)
+        .values(lease_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+    )
+    db.commit()
+
+
+def test_create_scan_enqueues_job(client, test_user_token: str, test_db: Session):
+    """Creating a scan through the API queues a job instead of running it"""
+    response = client.post(
+        "/api/v1/scans/",
+        headers={"Authorization": f"Bearer {test_user_token}"},
+        json={"target_url": "https://example.com", "scan_type": "basic"}
+    )
+    assert response.status_code == 201
+
+    job = test_db.query(ScanJob).filter(
+        ScanJob.scan_id == response.json()["id"]).first()
+    assert job is not None
+    assert job.status == JobStatus.QUEUED
+    assert response.json()["status"] == "pending"
+
+
+def test_claim_is_exclusive(test_db: Session, test_user: User):
+    """A job can only be claimed by one worker at a time"""
+    job = _queued_scan(test_db, test_user)
+
+    claimed = job_queue.claim_next_job(test_db, "worker-a")
+    assert claimed.id == job.id
+    assert claimed.status == JobStatus.RUNNING
+    assert claimed.locked_by == "worker-a"
+    assert claimed.attempts == 1
+
+    assert job_queue.claim_next_job(test_db, "worker-b") is None
+
+
+def test_expired_lease_is_reclaimed(test_db: Session, test_user: User):
+    """Jobs of a worker that stopped renewing its lease are picked up again"""
+    job = _queued_scan(test_db, test_user)
+    job_queue.claim_next_job(test_db, "worker-a")
+    _expire_lease(test_db, job.id)
+
+    claimed = job_queue.claim_next_job(test_db, "worker-b")
+    assert claimed.id == job.id
+    assert claimed.locked_by == "worker-b"
+    assert claimed.attempts == 2
+
+    # The original worker can no longer renew or complete it
+    assert not job_queue.renew_lease(test_db, job.id, "worker-a")
+    assert not job_queue.complete_job(test_db, job.id, "worker-a")
+
+
+def test_failed_job_is_retried_with_backoff(test_db: Session, test_user: User):
+    """Failed attempts are queued again until attempts run out"""
+    job = _queued_scan(test_db, test_user)
+
+    job_queue.claim_next_job(test_db, "worker-a")
+    failed = job_queue.fail_job(test_db, job.id, "worker-a", "boom")
+    assert failed.status == JobStatus.QUEUED
+    assert failed.last_error == "boom"
+
+    # Backoff keeps it from being claimed immediately
+    assert job_queue.claim_next_job(test_db, "worker-a") is None
+
+
+def test_abandoned_job_fails_after_last_attempt(test_db: Session, test_user: User):
+    """A job whose worker dies on the final attempt fails along with its scan"""
+    job = _queued_scan(test_db, test_user)
+    test_db.execute(
+        update(ScanJob).where(ScanJob.id == job.id).values(max_attempts=1))
+    test_db.commit()
+
+    job_queue.claim_next_job(test_db, "worker-a")
+    _expire_lease(test_db, job.id)
+
+    assert job_queue.claim_next_job(test_db, "worker-b") is None
+    assert job_queue.recover_abandoned_jobs(test_db) == 1
+
+    test_db.expire_all()
+    assert test_db.get(ScanJob, job.id).status == JobStatus.FAILED
+    assert test_db.get(Scan, job.scan_id).status == ScanStatus.FAILED
+
+
+@pytest.mark.asyncio
+async def test_worker_executes_claimed_job(test_db: Session, async_session_factory, test_user: User, monkeypatch):
+    """The worker runs the scan in its own session and completes the job"""
+    async def fake_scan(self, scan_type):
+        return []
+
+    monkeypatch.setattr(SecurityScanner, "perform_scan", fake_scan)
+    job = _queued_scan(test_db, test_user)
+
+    worker = ScanWorker(worker_id="worker-a", session_factory=async_session_factory)
+    assert await worker.claim_jobs() == 1
+
+    # A stopped worker claims nothing more and waits for running jobs
+    worker.stop()
+    await worker.run()
+
+    test_db.expire_all()
+    assert test_db.get(ScanJob, job.id).status == JobStatus.SUCCEEDED
+    assert test_db.get(Scan, job.scan_id).status == ScanStatus.COMPLETED
+
+
+def test_same_target_jobs_are_claimed_together(test_db: Session, test_user: User):
+    """A worker takes identical scans along with the one it claims"""
+    leader = _queued_scan(test_db, test_user)
+    same = _queued_scan(test_db, test_user, "https://Example.com/")
+    other_path = _queued_scan(test_db, test_user, "https://example.com/login")
+    other_host = _queued_scan(test_db, test_user, "https://other.example.com")
+    # Scans with a different probe cache max age never share probes
+    fresh = _queued_scan(test_db, test_user)
+    test_db.get(Scan, fresh.scan_id).probe_max_age = 0
+    test_db.commit()
+
+    claimed = job_queue.claim_next_job(test_db, "worker-a")
+    assert claimed.id == leader.id
+    followers = job_queue.claim_same_target_jobs(test_db, "worker-a", claimed.scan_id)
+
+    assert [job.id for job in followers] == [same.id]
+    assert followers[0].locked_by == "worker-a"
+    test_db.expire_all()
+    assert test_db.get(ScanJob, other_path.id).status == JobStatus.QUEUED
+    assert test_db.get(ScanJob, other_host.id).status == JobStatus.QUEUED
+    assert test_db.get(ScanJob, fresh.id).status == JobStatus.QUEUED
+
+    # A scan with a max age is taken along only with scans of the same max age
+    test_db.get(Scan, same.scan_id).probe_max_age = 0
+    test_db.commit()
+    assert [job.id for job in job_queue.claim_same_target_jobs(
+        test_db, "worker-a", same.scan_id)] == [fresh.id]
+
+
+@pytest.mark.asyncio
+async def test_worker_coalesces_identical_jobs(test_db: Session, async_session_factory, test_user: User, monkeypatch):
+    """Identical queued scans cost one probe when a worker runs them"""
+    calls = []
+
+    async def fake_scan(self, scan_type):
+        calls.append(self.target_url)
+        await asyncio.sleep(0.05)
+        return []
+
+    monkeypatch.setattr(SecurityScanner, "perform_scan", fake_scan)
+    jobs = [_queued_scan(test_db, test_user) for _ in range(3)]
+
+    worker = ScanWorker(worker_id="worker-a", concurrency=1, session_factory=async_session_factory)
+    assert await worker.claim_jobs() == 3
+    worker.stop()
+    await worker.run()
+
+    assert len(calls) == 1
+    test_db.expire_all()
+    assert {test_db.get(ScanJob, job.id).status for job in jobs} == {JobStatus.SUCCEEDED}
+
+
+@pytest.mark.asyncio
+async def test_reclaimed_job_of_a_finished_scan_is_not_rerun(
+    test_db: Session, async_session_factory, test_user: User, monkeypatch
+):
+    """A job claimed again after its results were saved just completes"""
+    calls = []
+
+    async def fake_scan(self, scan_type):
+        calls.append(scan_type)
+        return []
+
+    monkeypatch.setattr(SecurityScanner, "perform_scan", fake_scan)
+    job = _queued_scan(test_db, test_user)
+    scan = test_db.get(Scan, job.scan_id)
+    scan.status = ScanStatus.COMPLETED
+    scan.vulnerability_count = 1
+    test_db.add(Vulnerability(scan_id=scan.id, severity=Severity.LOW,
+                              title="Saved finding", description="Found"))
+    test_db.commit()
+
+    worker = ScanWorker(worker_id="worker-a", session_factory=async_session_factory)
+    assert await worker.claim_jobs() == 1
+    worker.stop()
+    await worker.run()
+
+    assert calls == []
+    test_db.expire_all()
+    assert test_db.get(ScanJob, job.id).status == JobStatus.SUCCEEDED
+    scan = test_db.get(Scan, job.scan_id)
+    assert scan.status == ScanStatus.COMPLETED
+    assert [v.title for v in scan.vulnerabilities] == ["Saved finding"]
+
+
+@pytest.mark.asyncio
+async def test_scan_is_cancelled_when_the_lease_is_lost(
+    test_db: Session, async_session_factory, test_user: User, monkeypatch
+):
+    """A worker that lost its lease stops the scan and leaves the job alone"""
+    finished = []
+
+    async def fake_scan(self, scan_type):
+        # Another worker reclaims the job while this one is still scanning
+        test_db.execute(
+            update(ScanJob).where(ScanJob.id == job.id).values(locked_by="worker-b"))
+        test_db.commit()
+        await asyncio.sleep(5)
+        finished.append(scan_type)
+        return [{'severity': Severity.LOW, 'title': "Late finding", 'description': "Found"}]
+
+    monkeypatch.setattr(SecurityScanner, "perform_scan", fake_scan)
+    monkeypatch.setattr("app.services.worker.settings.SCAN_JOB_LEASE_SECONDS", 1)
+    # A coalesced probe outlives its cancelled callers; keep this one direct
+    monkeypatch.setattr("app.services.scan_service.settings.SCAN_COALESCE_ENABLED", False)
+    job = _queued_scan(test_db, test_user)
+    claimed = job_queue.claim_next_job(test_db, "worker-a")
+    assert claimed.id == job.id
+
+    worker = ScanWorker(worker_id="worker-a", session_factory=async_session_factory)
+    await asyncio.wait_for(worker.process_job(job.id, job.scan_id), timeout=3)
+
+    assert finished == []
+    test_db.expire_all()
+    stolen = test_db.get(ScanJob, job.id)
+    assert stolen.status == JobStatus.RUNNING
+    assert stolen.locked_by == "worker-b"
+    assert test_db.get(Scan, job.scan_id).vulnerabilities == []
@@ -0,0 +1,87 @@
+"""
+Tests for in-process metrics and the /metrics endpoint
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import (
+    Counter, Histogram, Registry, SCAN_CHECK_DURATION, DB_POOL_CHECKOUTS,
+    DB_POOL_IN_USE, DB_POOL_WAIT, instrument_engine)
+from app.services.scanner import SecurityScanner
+
+
+def test_text_exposition_format():
+    """Counters and histograms render in the Prometheus text format"""
+    registry = Registry()
+    requests = Counter("demo_requests_total", "Requests", ["route"], registry=registry)
+    latency = Histogram("demo_latency_seconds", "Latency", buckets=(0.1, 1.0), registry=registry)
+
+    requests.inc(route='/a "quoted"')
+    requests.inc(2, route="/b")
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    output = registry.render()
+    assert "# TYPE demo_requests_total counter" in output
+    assert 'demo_requests_total{route="/a \\"quoted\\""} 1' in output
+    assert 'demo_requests_total{route="/b"} 2' in output
+    assert 'demo_latency_seconds_bucket{le="0.1"} 1' in output
+    assert 'demo_latency_seconds_bucket{le="1"} 2' in output
+    assert 'demo_latency_seconds_bucket{le="+Inf"} 3' in output
+    assert "demo_latency_seconds_count 3" in output
+    assert "demo_latency_seconds_sum 5.55" in output
+
+
+def test_metrics_endpoint(client, test_user_token):
+    """Route latencies use the route template; caches and the queue are reported"""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    client.get("/api/v1/scans/12345", headers=headers)
+    client.post("/api/v1/scans/", headers=headers,
+                json={"target_url": "https://example.com", "scan_type": "basic"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    body = response.text
+    assert ('securecheck_http_requests_total{method="GET",route="/api/v1/scans/{scan_id}",'
+            'status="404"}') in body
+    assert 'securecheck_cache_hits_total{cache="token"}' in body
+    assert 'securecheck_scan_jobs{status="queued"} 1' in body
+
+
+@pytest.mark.asyncio
+async def test_check_durations_are_recorded():
+    """Each check records its duration and whether it timed out"""
+    async def slow_https(self):
+        await asyncio.sleep(1)
+        return []
+
+    before = SCAN_CHECK_DURATION.count(check="https", outcome="timeout")
+    scanner = SecurityScanner("https://example.com", check_timeout=0.01)
+    scanner.scan_https = slow_https.__get__(scanner)
+    await scanner.perform_scan("basic")
+
+    assert SCAN_CHECK_DURATION.count(check="https", outcome="timeout") == before + 1
+
+
+def test_pool_instrumentation(tmp_path):
+    """Checkouts, connections in use and checkout wait are recorded"""
+    engine = create_engine(f"sqlite:///{tmp_path}/pool.db")
+    instrument_engine(engine)
+    checkouts = DB_POOL_CHECKOUTS.value()
+    waits = DB_POOL_WAIT.count()
+    in_use = DB_POOL_IN_USE.value()
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        assert DB_POOL_IN_USE.value() == in_use + 1
+
+    assert DB_POOL_IN_USE.value() == in_use
+    assert DB_POOL_CHECKOUTS.value() == checkouts + 1
+    assert DB_POOL_WAIT.count() == waits + 1
+    engine.dispose()
@@ -0,0 +1,159 @@
+"""
+Tests for the port scanning engine
+"""
+
+import asyncio
+import socket
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.schemas.vulnerability import SeverityEnum
+from app.services import port_scanner
+from app.services.port_scanner import (
+    CLOSED, FILTERED, OPEN, AdaptiveTimeout, parse_ports, ports_for_profile, scan_ports)
+from app.services.scanner import SecurityScanner
+
+
+def _closed_port() -> int:
+    """A port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _listen(banner: bytes = b""):
+    async def handle(reader, writer):
+        if banner:
+            writer.write(banner)
+            await writer.drain()
+        await reader.read()  # hold the connection until the client closes
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def test_parse_ports():
+    assert parse_ports("80, 22,8000-8002,80") == [22, 80, 8000, 8001, 8002]
+    for spec in ("", "http", "0", "70000", "90-80", "1-"):
+        with pytest.raises(ValueError):
+            parse_ports(spec)
+
+
+def test_ports_for_profile():
+    assert len(ports_for_profile("top-20")) == 20
+    assert len(ports_for_profile("top-100")) == 100
+    assert ports_for_profile("custom", "443,22") == [22, 443]
+    with pytest.raises(ValueError):
+        ports_for_profile("top-5000")
+
+
+def test_adaptive_timeout_follows_round_trips():
+    timeout = AdaptiveTimeout(initial=1.0, minimum=0.05, maximum=3.0)
+    assert timeout.value == 1.0
+
+    for _ in range(20):
+        timeout.observe(0.02)
+    assert timeout.value == pytest.approx(0.05)  # clamped to the minimum
+
+    for _ in range(20):
+        timeout.observe(0.4)
+    assert 0.4 < timeout.value < 1.0
+
+
+@pytest.mark.asyncio
+async def test_scan_ports_detects_open_and_closed_ports():
+    silent, silent_port = await _listen()
+    greeting, greeting_port = await _listen(b"SSH-2.0-OpenSSH_9.6\r\n")
+    closed_port = _closed_port()
+    try:
+        result = await scan_ports(
+            "localhost", [greeting_port, closed_port, silent_port], grab_banners=True)
+    finally:
+        silent.close()
+        greeting.close()
+
+    assert result.address in ("127.0.0.1", "::1")
+    states = [(p.port, p.state) for p in result.ports]
+    assert states == [(greeting_port, OPEN), (closed_port, CLOSED), (silent_port, OPEN)]
+    assert result.ports[0].banner == "SSH-2.0-OpenSSH_9.6"
+    assert result.ports[2].banner is None
+    assert result.ports[1].rtt_ms is not None
+    assert {"dns_ms", "scan_ms", "timeout_ms"} <= set(result.timings)
+
+
+@pytest.mark.asyncio
+async def test_scan_ports_respects_per_host_limit(monkeypatch):
+    in_flight = peak = 0
+
+    async def fake_probe(address, port, timeout, grab_banner, banner_timeout):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return port_scanner.PortResult(port, CLOSED)
+
+    monkeypatch.setattr(port_scanner, "_probe", fake_probe)
+    result = await scan_ports("127.0.0.1", range(1, 101), per_host_limit=7)
+
+    assert len(result.ports) == 100
+    assert peak == 7
+
+
+@pytest.mark.asyncio
+async def test_unanswered_ports_are_filtered_after_timeout(monkeypatch):
+    async def never_answers(host, port):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(port_scanner.asyncio, "open_connection", never_answers)
+    timeout = AdaptiveTimeout(initial=0.1, minimum=0.05, maximum=1.0)
+
+    start = time.monotonic()
+    result = await scan_ports("127.0.0.1", [1, 2, 3], timeout=timeout)
+
+    assert [p.state for p in result.ports] == [FILTERED] * 3
+    assert time.monotonic() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_ports_check_reports_open_ports(monkeypatch):
+    server, open_port = await _listen()
+    closed_port = _closed_port()
+    monkeypatch.setattr(settings, "PORT_SCAN_PROFILE", "custom")
+    monkeypatch.setattr(settings, "PORT_SCAN_CUSTOM_PORTS", f"{open_port},{closed_port}")
+    monkeypatch.setattr(settings, "PORT_SCAN_BANNER_TIMEOUT_SECONDS", 0.05)
+
+    scanner = SecurityScanner("http://127.0.0.1")
+    try:
+        findings = await scanner.perform_scan("ports")
+    finally:
+        server.close()
+
+    assert [f['title'] for f in findings] == [f'Port {open_port} open', 'Port scan summary']
+    assert findings[0]['severity'] == SeverityEnum.LOW
+    assert findings[1]['description'].startswith('1 open, 1 closed and 0 filtered of 2')
+
+    timings = scanner.timings['ports']
+    assert timings['outcome'] == 'completed'
+    assert (timings['open'], timings['closed'], timings['filtered']) == (1, 1, 0)
+    assert timings['ports_scanned'] == 2
+
+    # Port scans are opt-in: a full scan does not probe ports
+    assert 'full' not in SecurityScanner.CHECKS['ports']
+
+
+
+@pytest.mark.asyncio
+async def test_misconfigured_profile_is_a_finding(monkeypatch):
+    """A bad port list is reported without failing the rest of the scan"""
+    monkeypatch.setattr(settings, "PORT_SCAN_PROFILE", "custom")
+    monkeypatch.setattr(settings, "PORT_SCAN_CUSTOM_PORTS", "22,99999")
+
+    scanner = SecurityScanner("https://127.0.0.1")
+    findings = await scanner.scan_ports()
+
+    assert [f['title'] for f in findings] == ['Error during port scan']
+    assert '99999' in findings[0]['description']
@@ -0,0 +1,220 @@
+"""
+Query plan regression tests
+
+Runs the hot queries of the API and the worker through the real service
+functions, then asks SQLite how it would execute each of them. A full table
+scan on a hot path fails the test, so a query change that no longer matches
+an index (or a dropped index) is caught before it reaches a large database.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
+
+from app.core.database import Base, engine
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.models.scan_artifact import ScanArtifact
+from app.models.scan_batch import ScanBatch
+from app.models.vulnerability import Vulnerability, Severity
+from app.services import artifact_service, job_queue
+from app.services.batch_service import get_batch_status
+from app.services.export_service import (
+    iter_scan_csv, iter_scan_json, iter_user_scans_csv, scan_has_findings)
+from app.services.report_service import (
+    count_findings_by_severity, get_site_history, get_user_statistics)
+from app.services.scan_service import encode_cursor, get_scan, get_user_scans
+
+
+@contextmanager
+def captured_selects():
+    """Collect the SELECT statements executed on any engine, with their parameters"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(Engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", capture)
+
+
+def full_scans(statement, parameters):
+    """Plan lines of a statement that read a whole table"""
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, tuple(parameters or ())).all()
+    # Plan rows are (id, parent, notused, detail)
+    return [
+        row[3] for row in plan
+        if row[3].startswith("SCAN ") and "INDEX" not in row[3]
+        and "CONSTANT ROW" not in row[3]
+    ]
+
+
+def assert_indexed(statements):
+    assert statements, "no queries were captured"
+    for statement, parameters in statements:
+        scans = full_scans(statement, parameters)
+        assert not scans, f"full table scan {scans} in:\n{statement}"
+
+
+@pytest.fixture
+def seeded(test_db, test_user):
+    """A few scans with findings, artifacts and queued jobs"""
+    scans = []
+    for i in range(3):
+        scan = Scan(
+            user_id=test_user.id,
+            target_url=f"https://site-{i}.example.com",
+            scan_type=ScanType.FULL,
+            status=ScanStatus.COMPLETED,
+            created_at=datetime.utcnow() - timedelta(minutes=i)
+        )
+        test_db.add(scan)
+        test_db.flush()
+        test_db.add_all([
+            Vulnerability(scan_id=scan.id, severity=severity,
+                          title=f"{severity.value} finding", description="Found")
+            for severity in Severity
+        ])
+        test_db.add(ScanArtifact(
+            scan_id=scan.id, kind="csv", encoding="identity",
+            sha256=f"{i:064d}", size=1, path=f"{i:02d}/{i:064d}.csv"))
+        scans.append(scan)
+    test_db.commit()
+
+    for scan in scans:
+        job_queue.enqueue_scan(test_db, scan.id)
+    return scans
+
+
+def test_baseline_indexes_exist(test_db):
+    """The indexes the plans below rely on are part of the schema"""
+    with engine.connect() as conn:
+        # PRAGMA index_list does not reload a schema changed by another
+        # connection (the tables are recreated for every test); a query does
+        conn.exec_driver_sql("SELECT count(*) FROM sqlite_master")
+        indexes = {
+            table: {index["name"] for index in inspect(conn).get_indexes(table)}
+            for table in ("scans", "vulnerabilities", "scan_artifacts", "scan_jobs")
+        }
+    assert "ix_scans_user_created" in indexes["scans"]
+    assert "ix_scans_user_status_created" in indexes["scans"]
+    assert "ix_scans_user_domain_created" in indexes["scans"]
+    assert "ix_scans_batch_status" in indexes["scans"]
+    assert "ix_vulnerabilities_scan_severity" in indexes["vulnerabilities"]
+    assert "ix_scan_artifacts_path" in indexes["scan_artifacts"]
+    assert "ix_scan_jobs_status_run_after" in indexes["scan_jobs"]
+
+
+@pytest.mark.asyncio
+async def test_scan_listing_uses_indexes(async_db, seeded, test_user):
+    with captured_selects() as statements:
+        await get_scan(async_db, seeded[0].id, test_user.id)
+        await get_user_scans(async_db, test_user.id, limit=2)
+        await get_user_scans(async_db, test_user.id, limit=2, status=ScanStatus.COMPLETED)
+        await get_user_scans(async_db, test_user.id, limit=2, cursor=encode_cursor(seeded[0]))
+    assert_indexed(statements)
+
+
+@pytest.mark.asyncio
+async def test_statistics_and_history_use_indexes(async_db, seeded, test_user):
+    with captured_selects() as statements:
+        await get_user_statistics(async_db, test_user.id)
+        await get_site_history(async_db, test_user.id, "site-1.example.com")
+    assert_indexed(statements)
+
+
+@pytest.mark.asyncio
+async def test_batch_progress_uses_indexes(async_db, test_db, seeded, test_user):
+    batch = ScanBatch(user_id=test_user.id, total=len(seeded))
+    test_db.add(batch)
+    test_db.flush()
+    for scan in seeded:
+        scan.batch_id = batch.id
+    test_db.commit()
+
+    with captured_selects() as statements:
+        await get_batch_status(async_db, batch.id, test_user.id)
+    assert_indexed(statements)
+
+
+def test_exports_use_indexes(test_db, seeded, test_user):
+    scan = seeded[0]
+    with captured_selects() as statements:
+        count_findings_by_severity(test_db, scan.id)
+        scan.vulnerability_count = None
+        scan_has_findings(test_db, scan)
+        "".join(iter_scan_csv(test_db, scan.id))
+        "".join(iter_scan_json(test_db, scan))
+        "".join(iter_user_scans_csv(test_db, test_user.id, [s.id for s in seeded]))
+    test_db.rollback()
+    assert_indexed(statements)
+
+
+def test_artifact_lookups_use_indexes(test_db, seeded):
+    paths = [artifact.path for artifact in seeded[0].artifacts]
+    with captured_selects() as statements:
+        artifact_service.get_artifact(test_db, seeded[0].id, "csv")
+        artifact_service.artifact_paths(test_db, seeded[0].id)
+        artifact_service.remove_unreferenced_files(test_db, paths)
+    assert_indexed(statements)
+
+
+def test_job_queue_uses_indexes(test_db, seeded):
+    with captured_selects() as statements:
+        job = job_queue.claim_next_job(test_db, "worker-1")
+        job_queue.claim_same_target_jobs(test_db, "worker-1", job.scan_id)
+        job_queue.recover_abandoned_jobs(test_db)
+        job_queue.queue_depth(test_db)
+    assert_indexed(statements)
+
+
+def test_full_scan_is_detected(test_db, seeded):
+    """The check itself works: an unindexed filter is reported"""
+    statement = "SELECT id FROM vulnerabilities WHERE title = ?"
+    assert full_scans(statement, ("critical finding",)) == ["SCAN vulnerabilities"]
+
+
+def test_migrations_match_models(tmp_path):
+    """Upgrading an empty database yields the schema the models describe"""
+    from alembic.autogenerate import compare_metadata
+    from alembic.migration import MigrationContext
+    from sqlalchemy import create_engine
+
+    from app.core.migrations import upgrade_database
+
+    migrated = create_engine(f"sqlite:///{tmp_path}/migrated.db")
+    try:
+        upgrade_database(migrated)
+        with migrated.connect() as conn:
+            assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+            diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+        assert diff == []
+    finally:
+        migrated.dispose()
+
+
+def test_create_all_database_is_stamped(tmp_path):
+    """Databases created before migrations existed are adopted, not recreated"""
+    from sqlalchemy import create_engine
+
+    from app.core.migrations import BASELINE_REVISION, upgrade_database
+
+    legacy = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    try:
+        Base.metadata.create_all(legacy)
+        upgrade_database(legacy)
+        with legacy.connect() as conn:
+            version = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        assert version != BASELINE_REVISION
+        assert "ix_vulnerabilities_scan_severity" in {
+            index["name"] for index in inspect(legacy).get_indexes("vulnerabilities")}
+    finally:
+        legacy.dispose()
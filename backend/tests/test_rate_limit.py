@@ -0,0 +1,203 @@
+"""
+Tests for the rate limiting middleware and backends
+"""
+
+import asyncio
+
+import pytest
+from fastapi import status
+
+from app.core.config import settings
+from app.security.rate_limit import MemoryBackend, RedisBackend, RateLimitMiddleware
+
+
+class StandInRedis:
+    """Just enough of a Redis server for the rate limiter: INCRBY, DECRBY, PEXPIRE, GET"""
+
+    def __init__(self):
+        self.data = {}
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                args = []
+                for _ in range(int(header[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2].decode())
+                writer.write(self._handle(args))
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def _handle(self, args) -> bytes:
+        command = args[0].upper()
+        if command in ("INCRBY", "DECRBY"):
+            sign = 1 if command == "INCRBY" else -1
+            self.data[args[1]] = int(self.data.get(args[1], 0)) + sign * int(args[2])
+            return b":%d\r\n" % self.data[args[1]]
+        if command == "PEXPIRE":
+            return b":1\r\n"
+        if command == "GET":
+            value = self.data.get(args[1])
+            if value is None:
+                return b"$-1\r\n"
+            value = str(value).encode()
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.mark.asyncio
+async def test_memory_token_bucket():
+    """A bucket allows `limit` requests, then asks the client to wait"""
+    backend = MemoryBackend()
+    results = [await backend.hit("user:1", 3, 60) for _ in range(4)]
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert results[2].remaining == 0
+    assert 19 < results[3].retry_after <= 20
+
+    assert (await backend.hit("user:2", 3, 60)).allowed
+
+
+@pytest.mark.asyncio
+async def test_hits_can_cost_more_than_one():
+    """A refused hit uses no budget, on either backend"""
+    server = StandInRedis()
+    port = await server.start()
+    try:
+        for backend in (MemoryBackend(), RedisBackend(f"redis://127.0.0.1:{port}/0")):
+            assert (await backend.hit("user:1", 10, 60, cost=6)).allowed
+            denied = await backend.hit("user:1", 10, 60, cost=6)
+            assert not denied.allowed
+            assert denied.retry_after > 0
+            assert (await backend.hit("user:1", 10, 60, cost=4)).allowed
+            await backend.close()
+    finally:
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_shared_backend_counts_across_instances():
+    """Two processes pointing at the same server share one counter"""
+    server = StandInRedis()
+    port = await server.start()
+    try:
+        first = RedisBackend(f"redis://127.0.0.1:{port}/0")
+        second = RedisBackend(f"redis://127.0.0.1:{port}/0")
+
+        assert (await first.hit("ip:1.2.3.4", 2, 60)).allowed
+        assert (await second.hit("ip:1.2.3.4", 2, 60)).allowed
+        denied = await first.hit("ip:1.2.3.4", 2, 60)
+        assert not denied.allowed
+        assert 0 < denied.retry_after <= 60
+
+        await first.close()
+        await second.close()
+    finally:
+        await server.stop()
+
+
+def test_requests_over_the_limit_get_429(client, test_user_token, monkeypatch):
+    """Each user has a budget per minute; anonymous clients are limited by IP"""
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_MINUTE", 2)
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+
+    first = client.get("/api/v1/scans/", headers=headers)
+    assert first.status_code == 200
+    assert first.headers["x-ratelimit-limit"] == "2"
+    assert first.headers["x-ratelimit-remaining"] == "1"
+
+    assert client.get("/api/v1/scans/", headers=headers).status_code == 200
+    limited = client.get("/api/v1/scans/", headers=headers)
+    assert limited.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(limited.headers["retry-after"]) >= 1
+
+    # The anonymous bucket of the same client is separate
+    assert client.get("/health").status_code == 200
+
+
+def test_expensive_routes_have_their_own_limit(client, test_user_token, monkeypatch):
+    """Scan creation is limited more tightly than reads"""
+    monkeypatch.setattr(settings, "RATE_LIMIT_EXPENSIVE_PER_MINUTE", 1)
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    scan = {"target_url": "https://example.com", "scan_type": "basic"}
+
+    assert client.post("/api/v1/scans/", headers=headers, json=scan).status_code == 201
+    assert client.post("/api/v1/scans/", headers=headers, json=scan).status_code == 429
+    assert client.get("/api/v1/scans/", headers=headers).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_unreachable_shared_backend_fails_open():
+    """Requests are served when the shared counter store is down"""
+    responses = []
+
+    async def app(scope, receive, send):
+        responses.append(scope["path"])
+
+    server = StandInRedis()
+    port = await server.start()
+    await server.stop()
+
+    middleware = RateLimitMiddleware(app, backend=RedisBackend(f"redis://127.0.0.1:{port}/0"))
+    scope = {"type": "http", "method": "GET", "path": "/health",
+             "headers": [], "client": ("127.0.0.1", 1234)}
+    await middleware(scope, None, None)
+
+    assert responses == ["/health"]
+
+
+def test_batches_are_limited_by_their_targets(client, test_user_token, monkeypatch):
+    """A batch costs one scan per target, so batches cannot bypass scan limits"""
+    monkeypatch.setattr(settings, "RATE_LIMIT_BATCH_TARGETS_PER_MINUTE", 5)
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+
+    def batch(count):
+        return client.post("/api/v1/scans/batch", headers=headers, json={
+            "targets": [f"site-{i}.example.com" for i in range(count)]})
+
+    assert batch(3).status_code == 201
+    limited = batch(3)
+    assert limited.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(limited.headers["retry-after"]) >= 1
+    assert batch(2).status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_shared_backend_closing_mid_reply_fails_open():
+    """A reply cut short by the server lets requests through instead of a 500"""
+    responses = []
+
+    async def app(scope, receive, send):
+        responses.append(scope["path"])
+
+    async def truncate(reader, writer):
+        await reader.read(1024)
+        writer.write(b":1\r\n:1\r\n$10\r\nab")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(truncate, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        middleware = RateLimitMiddleware(app, backend=RedisBackend(f"redis://127.0.0.1:{port}/0"))
+        scope = {"type": "http", "method": "GET", "path": "/health",
+                 "headers": [], "client": ("127.0.0.1", 1234)}
+        await middleware(scope, None, None)
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    assert responses == ["/health"]
@@ -4,6 +4,7 @@ Tests for report and statistics endpoints
 
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.models.user import User
@@ -182,3 +183,313 @@ def test_report_not_found(client: TestClient, test_user_token: str):
     )
 
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_user_statistics_aggregates_in_sql(test_db: Session, async_db: AsyncSession, test_user: User):
+    """Statistics are computed with a fixed number of aggregate queries"""
+    from sqlalchemy import event
+    from app.services.report_service import get_user_statistics
+
+    for i, url in enumerate(["https://a.com", "https://a.com/login",
+                             "https://b.com", "https://a.com"]):
+        scan = Scan(
+            user_id=test_user.id,
+            target_url=url,
+            scan_type=ScanType.BASIC,
+            status=ScanStatus.COMPLETED if i % 2 == 0 else ScanStatus.FAILED
+        )
+        test_db.add(scan)
+        test_db.flush()
+        test_db.add(Vulnerability(
+            scan_id=scan.id, severity=Severity.HIGH, title="t", description="d"))
+    test_db.commit()
+
+    user_id = test_user.id
+    statements = []
+
+    def count_statements(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = async_db.get_bind()
+    event.listen(engine, "before_cursor_execute", count_statements)
+    try:
+        stats = await get_user_statistics(async_db, user_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statements)
+
+    assert len(statements) == 3
+    assert stats['total_scans'] == 4
+    assert stats['completed_scans'] == 2
+    assert stats['failed_scans'] == 2
+    assert stats['total_vulnerabilities'] == 4
+    assert stats['severity_breakdown']['high'] == 4
+    assert stats['most_scanned_domain'] == "a.com"
+    assert stats['most_scanned_count'] == 3
+
+
+def test_site_history_matches_normalized_domain(client: TestClient, test_user_token: str, test_db: Session, test_user: User):
+    """Host case and port are ignored, and results are paginated newest first"""
+    from datetime import datetime, timedelta
+
+    base = datetime(2026, 1, 1)
+    for i, url in enumerate(["https://Example.com:8443/a", "http://example.com",
+                             "https://example.com/b", "https://other.com"]):
+        test_db.add(Scan(
+            user_id=test_user.id,
+            target_url=url,
+            scan_type=ScanType.BASIC,
+            status=ScanStatus.COMPLETED,
+            created_at=base + timedelta(minutes=i)
+        ))
+    test_db.commit()
+
+    response = client.get(
+        "/api/v1/stats/site/EXAMPLE.com?limit=2",
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == 200
+    assert [s["target_url"] for s in response.json()] == [
+        "https://example.com/b", "http://example.com"]
+
+    response = client.get(
+        "/api/v1/stats/site/example.com?skip=2&limit=2",
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert [s["target_url"] for s in response.json()] == [
+        "https://Example.com:8443/a"]
+
+
+def test_csv_export_is_streamed_in_chunks(test_db: Session, test_user: User):
+    """Large scans are written out in several chunks rather than one string"""
+    import csv
+    from io import StringIO
+
+    from app.services.export_service import CSV_CHUNK_ROWS, iter_scan_csv
+
+    scan = Scan(
+        user_id=test_user.id,
+        target_url="https://big.example.com",
+        scan_type=ScanType.FULL,
+        status=ScanStatus.COMPLETED
+    )
+    test_db.add(scan)
+    test_db.flush()
+    test_db.add_all([
+        Vulnerability(scan_id=scan.id, severity=Severity.LOW,
+                      title=f"Finding {i}", description="Line one\nline two")
+        for i in range(CSV_CHUNK_ROWS * 2 + 1)
+    ])
+    test_db.commit()
+
+    chunks = list(iter_scan_csv(test_db, scan.id))
+    assert len(chunks) == 3
+
+    rows = list(csv.reader(StringIO("".join(chunks))))
+    assert rows[0] == ["Severity", "Title", "Description", "Recommendation", "Detected"]
+    assert len(rows) == CSV_CHUNK_ROWS * 2 + 2
+    assert rows[1][:4] == ["LOW", "Finding 0", "Line one\nline two", "N/A"]
+
+
+def test_export_many_scans_csv(client: TestClient, test_user_token: str, test_db: Session, test_user: User):
+    """Findings of several scans are exported in one file"""
+    scans = []
+    for url in ["https://a.example.com", "https://b.example.com", "https://c.example.com"]:
+        scan = Scan(user_id=test_user.id, target_url=url,
+                    scan_type=ScanType.BASIC, status=ScanStatus.COMPLETED)
+        test_db.add(scan)
+        test_db.flush()
+        test_db.add(Vulnerability(scan_id=scan.id, severity=Severity.MEDIUM,
+                                  title="Issue", description="Issue"))
+        scans.append(scan.id)
+    test_db.commit()
+
+    response = client.get(
+        f"/api/v1/scans/export/csv?scan_id={scans[0]}&scan_id={scans[2]}",
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+
+    lines = response.text.splitlines()
+    assert lines[0].startswith("Scan ID,Target,Severity")
+    assert [line.split(",")[1] for line in lines[1:]] == [
+        "https://a.example.com", "https://c.example.com"]
+
+    response = client.get(
+        "/api/v1/scans/export/csv",
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert len(response.text.splitlines()) == 4
+
+
+def _scan_with_findings(db: Session, user: User) -> Scan:
+    scan = Scan(user_id=user.id, target_url="https://siem.example.com",
+                scan_type=ScanType.FULL, status=ScanStatus.COMPLETED)
+    db.add(scan)
+    db.flush()
+    db.add_all([
+        Vulnerability(scan_id=scan.id, severity=Severity.CRITICAL, title="Open admin",
+                      description="Admin panel exposed", recommendation="Restrict it"),
+        Vulnerability(scan_id=scan.id, severity=Severity.HIGH, title="No HSTS",
+                      description="HSTS missing", recommendation=None),
+        Vulnerability(scan_id=scan.id, severity=Severity.INFO, title="Server header",
+                      description="Server \"nginx\"", recommendation=None),
+    ])
+    db.commit()
+    return scan
+
+
+def test_streamed_json_matches_report(test_db: Session, test_user: User):
+    """The streamed document has the same content as the in-memory report"""
+    import json
+
+    from app.services.export_service import iter_scan_json
+    from app.services.report_service import ReportGenerator
+
+    scan = _scan_with_findings(test_db, test_user)
+    streamed = json.loads("".join(iter_scan_json(test_db, scan)))
+    expected = ReportGenerator(scan).generate_json_report()
+
+    for key in ("summary", "vulnerabilities", "recommendations"):
+        assert streamed[key] == expected[key]
+    assert "• Open admin: Restrict it" in streamed["recommendations"]
+
+
+def test_export_scan_ndjson(client: TestClient, test_user_token: str, test_db: Session, test_user: User):
+    """NDJSON exports have a summary line, one line per finding and recommendations"""
+    import json
+
+    scan = _scan_with_findings(test_db, test_user)
+    response = client.get(
+        f"/api/v1/scans/{scan.id}/export/ndjson",
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["record_type"] for r in records] == [
+        "summary", "vulnerability", "vulnerability", "vulnerability", "recommendations"]
+    assert records[0]["total_vulnerabilities"] == 3
+    assert records[1]["scan_id"] == scan.id
+    assert records[1]["severity"] == "critical"
+    assert records[3]["description"] == 'Server "nginx"'
+
+
+@pytest.mark.asyncio
+async def test_finished_report_etag_and_not_modified(client: TestClient, test_user_token: str, test_db: Session, async_db: AsyncSession, test_user: User):
+    """Finished reports get an ETag; revalidation answers 304 without reading findings"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    from app.services import scan_service
+    from app.services.report_cache import report_cache
+    from app.schemas.vulnerability import SeverityEnum
+
+    scan = Scan(user_id=test_user.id, target_url="https://etag.example.com",
+                scan_type=ScanType.BASIC, status=ScanStatus.PENDING)
+    test_db.add(scan)
+    test_db.commit()
+    scan_id = scan.id
+    await scan_service.save_scan_results(async_db, scan_id, [{
+        'severity': SeverityEnum.HIGH, 'title': "Issue",
+        'description': "Issue", 'recommendation': None
+    }], ScanStatus.COMPLETED)
+
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    first = client.get(f"/api/v1/scans/{scan_id}/report", headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith('"')
+    assert first.json()["summary"]["total_vulnerabilities"] == 1
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        cached = client.get(f"/api/v1/scans/{scan_id}/report", headers=headers)
+        revalidated = client.get(f"/api/v1/scans/{scan_id}/report",
+                                 headers={**headers, "If-None-Match": etag})
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+    assert cached.content == first.content
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+    assert not any("vulnerabilities" in s for s in statements)
+    assert report_cache.stats()["hits"] == 1
+
+    # The CSV export has its own representation and ETag
+    csv_response = client.get(f"/api/v1/scans/{scan_id}/export/csv", headers=headers)
+    assert csv_response.headers["etag"] != etag
+
+    # Deleting the scan drops its cached reports
+    assert client.delete(f"/api/v1/scans/{scan_id}", headers=headers).status_code == 204
+    assert len(report_cache) == 0
+
+
+def test_unfinished_report_has_no_etag(client: TestClient, test_user_token: str, test_db: Session, test_user: User):
+    """Reports of scans that can still change are not cached"""
+    scan = Scan(user_id=test_user.id, target_url="https://running.example.com",
+                scan_type=ScanType.BASIC, status=ScanStatus.RUNNING)
+    test_db.add(scan)
+    test_db.commit()
+
+    response = client.get(
+        f"/api/v1/scans/{scan.id}/report",
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert response.json()["summary"]["status"] == "running"
+
+
+@pytest.mark.parametrize("path", ["report", "export/ndjson"])
+def test_streamed_report_is_stable_under_its_etag(
+    client: TestClient, test_user_token: str, test_db: Session, test_user: User,
+    monkeypatch, path: str
+):
+    """Reports too large for the cache render to the same bytes every time"""
+    import time
+    from datetime import datetime
+
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "REPORT_CACHE_MAX_FINDINGS", 0)
+    scan = _scan_with_findings(test_db, test_user)
+    scan.completed_at = datetime(2026, 1, 1, 10, 0, 0)
+    scan.vulnerability_count = 3
+    test_db.commit()
+
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    first = client.get(f"/api/v1/scans/{scan.id}/{path}", headers=headers)
+    time.sleep(0.01)
+    second = client.get(f"/api/v1/scans/{scan.id}/{path}", headers=headers)
+
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.content == second.content
+    assert b'"report_generated_at": "2026-01-01T10:00:00' in first.content
+
+
+def test_report_matches_documented_schema(client: TestClient, test_user_token: str, test_db: Session, test_user: User):
+    """The raw report body validates against the schema documented in OpenAPI"""
+    from app.main import app
+    from app.schemas.report import ReportResponse
+
+    scan = _scan_with_findings(test_db, test_user)
+    scan.timings = {"https": {"wall_ms": 1.5, "outcome": "completed"}}
+    test_db.commit()
+
+    response = client.get(
+        f"/api/v1/scans/{scan.id}/report",
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    report = ReportResponse.model_validate(response.json())
+    assert report.summary.timings == {"https": {"wall_ms": 1.5, "outcome": "completed"}}
+
+    documented = app.openapi()["paths"]["/api/v1/scans/{scan_id}/report"]["get"]["responses"]["200"]
+    assert documented["content"]["application/json"]["schema"]["$ref"].endswith("/ReportResponse")
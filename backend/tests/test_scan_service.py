@@ -0,0 +1,293 @@
+"""
+Tests for the scan service
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.scan import Scan, ScanStatus, ScanType, normalize_target
+from app.models.user import User
+from app.models.vulnerability import Vulnerability, Severity
+from app.schemas.vulnerability import SeverityEnum
+from app.services import scan_service
+from app.services.scanner import SecurityScanner
+
+
+def _pending_scan(db: Session, user: User, target_url: str = "https://example.com") -> Scan:
+    scan = Scan(
+        user_id=user.id,
+        target_url=target_url,
+        scan_type=ScanType.FULL,
+        status=ScanStatus.PENDING
+    )
+    db.add(scan)
+    db.commit()
+    db.refresh(scan)
+    return scan
+
+
+def _findings(*severities):
+    return [
+        {
+            'severity': severity,
+            'title': f'Finding {i}',
+            'description': f'Description {i}',
+            'recommendation': None
+        }
+        for i, severity in enumerate(severities)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_execute_scan_bulk_inserts_findings(test_db: Session, async_db: AsyncSession, test_user: User, monkeypatch):
+    """All findings are written with one INSERT statement"""
+    findings = _findings(SeverityEnum.HIGH, SeverityEnum.LOW, SeverityEnum.INFO)
+
+    async def fake_scan(self, scan_type):
+        return findings
+
+    monkeypatch.setattr(SecurityScanner, "perform_scan", fake_scan)
+    scan = _pending_scan(test_db, test_user)
+
+    inserts = []
+
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO vulnerabilities"):
+            inserts.append(statement)
+
+    engine = async_db.get_bind()
+    event.listen(engine, "before_cursor_execute", count_inserts)
+    try:
+        await scan_service.execute_scan(async_db, scan.id)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_inserts)
+
+    assert len(inserts) == 1
+
+    test_db.expire_all()
+    stored = test_db.get(Scan, scan.id)
+    assert stored.status == ScanStatus.COMPLETED
+    assert stored.completed_at is not None
+    assert [v.severity for v in stored.vulnerabilities] == [
+        Severity.HIGH, Severity.LOW, Severity.INFO]
+
+
+@pytest.mark.asyncio
+async def test_execute_scan_records_failure(test_db: Session, async_db: AsyncSession, test_user: User, monkeypatch):
+    """A scanner error marks the scan failed and stores the error as a finding"""
+    async def broken_scan(self, scan_type):
+        raise RuntimeError("scanner exploded")
+
+    monkeypatch.setattr(SecurityScanner, "perform_scan", broken_scan)
+    scan = _pending_scan(test_db, test_user)
+
+    with pytest.raises(RuntimeError):
+        await scan_service.execute_scan(async_db, scan.id)
+
+    test_db.expire_all()
+    stored = test_db.get(Scan, scan.id)
+    assert stored.status == ScanStatus.FAILED
+    assert len(stored.vulnerabilities) == 1
+    assert stored.vulnerabilities[0].title == "Scan execution error"
+    assert "scanner exploded" in stored.vulnerabilities[0].description
+
+
+@pytest.mark.asyncio
+async def test_execute_scan_stores_summary(test_db: Session, async_db: AsyncSession, test_user: User, monkeypatch):
+    """Severity counters, score and risk level are stored on the scan"""
+    async def fake_scan(self, scan_type):
+        return _findings(SeverityEnum.CRITICAL, SeverityEnum.HIGH,
+                         SeverityEnum.HIGH, SeverityEnum.INFO)
+
+    monkeypatch.setattr(SecurityScanner, "perform_scan", fake_scan)
+    scan = _pending_scan(test_db, test_user)
+
+    await scan_service.execute_scan(async_db, scan.id)
+
+    test_db.expire_all()
+    stored = test_db.get(Scan, scan.id)
+    assert stored.vulnerability_count == 4
+    assert stored.critical_count == 1
+    assert stored.high_count == 2
+    assert stored.medium_count == 0
+    assert stored.info_count == 1
+    assert stored.security_score == 80
+    assert stored.risk_level == 'low'
+
+
+@pytest.mark.asyncio
+async def test_execute_scan_stores_timings(test_db: Session, async_db: AsyncSession, test_user: User, monkeypatch):
+    """Per-check timings are stored on the scan and shown in its report summary"""
+    from app.services.report_service import ReportGenerator
+
+    async def fake_scan(self, scan_type):
+        self.timings['headers'] = {'wall_ms': 120.5, 'ttfb_ms': 98.25, 'outcome': 'completed'}
+        return _findings(SeverityEnum.INFO)
+
+    monkeypatch.setattr(SecurityScanner, "perform_scan", fake_scan)
+    scan = _pending_scan(test_db, test_user)
+
+    await scan_service.execute_scan(async_db, scan.id)
+
+    test_db.expire_all()
+    stored = test_db.get(Scan, scan.id)
+    expected = {'headers': {'wall_ms': 120.5, 'ttfb_ms': 98.25, 'outcome': 'completed'}}
+    assert stored.timings == expected
+    assert ReportGenerator(stored).generate_summary()['timings'] == expected
+
+
+@pytest.mark.asyncio
+async def test_summary_uses_stored_counters(test_db: Session, async_db: AsyncSession, test_user: User):
+    """Summaries of finished scans never load the findings"""
+    from app.services.report_service import ReportGenerator
+
+    scan = _pending_scan(test_db, test_user)
+    await scan_service.save_scan_results(
+        async_db, scan.id, _findings(SeverityEnum.MEDIUM), ScanStatus.COMPLETED)
+
+    test_db.expire_all()
+    stored = test_db.get(Scan, scan.id)
+    summary = ReportGenerator(stored).generate_summary()
+
+    assert 'vulnerabilities' not in stored.__dict__
+    assert summary['total_vulnerabilities'] == 1
+    assert summary['severity_breakdown']['medium'] == 1
+    assert summary['security_score'] == 98
+
+
+def test_backfill_scan_summaries(test_db: Session, test_user: User):
+    """Scans finished before the counters existed get them computed"""
+    scan = _pending_scan(test_db, test_user)
+    scan.status = ScanStatus.COMPLETED
+    test_db.add_all([
+        Vulnerability(scan_id=scan.id, severity=Severity.CRITICAL,
+                      title="a", description="a"),
+        Vulnerability(scan_id=scan.id, severity=Severity.LOW,
+                      title="b", description="b"),
+    ])
+    pending = _pending_scan(test_db, test_user, "https://pending.example.com")
+    test_db.commit()
+
+    assert scan_service.backfill_scan_summaries(test_db, batch_size=1) == 1
+
+    test_db.expire_all()
+    stored = test_db.get(Scan, scan.id)
+    assert stored.vulnerability_count == 2
+    assert stored.critical_count == 1
+    assert stored.low_count == 1
+    assert stored.security_score == 89
+    assert test_db.get(Scan, pending.id).vulnerability_count is None
+
+
+def test_domain_is_normalized_from_target_url(test_db: Session, test_user: User):
+    """The domain column is the lowercased host without port"""
+    scan = _pending_scan(test_db, test_user, "https://WWW.Example.com:8443/path")
+    assert scan.domain == "www.example.com"
+
+    scan.target_url = "http://other.example.org"
+    assert scan.domain == "other.example.org"
+
+
+def test_backfill_scan_domains(test_db: Session, test_user: User):
+    """Scans created before the domain column existed get it filled"""
+    from sqlalchemy import update
+
+    scan = _pending_scan(test_db, test_user, "https://Legacy.example.com/x")
+    test_db.execute(update(Scan).where(Scan.id == scan.id).values(domain=None))
+    test_db.commit()
+
+    assert scan_service.backfill_scan_domains(test_db) == 1
+
+    test_db.expire_all()
+    assert test_db.get(Scan, scan.id).domain == "legacy.example.com"
+
+
+def test_normalize_target():
+    """Targets that send identical requests share one canonical form"""
+    assert normalize_target("HTTPS://Example.com") == "https://example.com/"
+    assert normalize_target("https://example.com.:443/#top") == "https://example.com/"
+    assert normalize_target("http://example.com:8080/A?b=1") == "http://example.com:8080/A?b=1"
+    assert normalize_target("https://example.com/a") != normalize_target("https://example.com/A")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_scans_of_a_target_share_one_probe(
+    test_db: Session, async_session_factory, test_user: User, monkeypatch
+):
+    """Identical scans in flight run the scanner once and store their own findings"""
+    calls = []
+
+    async def slow_scan(self, scan_type):
+        calls.append(self.target_url)
+        self.timings['https'] = {'wall_ms': 1.0, 'outcome': 'completed'}
+        await asyncio.sleep(0.1)
+        return _findings(SeverityEnum.HIGH, SeverityEnum.INFO)
+
+    monkeypatch.setattr(SecurityScanner, "perform_scan", slow_scan)
+    first = _pending_scan(test_db, test_user, "https://example.com")
+    second = _pending_scan(test_db, test_user, "https://EXAMPLE.com/")
+    other = _pending_scan(test_db, test_user, "https://other.example.com")
+
+    async def execute(scan_id):
+        async with async_session_factory() as db:
+            await scan_service.execute_scan(db, scan_id)
+
+    await asyncio.gather(*(execute(scan.id) for scan in (first, second, other)))
+
+    # Whichever of the two equivalent scans started first ran the scanner
+    assert len(calls) == 2
+    assert "https://other.example.com" in calls
+
+    test_db.expire_all()
+    for scan in (first, second, other):
+        stored = test_db.get(Scan, scan.id)
+        assert stored.status == ScanStatus.COMPLETED
+        assert len(stored.vulnerabilities) == 2
+    owners = test_db.execute(select(Vulnerability.scan_id)).scalars().all()
+    assert sorted(owners) == sorted([first.id] * 2 + [second.id] * 2 + [other.id] * 2)
+
+    coalesced = [test_db.get(Scan, scan.id).timings['https'].get('coalesced')
+                 for scan in (first, second)]
+    assert sorted(coalesced, key=bool) == [None, True]
+    assert 'coalesced' not in test_db.get(Scan, other.id).timings['https']
+
+
+@pytest.mark.asyncio
+async def test_pagination_over_second_precision_rows(tmp_path):
+    """Scans stored by the SQLite server default are paged once each after migrating"""
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    from app.core.database import Base, async_database_url
+    from app.core.migrations import upgrade_database
+
+    url = f"sqlite:///{tmp_path}/legacy.db"
+    legacy = create_engine(url)
+    Base.metadata.create_all(legacy)
+    with legacy.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, email, hashed_password, is_active, is_superuser) "
+                          "VALUES (1, 'legacy@example.com', 'x', 1, 0)"))
+        for _ in range(5):
+            conn.execute(text(
+                "INSERT INTO scans (user_id, target_url, scan_type, status, created_at) "
+                "VALUES (1, 'https://example.com', 'BASIC', 'COMPLETED', '2026-01-01 10:00:00')"))
+    upgrade_database(legacy)
+    legacy.dispose()
+
+    async_legacy = create_async_engine(async_database_url(url))
+    try:
+        async with AsyncSession(async_legacy) as db:
+            seen, cursor = [], None
+            for _ in range(5):
+                scans, cursor = await scan_service.get_user_scans(db, 1, limit=2, cursor=cursor)
+                seen.extend(scan.id for scan in scans)
+                if cursor is None:
+                    break
+        assert seen == [5, 4, 3, 2, 1]
+        assert cursor is None
+    finally:
+        await async_legacy.dispose()
@@ -0,0 +1,398 @@
+"""
+Tests for the security scanner service
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.schemas.vulnerability import SeverityEnum
+from app.services.scanner import SecurityScanner
+
+
+def _finding(title: str):
+    return {
+        'severity': SeverityEnum.INFO,
+        'title': title,
+        'description': title,
+        'recommendation': None
+    }
+
+
+def _stub_checks(scanner: SecurityScanner, delays: dict):
+    """Replace network checks with stubs that sleep for the given delay"""
+    for check, delay in delays.items():
+        async def stub(check=check, delay=delay):
+            await asyncio.sleep(delay)
+            return [_finding(check)]
+        setattr(scanner, f'scan_{check}', stub)
+
+
+@pytest.mark.asyncio
+async def test_perform_scan_runs_checks_concurrently():
+    """Checks overlap, and findings keep the fixed check order"""
+    scanner = SecurityScanner("https://example.com")
+    _stub_checks(scanner, {'https': 0.2, 'headers': 0.1, 'ssl': 0.0})
+
+    start = time.monotonic()
+    findings = await scanner.perform_scan("full")
+    elapsed = time.monotonic() - start
+
+    assert [f['title'] for f in findings] == ['https', 'headers', 'ssl']
+    assert elapsed < 0.3
+
+
+@pytest.mark.asyncio
+async def test_perform_scan_check_timeout():
+    """A slow check is reported as timed out without holding up the others"""
+    scanner = SecurityScanner("https://example.com", check_timeout=0.1)
+    _stub_checks(scanner, {'https': 0.0, 'headers': 5.0, 'ssl': 0.0})
+
+    findings = await scanner.perform_scan("full")
+
+    assert [f['title'] for f in findings] == [
+        'https', 'HEADERS check timed out', 'ssl']
+    assert findings[1]['severity'] == SeverityEnum.MEDIUM
+
+
+@pytest.mark.asyncio
+async def test_perform_scan_total_timeout():
+    """Checks still running when the scan budget runs out are cancelled"""
+    scanner = SecurityScanner(
+        "https://example.com", check_timeout=5.0, total_timeout=0.1)
+    _stub_checks(scanner, {'https': 0.0, 'headers': 5.0, 'ssl': 5.0})
+
+    findings = await scanner.perform_scan("full")
+
+    assert [f['title'] for f in findings] == [
+        'https', 'HEADERS check timed out', 'SSL check timed out']
+
+
+@pytest.mark.asyncio
+async def test_perform_scan_selects_checks_by_type():
+    """Only the checks belonging to the scan type are run"""
+    scanner = SecurityScanner("https://example.com")
+    _stub_checks(scanner, {'https': 0.0, 'headers': 0.0, 'ssl': 0.0})
+
+    findings = await scanner.perform_scan("headers")
+
+    assert [f['title'] for f in findings] == ['headers']
+
+
+def _write_self_signed_cert(directory):
+    """Write a self-signed certificate and key for localhost"""
+    import datetime
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=90))
+        .add_extension(
+            x509.SubjectAlternativeName([x509.DNSName("localhost")]),
+            critical=False)
+        .add_extension(
+            x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = directory / "cert.pem"
+    key_path = directory / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+@pytest.fixture
+def tls_material(tmp_path):
+    """Server and client SSL contexts for a local TLS server"""
+    import ssl
+    from app.services.tls_probe import create_probe_context
+
+    cert_path, key_path = _write_self_signed_cert(tmp_path)
+
+    server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_context.load_cert_chain(cert_path, key_path)
+    server_context.set_alpn_protocols(['h2', 'http/1.1'])
+
+    client_context = create_probe_context()
+    client_context.load_verify_locations(cafile=str(cert_path))
+
+    return server_context, client_context
+
+
+async def _start_server(server_context=None):
+    async def handle(reader, writer):
+        await reader.read()
+        writer.close()
+
+    server = await asyncio.start_server(
+        handle, "127.0.0.1", 0, ssl=server_context)
+    return server, server.sockets[0].getsockname()[1]
+
+
+@pytest.mark.asyncio
+async def test_probe_tls_collects_handshake_details(tls_material):
+    """Certificate, version and ALPN come from one async handshake"""
+    from app.services.tls_probe import probe_tls
+
+    server_context, client_context = tls_material
+    server, port = await _start_server(server_context)
+    async with server:
+        result = await probe_tls(
+            "localhost", port, timeout=5, context=client_context)
+
+    assert result.version in ('TLSv1.2', 'TLSv1.3')
+    assert result.alpn_protocol == 'h2'
+    assert result.certificate['subject'] == ((('commonName', 'localhost'),),)
+    assert 'notAfter' in result.certificate
+    assert set(result.timings) == {'dns_ms', 'connect_ms', 'tls_handshake_ms'}
+
+
+@pytest.mark.asyncio
+async def test_probe_tls_thread_fallback(tls_material, monkeypatch):
+    """Loops without TLS upgrade support fall back to a blocking probe"""
+    from app.services import tls_probe
+
+    async def unsupported(*args):
+        raise NotImplementedError
+
+    monkeypatch.setattr(tls_probe, '_probe_with_streams', unsupported)
+
+    server_context, client_context = tls_material
+    server, port = await _start_server(server_context)
+    async with server:
+        result = await tls_probe.probe_tls(
+            "localhost", port, timeout=5, context=client_context)
+
+    assert result.alpn_protocol == 'h2'
+    assert result.certificate['subject'] == ((('commonName', 'localhost'),),)
+
+
+@pytest.mark.asyncio
+async def test_probe_tls_does_not_block_event_loop(tls_material):
+    """A server that never answers the handshake times out without stalling the loop"""
+    from app.services.tls_probe import probe_tls
+
+    _, client_context = tls_material
+    server, port = await _start_server()  # plain TCP, never speaks TLS
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker_task = asyncio.create_task(ticker())
+    async with server:
+        with pytest.raises(asyncio.TimeoutError):
+            await probe_tls("localhost", port, timeout=0.3, context=client_context)
+    ticker_task.cancel()
+
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_shared_http_client_is_reused():
+    """Every scan in a process shares one pooled client"""
+    from app.services.http_client import get_http_client, close_http_client
+
+    client = get_http_client()
+    assert get_http_client() is client
+
+    await close_http_client()
+    assert client.is_closed
+    assert get_http_client() is not client
+    await close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_scan_headers_uses_given_client():
+    """Header checks read the response from the scanner's HTTP client"""
+    import httpx
+
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, headers={
+            'Strict-Transport-Security': 'max-age=31536000',
+            'X-Content-Type-Options': 'nosniff',
+        })
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        scanner = SecurityScanner("https://example.com", http_client=client)
+        findings = await scanner.scan_headers()
+
+    titles = [f['title'] for f in findings]
+    assert len(requests) == 1
+    assert 'Strict-Transport-Security header present' in titles
+    assert 'Missing X-Frame-Options header' in titles
+
+
+@pytest.mark.asyncio
+async def test_checks_record_timings():
+    """Each check records its wall time and network phases of the request"""
+    import httpx
+
+    body = b'<html>ok</html>'
+
+    async def handle(reader, writer):
+        await reader.readuntil(b'\r\n\r\n')
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body))
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server, httpx.AsyncClient() as client:
+        scanner = SecurityScanner(f"http://127.0.0.1:{port}/", http_client=client)
+        await scanner.perform_scan("full")
+
+    headers = scanner.timings['headers']
+    assert headers['outcome'] == 'completed'
+    assert headers['bytes_received'] == len(body)
+    assert headers['redirects'] == 0
+    assert 0 <= headers['connect_ms'] <= headers['ttfb_ms'] <= headers['wall_ms']
+    assert 'tls_handshake_ms' not in headers  # plain HTTP
+    assert set(scanner.timings['https']) == {'wall_ms', 'outcome'}
+
+
+@pytest.mark.asyncio
+async def test_shared_client_keeps_no_cookies():
+    """Every scan sees the cookies a first visit gets, and sends none back"""
+    from app.services.http_client import create_http_client
+
+    received = []
+
+    async def handle(reader, writer):
+        request = (await reader.readuntil(b'\r\n\r\n')).decode()
+        received.append('cookie:' in request.lower())
+        cookie = b'' if 'cookie:' in request.lower() else b'Set-Cookie: sid=abc; Path=/\r\n'
+        writer.write(b'HTTP/1.1 200 OK\r\n%sContent-Length: 0\r\n\r\n' % cookie)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server, create_http_client() as client:
+        for _ in range(2):
+            scanner = SecurityScanner(
+                f"http://127.0.0.1:{port}/", http_client=client, max_age=0)
+            titles = [f['title'] for f in await scanner.scan_headers()]
+            assert 'Cookie without Secure flag' in titles
+            assert 'Cookie without HttpOnly flag' in titles
+
+    assert received == [False, False]
+
+
+@pytest.mark.asyncio
+async def test_host_slot_caps_concurrency(monkeypatch):
+    """No more than HTTP_MAX_CONNECTIONS_PER_HOST requests run against one host"""
+    from app.core.config import settings
+    from app.services.http_client import host_slot, close_http_client
+
+    monkeypatch.setattr(settings, 'HTTP_MAX_CONNECTIONS_PER_HOST', 2)
+    await close_http_client()  # drop host slots created with the old cap
+    active = peak = 0
+
+    async def request():
+        nonlocal active, peak
+        async with host_slot("example.com"):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(request() for _ in range(6)))
+    await close_http_client()
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_repeat_scans_reuse_probe_results(monkeypatch):
+    """Header and TLS probes of a recent scan are reused until max_age"""
+    import httpx
+    from app.services import scanner as scanner_module
+    from app.services.tls_probe import TLSProbeResult
+
+    requests = []
+    handshakes = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, headers={'X-Frame-Options': 'DENY'})
+
+    async def fake_probe_tls(hostname, port):
+        handshakes.append((hostname, port))
+        return TLSProbeResult(
+            hostname=hostname, port=port, address="192.0.2.1",
+            certificate={'notAfter': 'Jan  1 00:00:00 2099 GMT'},
+            version='TLSv1.3', cipher=None, alpn_protocol=None,
+            timings={'tls_handshake_ms': 12.5})
+
+    monkeypatch.setattr(scanner_module, 'probe_tls', fake_probe_tls)
+
+    async def scan(**kwargs):
+        scanner = SecurityScanner("https://example.com", http_client=client, **kwargs)
+        findings = await scanner.perform_scan("full")
+        return [f['title'] for f in findings], scanner.timings
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        first, first_timings = await scan()
+        second, second_timings = await scan()
+        assert (len(requests), len(handshakes)) == (1, 1)
+        assert second == first
+        assert first_timings['headers']['from_cache'] is False
+        assert first_timings['ssl']['tls_handshake_ms'] == 12.5
+        for check in ('headers', 'ssl'):
+            assert second_timings[check]['from_cache'] is True
+            assert second_timings[check]['cache_age_ms'] >= 0
+        assert 'tls_handshake_ms' not in second_timings['ssl']
+
+        # A different path is a different resource; the endpoint's TLS is shared
+        scanner = SecurityScanner("https://example.com/login", http_client=client)
+        await scanner.perform_scan("full")
+        assert (len(requests), len(handshakes)) == (2, 1)
+
+        _, fresh_timings = await scan(max_age=0)
+        assert (len(requests), len(handshakes)) == (3, 2)
+        assert fresh_timings['headers']['from_cache'] is False
+
+        await asyncio.sleep(0.05)
+        _, timings = await scan(max_age=0.01)
+        assert timings['ssl']['from_cache'] is False
+        assert (len(requests), len(handshakes)) == (4, 3)
+
+
+@pytest.mark.asyncio
+async def test_failed_probes_are_not_cached(monkeypatch):
+    import httpx
+
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        for _ in range(2):
+            scanner = SecurityScanner("https://example.com", http_client=client)
+            findings = await scanner.scan_headers()
+            assert findings[0]['title'] == 'Unable to connect to target'
+    assert len(attempts) == 2
@@ -28,6 +28,25 @@ def test_create_scan(client: TestClient, test_user_token: str):
     assert data["status"] in ["pending", "running"]
 
 
+def test_create_scan_probe_cache_options(client: TestClient, test_user_token: str, test_db: Session):
+    """max_age and force_fresh are stored with the scan for the worker"""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    bodies = [
+        {"target_url": "example.com"},
+        {"target_url": "example.com", "max_age": 60},
+        {"target_url": "example.com", "max_age": 60, "force_fresh": True},
+    ]
+    scan_ids = [
+        client.post("/api/v1/scans/", headers=headers, json=body).json()["id"]
+        for body in bodies
+    ]
+    assert [test_db.get(Scan, scan_id).probe_max_age for scan_id in scan_ids] == [None, 60, 0]
+
+    response = client.post(
+        "/api/v1/scans/", headers=headers, json={"target_url": "example.com", "max_age": -1})
+    assert response.status_code == 422
+
+
 def test_create_scan_without_auth(client: TestClient):
     """Test creating a scan without authentication"""
     response = client.post(
@@ -128,3 +147,73 @@ def test_delete_scan(client: TestClient, test_user_token: str, test_db: Session,
     # Verify scan is deleted
     deleted_scan = test_db.query(Scan).filter(Scan.id == scan.id).first()
     assert deleted_scan is None
+
+
+def test_list_scans_cursor_pagination(client: TestClient, test_user_token: str, test_db: Session, test_user: User):
+    """Pages follow the X-Next-Cursor header without duplicates or gaps"""
+    from app.models.scan import ScanStatus, ScanType
+
+    for i in range(5):
+        test_db.add(Scan(
+            user_id=test_user.id,
+            target_url=f"https://site{i}.com",
+            scan_type=ScanType.BASIC,
+            status=ScanStatus.COMPLETED
+        ))
+    test_db.commit()
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+
+    response = client.get("/api/v1/scans/?limit=2", headers=headers)
+    first_page = [s["target_url"] for s in response.json()]
+    cursor = response.headers["X-Next-Cursor"]
+    assert first_page == ["https://site4.com", "https://site3.com"]
+
+    # A scan created while paging shows up on the first page, not later ones
+    test_db.add(Scan(
+        user_id=test_user.id,
+        target_url="https://new.com",
+        scan_type=ScanType.BASIC,
+        status=ScanStatus.PENDING
+    ))
+    test_db.commit()
+
+    seen = list(first_page)
+    while cursor:
+        response = client.get(
+            f"/api/v1/scans/?limit=2&cursor={cursor}", headers=headers)
+        assert response.status_code == 200
+        seen += [s["target_url"] for s in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+
+    assert seen == [f"https://site{i}.com" for i in range(4, -1, -1)]
+
+
+def test_list_scans_status_filter(client: TestClient, test_user_token: str, test_db: Session, test_user: User):
+    """Only scans with the requested status are returned"""
+    from app.models.scan import ScanStatus, ScanType
+
+    for scan_status in (ScanStatus.COMPLETED, ScanStatus.FAILED, ScanStatus.COMPLETED):
+        test_db.add(Scan(
+            user_id=test_user.id,
+            target_url="https://test.com",
+            scan_type=ScanType.BASIC,
+            status=scan_status
+        ))
+    test_db.commit()
+
+    response = client.get(
+        "/api/v1/scans/?status_filter=completed",
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == 200
+    assert [s["status"] for s in response.json()] == ["completed", "completed"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_list_scans_invalid_cursor(client: TestClient, test_user_token: str):
+    """A malformed cursor is rejected"""
+    response = client.get(
+        "/api/v1/scans/?cursor=not-a-cursor",
+        headers={"Authorization": f"Bearer {test_user_token}"}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,67 @@
+"""
+SecureCheck Scan Worker - Entry Point
+Runs worker processes that execute queued scans
+"""
+
+import argparse
+import multiprocessing
+import os
+import signal
+
+from dotenv import load_dotenv
+
+from app.core.config import settings
+from app.services.worker import run_worker
+
+# Load environment variables
+load_dotenv()
+
+
+def main():
+    """Start the requested number of worker processes and supervise them"""
+    parser = argparse.ArgumentParser(description="Run SecureCheck scan workers")
+    parser.add_argument(
+        "--processes", type=int,
+        default=settings.WORKER_PROCESSES or os.cpu_count() or 1,
+        help="Worker processes to start (default: one per CPU core)")
+    parser.add_argument(
+        "--concurrency", type=int, default=settings.WORKER_CONCURRENCY,
+        help="Scans each process runs at the same time")
+    parser.add_argument(
+        "--metrics-port", type=int, default=None,
+        help="Serve /metrics; process N listens on this port + N")
+    args = parser.parse_args()
+
+    if args.processes == 1:
+        run_worker(args.concurrency, args.metrics_port)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=run_worker,
+            args=(args.concurrency,
+                  args.metrics_port + i if args.metrics_port else None),
+            name=f"worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def shutdown(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Children received SIGINT as well and finish their running jobs
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()